@@ -0,0 +1,255 @@
+'''
+Local fake Anime Fire and Jikan server for load testing the scrapers.
+
+Generates Anime Fire-shaped release, episode and download pages and Jikan-shaped JSON for
+N shows x M episodes, with tunable missing pages, temporary (mp4_temp) links and 429 answers.
+point_values_at() redirects the URLs in shared_components/values.py to the server.
+
+Run from src/ to serve it standalone:
+
+    python -m benchmarks.fake_animefire_server --shows 100 --episodes 12 --port 8080
+'''
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote_plus, urlsplit
+from shared_components import values
+
+
+class FakeCatalog:
+    def __init__(
+            self, shows=100, episodes=12, releases_per_page=30, missing_episode_zero_rate=0.8, gap_rate=0.0,
+            missing_download_rate=0.0, temp_rate=0.1, jikan_429_rate=0.0, retry_after=0, seed=0
+        ):
+        '''
+        Args:
+        - shows: Number of shows on the release pages.
+        - episodes: Episodes of each show, an int or a (min, max) tuple for a random number per show.
+        - releases_per_page: Releases listed in each release page.
+        - missing_episode_zero_rate: Fraction of the shows whose episode 0 pages are 404, like most Anime Fire shows.
+        - gap_rate: Fraction of the shows with a 404 watch page in the middle of the episodes.
+        - missing_download_rate: Fraction of the episodes without a download page.
+        - temp_rate: Fraction of the episodes whose download links are mp4_temp.
+        - jikan_429_rate: Fraction of the Jikan requests answered with 429.
+        - retry_after: Retry-After seconds of the 429 answers.
+        - seed: Seed of all the random choices, the same seed generates the same catalog.
+        '''
+        self.shows = shows
+        self.releases_per_page = releases_per_page
+        self.jikan_429_rate = jikan_429_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.show_data = []
+        catalog_random = random.Random(seed)
+        for show in range(shows):
+            episode_count = episodes if isinstance(episodes, int) else catalog_random.randint(*episodes)
+            first_episode = 1 if catalog_random.random() < missing_episode_zero_rate else 0
+            gap = catalog_random.randint(first_episode, episode_count) if catalog_random.random() < gap_rate else None
+            missing_downloads = {episode for episode in range(first_episode, episode_count + 1) if catalog_random.random() < missing_download_rate}
+            temp_episodes = {episode for episode in range(first_episode, episode_count + 1) if catalog_random.random() < temp_rate}
+            self.show_data.append({
+                'slug': f'fake-show-{show}',
+                'title': f'Fake Show {show}',
+                'first_episode': first_episode,
+                'last_episode': episode_count,
+                'gap': gap,
+                'missing_downloads': missing_downloads,
+                'temp_episodes': temp_episodes,
+            })
+        self.slugs = {data['slug']: show for show, data in enumerate(self.show_data)}
+        self.request_counts: dict[str, int] = {}
+
+    def count(self, route: str):
+        with self.lock:
+            self.request_counts[route] = self.request_counts.get(route, 0) + 1
+
+    def total_requests(self) -> int:
+        with self.lock:
+            return sum(self.request_counts.values())
+
+    def rate_limited(self) -> bool:
+        with self.lock:
+            return self.random.random() < self.jikan_429_rate
+
+    def jikan_anime(self, show: int) -> dict:
+        data = self.show_data[show]
+        return {
+            'mal_id': show + 1, 'title': data['title'], 'title_english': data['title'], 'title_japanese': None,
+            'type': 'TV', 'episodes': data['last_episode'], 'status': 'Currently Airing', 'airing': True,
+            'aired': {'string': 'Oct 2024 to ?'}, 'rating': 'PG-13', 'duration': '24 min per ep',
+            'season': 'fall', 'year': 2024, 'studios': [{'name': 'Fake Studio'}],
+            'producers': [{'name': 'Fake Producer'}], 'synopsis': f'Synopsis of {data["title"]}.',
+        }
+
+    def has_watch_page(self, show: int, episode: int) -> bool:
+        data = self.show_data[show]
+        return data['first_episode'] <= episode <= data['last_episode'] and episode != data['gap']
+
+    def has_download_page(self, show: int, episode: int) -> bool:
+        return self.has_watch_page(show, episode) and episode not in self.show_data[show]['missing_downloads']
+
+
+def _page(body: str) -> bytes:
+    return f'<!DOCTYPE html><html><head><title>Fake</title></head><body>{body}</body></html>'.encode('utf-8')
+
+
+class FakeAnimeFireHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real servers
+    disable_nagle_algorithm = True  # Headers and body are separate writes, Nagle would delay every response
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status_code: int, body: bytes = b'', content_type='text/html; charset=utf-8', headers: dict | None = None):
+        self.send_response(status_code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data: dict):
+        self._send(200, json.dumps(data).encode('utf-8'), content_type='application/json')
+
+    def do_GET(self):
+        catalog: FakeCatalog = self.server.catalog
+        base = self.server.base_url
+        path = urlsplit(self.path).path
+
+        match = re.fullmatch(r'/em-lancamento/(\d+)', path)
+        if match:
+            catalog.count('releases')
+            page = int(match.group(1))
+            first = (page - 1) * catalog.releases_per_page
+            anchors = ''.join(
+                f'<div class="divCardUltimosEps"><a href="{base}/animes/{data["slug"]}-todos-os-episodios">'
+                f'<h3 class="animeTitle">{data["title"]}</h3></a></div>'
+                for data in catalog.show_data[first:first + catalog.releases_per_page]
+            )
+            return self._send(200, _page(anchors))
+
+        match = re.fullmatch(r'/(animes|download)/([\w-]+)/(\d+)', path)
+        if match:
+            kind, slug, episode = match.group(1), match.group(2), int(match.group(3))
+            catalog.count(kind)
+            show = catalog.slugs.get(slug)
+            if kind == 'animes':
+                if show is None or not catalog.has_watch_page(show, episode):
+                    return self._send(404, _page('Not found'))
+                return self._send(200, _page(f'<video src="{base}/video/{slug}/{episode}"></video><a href="{base}/animes/{slug}-todos-os-episodios">Todos os episódios</a>'))
+            if show is None or not catalog.has_download_page(show, episode):
+                return self._send(404, _page('Not found'))
+            folder = 'mp4_temp' if episode in catalog.show_data[show]['temp_episodes'] else 'mp4'
+            return self._send(200, _page(
+                f'<a href="{base}/s2/{folder}/{slug}/{episode}/(SD).mp4">SD</a>'
+                f'<a href="{base}/s2/{folder}/{slug}/{episode}/(HD).mp4">HD</a>'
+            ))
+
+        if path == '/v4/seasons/now':
+            catalog.count('jikan')
+            if catalog.rate_limited():
+                return self._send(429, b'{"status": 429}', content_type='application/json', headers={'Retry-After': str(catalog.retry_after)})
+            page = int(parse_qs(urlsplit(self.path).query).get('page', ['1'])[0])
+            shows = range((page - 1) * 25, min(page * 25, catalog.shows))
+            return self._send_json({
+                'pagination': {'last_visible_page': (catalog.shows + 24) // 25, 'has_next_page': page * 25 < catalog.shows},
+                'data': [catalog.jikan_anime(show) for show in shows],
+            })
+
+        if path == '/v4/anime' or re.fullmatch(r'/v4/anime/\d+', path):
+            catalog.count('jikan')
+            if catalog.rate_limited():
+                return self._send(429, b'{"status": 429}', content_type='application/json', headers={'Retry-After': str(catalog.retry_after)})
+            if path == '/v4/anime':
+                query = unquote_plus(parse_qs(urlsplit(self.path).query).get('q', [''])[0])
+                match = re.search(r'(\d+)$', query)
+                if match is None or int(match.group(1)) >= catalog.shows:
+                    return self._send_json({'data': []})
+                show = int(match.group(1))
+                return self._send_json({'data': [{'mal_id': show + 1, 'title': catalog.show_data[show]['title']}]})
+            show = int(path.rsplit('/', 1)[1]) - 1
+            if not 0 <= show < catalog.shows:
+                return self._send(404, b'{"status": 404}', content_type='application/json')
+            return self._send_json({'data': catalog.jikan_anime(show)})
+
+        catalog.count('other')
+        self._send(404, _page('Not found'))
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Streaming clients close the connection once they read enough, that is not an error
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def start_fake_server(catalog: FakeCatalog, host='127.0.0.1', port=0):
+    '''
+    Start the fake server in a daemon thread.
+
+    Args:
+    - catalog: Shows served.
+    - host: Interface to bind.
+    - port: Port to bind, a free port if 0.
+
+    Returns:
+    - The server (stop it with shutdown()) and its base URL.
+    '''
+    server = FakeServer((host, port), FakeAnimeFireHandler)
+    server.catalog = catalog
+    server.base_url = f'http://{host}:{server.server_address[1]}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.base_url
+
+
+def point_values_at(base_url: str):
+    '''
+    Redirect the Anime Fire and Jikan URLs of shared_components/values.py to a fake server.
+    '''
+    values.URL_AF_RELEASES = f'{base_url}/em-lancamento/1'
+    values.URL_AF_DOWNLOADS = f'{base_url}/download/'
+    values.URL_AF_FILTER_RELEAES = f'{base_url}/animes/'
+    values.URL_JIKAN_SEARCH = f'{base_url}/v4/anime?q='
+    values.URL_JIKAN_SEARCH_BY_MALID = f'{base_url}/v4/anime/'
+    values.URL_JIKAN_SEASON_NOW = f'{base_url}/v4/seasons/now'
+    values.URLS_AF_FILTER_DOWNLOADS_LINKS = [f'{base_url}/s2/mp4/', f'{base_url}/s2/mp4_temp/']
+    # Only the Jikan routes answer 429, so the Jikan client sees them like with the real host
+    values.SCHEDULER_NO_RETRY_429_HOSTS = [urlsplit(base_url).netloc]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Anime Fire and Jikan server')
+    parser.add_argument('--shows', type=int, default=100)
+    parser.add_argument('--episodes', type=int, default=12)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--gap-rate', type=float, default=0.0)
+    parser.add_argument('--missing-download-rate', type=float, default=0.0)
+    parser.add_argument('--temp-rate', type=float, default=0.1)
+    parser.add_argument('--jikan-429-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    catalog = FakeCatalog(
+        shows=args.shows, episodes=args.episodes, gap_rate=args.gap_rate, missing_download_rate=args.missing_download_rate,
+        temp_rate=args.temp_rate, jikan_429_rate=args.jikan_429_rate, seed=args.seed
+    )
+    server, base_url = start_fake_server(catalog, host=args.host, port=args.port)
+    print(f'Serving {args.shows} shows on {base_url}, press Ctrl+C to stop')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+'''
+Compare the CPU time of the link extraction backends on AnimeFire pages.
+
+Save some pages (release list, anime page, episode and download pages) as .html files in a
+directory and run from src/:
+
+    python -m benchmarks.link_extractors_benchmark ../data/pages --repeat 20
+
+Without a directory the pages are generated by the fake server of benchmarks/fake_animefire_server.py:
+
+    python -m benchmarks.link_extractors_benchmark --releases-per-page 30
+
+The bs4-tree column is the extraction used before the backends existed (a full BeautifulSoup tree).
+'''
+import argparse
+import os
+import time
+import requests
+from bs4 import BeautifulSoup
+from benchmarks.fake_animefire_server import FakeCatalog, start_fake_server
+from client import link_extractors
+
+
+def load_pages(pages_dir: str) -> dict:
+    pages = {}
+    for file_name in sorted(os.listdir(pages_dir)):
+        if file_name.endswith(('.html', '.htm')):
+            with open(os.path.join(pages_dir, file_name), encoding='utf-8', errors='replace') as file:
+                pages[file_name] = file.read()
+    return pages
+
+
+def fake_pages(releases_per_page=30, episodes=12) -> dict:
+    '''
+    Get a release page, a watch page and a download page of each kind from a FakeCatalog.
+    '''
+    catalog = FakeCatalog(shows=releases_per_page, episodes=episodes, releases_per_page=releases_per_page, temp_rate=0.0)
+    server, base_url = start_fake_server(catalog)
+    paths = {
+        'releases.html': '/em-lancamento/1',
+        'watch.html': '/animes/fake-show-0/1',
+        'download.html': '/download/fake-show-0/1',
+    }
+    try:
+        return {file_name: requests.get(base_url + path).text for file_name, path in paths.items()}
+    finally:
+        server.shutdown()
+
+
+def extract_anchors_bs4_tree(html: str) -> list[tuple]:
+    soup = BeautifulSoup(html, 'html.parser')
+    return [(link.get('href'), link.get_text()) for link in soup.find_all('a')]
+
+
+def measure(extract, html: str, repeat: int) -> float:
+    '''
+    Returns:
+    - Mean CPU seconds of one extraction.
+    '''
+    start = time.process_time()
+    for _ in range(repeat):
+        extract(html)
+    return (time.process_time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the link extraction backends')
+    parser.add_argument('pages_dir', nargs='?', help='Directory with saved .html pages, fake server pages if omitted')
+    parser.add_argument('--repeat', type=int, default=20, help='Extractions per page and backend')
+    parser.add_argument('--releases-per-page', type=int, default=30, help='Releases in the fake release page')
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir) if args.pages_dir else fake_pages(args.releases_per_page)
+    if not pages:
+        print(f'No .html pages found in {args.pages_dir}')
+        return
+
+    extractors = {'bs4-tree': extract_anchors_bs4_tree, **link_extractors.EXTRACTORS}
+    backends = list(extractors)
+    totals = dict.fromkeys(backends, 0.0)
+    print(f"{'page':40} " + ' '.join(f'{backend + " ms":>12}' for backend in backends) + f"{'anchors':>10}")
+    for file_name, html in pages.items():
+        results = [extractors[backend](html) for backend in backends]
+        if any(result != results[0] for result in results):
+            print(f'Warning: backends disagree on {file_name}')
+        row = []
+        for backend in backends:
+            seconds = measure(extractors[backend], html, args.repeat)
+            totals[backend] += seconds
+            row.append(f'{seconds * 1000:12.3f}')
+        print(f'{file_name[:40]:40} ' + ' '.join(row) + f'{len(results[0]):10}')
+
+    print(f"{'total':40} " + ' '.join(f'{totals[backend] * 1000:12.3f}' for backend in backends))
+    baseline = totals['bs4-tree']
+    for backend in backends:
+        if backend != 'bs4-tree' and totals[backend] > 0:
+            print(f'{backend}: {baseline / totals[backend]:.1f}x faster than bs4-tree ({100 * (1 - totals[backend] / baseline):.0f}% less CPU)')
+
+
+if __name__ == '__main__':
+    main()
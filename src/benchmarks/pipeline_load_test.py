@@ -0,0 +1,76 @@
+'''
+Load test of extract_releasing_animes_from_af_and_insert_into_database against the fake
+Anime Fire/Jikan server, with an increasing number of shows. Run from src/:
+
+    python -m benchmarks.pipeline_load_test --shows 10 100 1000 10000 --episodes 12
+'''
+import argparse
+import os
+import tempfile
+import time
+from benchmarks.fake_animefire_server import FakeCatalog, point_values_at, start_fake_server
+from interface import db_acess
+from interface.db_factory_and_manager import SQLiteDatabaseManager
+from shared_components import values
+
+
+def run(shows: int, args) -> dict:
+    catalog = FakeCatalog(
+        shows=shows, episodes=args.episodes, gap_rate=args.gap_rate, missing_download_rate=args.missing_download_rate,
+        temp_rate=args.temp_rate, jikan_429_rate=args.jikan_429_rate, seed=args.seed
+    )
+    server, base_url = start_fake_server(catalog)
+    point_values_at(base_url)
+    values.AF_RELEASES_HARD_LIMIT = max(values.AF_RELEASES_HARD_LIMIT, shows)
+    try:
+        with tempfile.TemporaryDirectory() as db_dir:
+            db_manager = SQLiteDatabaseManager(os.path.join(db_dir, 'load_test.db'))
+            db_manager.create_tables()
+            start = time.perf_counter()
+            animes, episodes = db_acess.extract_releasing_animes_from_af_and_insert_into_database(db_manager, extract_amount=shows)
+            seconds = time.perf_counter() - start
+            db_manager.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    return {
+        'shows': shows,
+        'animes': len(animes),
+        'episodes': len(episodes),
+        'seconds': seconds,
+        'requests': catalog.total_requests(),
+        'request_counts': dict(catalog.request_counts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the release pipeline against a fake server')
+    parser.add_argument('--shows', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--episodes', type=int, default=12)
+    parser.add_argument('--gap-rate', type=float, default=0.0)
+    parser.add_argument('--missing-download-rate', type=float, default=0.0)
+    parser.add_argument('--temp-rate', type=float, default=0.1)
+    parser.add_argument('--jikan-429-rate', type=float, default=0.0)
+    parser.add_argument('--jikan-per-second', type=float, default=1000, help='Jikan rate limit used against the fake server')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # The shared clients are created on first use, so these must be set before the first run
+    values.HTTP_CACHE_ENABLED = False
+    values.JIKAN_REQUESTS_PER_SECOND = args.jikan_per_second
+    values.JIKAN_REQUESTS_PER_MINUTE = args.jikan_per_second * 60
+    values.AF_RELEASES_HWM_PATH = os.path.join(tempfile.gettempdir(), 'load_test_releases_hwm.json')
+
+    results = [run(shows, args) for shows in args.shows]
+    print(f"{'shows':>7} {'animes':>7} {'episodes':>9} {'seconds':>9} {'shows/s':>9} {'requests':>9} {'req/s':>8}")
+    for result in results:
+        seconds = result['seconds']
+        print(
+            f"{result['shows']:7} {result['animes']:7} {result['episodes']:9} {seconds:9.2f} "
+            f"{result['shows'] / seconds:9.1f} {result['requests']:9} {result['requests'] / seconds:8.1f}"
+        )
+        print(f"        requests by route: {result['request_counts']}")
+
+
+if __name__ == '__main__':
+    main()
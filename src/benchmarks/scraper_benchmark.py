@@ -0,0 +1,102 @@
+'''
+Offline benchmark of the Anime Fire/Jikan scrapers.
+
+Record the requests of a real run once, then replay them as many times as needed. Run from src/:
+
+    python -m benchmarks.scraper_benchmark record ../data/fixtures.jsonl.gz --extract-amount 5 --custom-url https://animefire.plus/animes/anime-name-todos-os-episodios
+    python -m benchmarks.scraper_benchmark replay ../data/fixtures.jsonl.gz --latency 0.05 --error-rate 0.01 --error-status 503
+
+The report has the end-to-end time, the pages per second and the requests per anime of
+extract_releasing_animes_from_af and extract_custom_anime_from_af.
+'''
+import argparse
+import time
+from client import data_colect, http_fixtures, jikan_client
+
+
+def run_scrapers(session, args) -> list[tuple]:
+    '''
+    Returns:
+    - List of (scraper name, number of animes, seconds, requests made) tuples.
+    '''
+    adapter = session.get_adapter('https://')
+    jikan = jikan_client.JikanClient(session=session, per_second=args.jikan_per_second, per_minute=args.jikan_per_second * 60)
+    results = []
+
+    def request_count():
+        return getattr(adapter, 'request_count', None)
+
+    if args.extract_amount:
+        requests_before = request_count()
+        start = time.perf_counter()
+        episodes_links, _ = data_colect.extract_releasing_animes_from_af(
+            extract_amount=args.extract_amount, start_page=args.start_page, session=session, jikan=jikan
+        )
+        seconds = time.perf_counter() - start
+        requests_made = request_count() - requests_before if requests_before is not None else None
+        results.append(('extract_releasing_animes_from_af', len(episodes_links), seconds, requests_made))
+
+    for url in args.custom_url:
+        requests_before = request_count()
+        start = time.perf_counter()
+        try:
+            data_colect.extract_custom_anime_from_af(url, session=session, jikan=jikan)
+            animes = 1
+        except ValueError as e:
+            print(f'{url}: {e}')
+            animes = 0
+        seconds = time.perf_counter() - start
+        requests_made = request_count() - requests_before if requests_before is not None else None
+        results.append((f'extract_custom_anime_from_af {url.split("/")[-1]}', animes, seconds, requests_made))
+    return results
+
+
+def print_report(results: list[tuple]):
+    print(f"{'scraper':60} {'animes':>7} {'seconds':>9} {'requests':>9} {'pages/s':>9} {'req/anime':>10}")
+    for name, animes, seconds, requests_made in results:
+        if requests_made is None:
+            print(f'{name[:60]:60} {animes:7} {seconds:9.2f}')
+            continue
+        pages_per_second = requests_made / seconds if seconds else 0
+        requests_per_anime = requests_made / animes if animes else 0
+        print(f'{name[:60]:60} {animes:7} {seconds:9.2f} {requests_made:9} {pages_per_second:9.1f} {requests_per_anime:10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record and replay the scraper requests')
+    parser.add_argument('mode', choices=['record', 'replay'])
+    parser.add_argument('archive', help='Path of the .jsonl.gz fixture archive')
+    parser.add_argument('--extract-amount', type=int, default=5, help='Releases extracted by extract_releasing_animes_from_af, 0 skips it')
+    parser.add_argument('--start-page', type=int, default=1)
+    parser.add_argument('--custom-url', action='append', default=[], help='Anime Fire URL passed to extract_custom_anime_from_af, can be repeated')
+    parser.add_argument('--latency', type=float, default=0.0, help='Replay: seconds waited before each response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Replay: random deviation of the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Replay: probability of a request failing')
+    parser.add_argument('--error-status', type=int, default=None, help='Replay: status of the failed requests, connection error if omitted')
+    parser.add_argument('--seed', type=int, default=None, help='Replay: seed of the latency and errors')
+    parser.add_argument('--jikan-per-second', type=float, default=None, help='Jikan rate limit, no practical limit on replay if omitted')
+    args = parser.parse_args()
+
+    if args.mode == 'record':
+        if args.jikan_per_second is None:
+            args.jikan_per_second = 3
+        archive = http_fixtures.FixtureArchive(args.archive)
+        session = http_fixtures.create_recording_session(archive)
+        results = run_scrapers(session, args)
+        archive.save()
+        print(f'Recorded {len(archive)} responses into {args.archive}')
+    else:
+        if args.jikan_per_second is None:
+            args.jikan_per_second = 1_000_000
+        archive = http_fixtures.FixtureArchive(args.archive).load()
+        session = http_fixtures.create_replay_session(
+            archive, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+            error_status=args.error_status, seed=args.seed
+        )
+        results = run_scrapers(session, args)
+        print(f'Requests not in the archive: {session.get_adapter("https://").replayer.missing_count}')
+    print_report(results)
+
+
+if __name__ == '__main__':
+    main()
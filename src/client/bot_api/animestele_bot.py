@@ -1,18 +1,23 @@
 import asyncio
 import datetime
+import urllib.parse
 import httpx
 from telegram import Bot, InputMediaVideo, KeyboardButton, ReplyKeyboardMarkup, Message
 from telegram.error import TimedOut
 from shared_components import values
 from interface import db_acess 
+from interface.db_factory_and_manager import AsyncTableFactory, DatabaseManagerFactory
+from interface.db_interface import AsyncDatabaseManagerInterface
 from client.bot_api.sensitive import token
 
 class Telena:
 
-    def __init__(self, token=token.TOKEN_TELENA):
+    def __init__(self, token=token.TOKEN_TELENA, db_manager: AsyncDatabaseManagerInterface | None = None):
         self.token = token
         self.bot = Bot(token=token)
-        platform, channel = db_acess.init_animestele()
+        # As consultas rodam na thread do banco para não travar o event loop
+        self.db_manager = db_manager or DatabaseManagerFactory().create_sqlite_async_db_manager(profile='bot-serving')
+        platform, channel = self.db_manager.run_blocking(db_acess.init_animestele, self.db_manager.manager)
         self.platform = platform
         self.chaneel = channel
 
@@ -49,6 +54,11 @@ class Telena:
             return response
             
     async def upload_video(self, chat_id, http_url, print_log=False):
+        # Links já verificados como mortos não são tentados
+        stored_url = urllib.parse.unquote(http_url)
+        if await self.db_manager.run(db_acess.is_download_link_dead, self.db_manager.manager, stored_url):
+            print(f"Skipping dead link: {stored_url}")
+            return None
         try:
             if(print_log):
                print(f"Checking http url:\n{http_url}\n...")
@@ -58,7 +68,12 @@ class Telena:
                 print("Trying to send video...")
             response = await self.bot.send_video(chat_id=chat_id, video=http_url)
             return response
-        except (httpx.HTTPStatusError, httpx.RequestError) as e:
+        except httpx.HTTPStatusError as e:
+            print(f"HTTP error occurred: {e}")
+            await self.db_manager.run(
+                db_acess.save_download_link_check, self.db_manager.manager, stored_url, False, e.response.status_code
+            )
+        except httpx.RequestError as e:
             print(f"HTTP error occurred: {e}")
         except (httpx.ReadTimeout, asyncio.exceptions.CancelledError) as e:
             print(f"Timeout error occurred: {e}. Retrying...")
@@ -107,11 +122,13 @@ class Telena:
             print(f"Error editing message {message_id} in chat {chat_id}: {e}")
 
 
-    async def add_anime_to_telegram(self, chat_id, mal_id: int, database_path=values.SQLITE_DATABASE_PATH, print_log=False):
+    async def add_anime_to_telegram(self, chat_id, mal_id: int, print_log=False):
         try:
             if print_log:
                 print(f"Trying to send anime {mal_id} to telegram channel {chat_id}")
-            anime, episodes = db_acess.get_anime_from_database(mal_id=mal_id, database_path=database_path)
+            table = AsyncTableFactory(self.db_manager)
+            anime = await table.get_animes().get_by_mal_id(mal_id=mal_id)
+            episodes = await table.get_episodes().get_by_mal_id(mal_id=mal_id)
             
             # Verify if anime is not in telegram yet
             if '#telegram' not in anime.added_to:
@@ -151,7 +168,10 @@ class Telena:
                     else:
                         anime.added_to = f"{anime.added_to},{new_added_to}"
                     # save into database    
-                    db_acess.save_msg_an(anime)
+                    await self.db_manager.run(
+                        db_acess.save_msg_an, self.db_manager.manager, anime, returned_anime_message.message_id,
+                        values.TELEGRAM_NAME, chat_id, values.ANIMESTELE_NAME
+                    )
                     if print_log:
                         print(anime)
                 except Exception as e:
@@ -189,7 +209,10 @@ class Telena:
                             episode.added_to = new_added_to
                         else:
                             episode.added_to = f"{episode.added_to},{new_added_to}"
-                        db_acess.save_msg_ep(episode)
+                        await self.db_manager.run(
+                            db_acess.save_msg_ep, self.db_manager.manager, episode, returned_episode_message.message_id,
+                            values.TELEGRAM_NAME, chat_id, values.ANIMESTELE_NAME
+                        )
                         if print_log:
                             print(episode)
                     except Exception as e:
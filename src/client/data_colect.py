@@ -1,48 +1,209 @@
+import asyncio
+import json
+import os
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
 from tokenize import String
-from bs4 import BeautifulSoup
+import httpx
 import requests
+from client import http_session, jikan_client, link_extractors, title_matcher
 from shared_components import values
+from shared_components.checkpoint import CrawlCheckpoint
 
-def get_title_and_hyperlinks_from_af(url_af=values.URL_AF_RELEASES, headers=values.HEADERS, extract_amount=10, start_page=1, extract_dub=False, print_log=False):
+def _get_anchors(response) -> list[tuple]:
+    '''
+    Get the (href, text) pairs of all the anchors of a page.
+
+    Anchors of pages stored by the HTTP cache are memoized, so a page that comes back unchanged
+    (fresh or 304) is not parsed again.
+
+    Args:
+    - response: requests or httpx response.
+
+    Returns:
+    - List of (href, text) tuples, href is None for anchors without it.
+    '''
+    cache = getattr(response, 'cache', None)
+    url = str(response.url)
+    if cache is not None and getattr(response, 'from_cache', False):
+        anchors = cache.get_anchors(url)
+        if anchors is not None:
+            return anchors
+    anchors = link_extractors.extract_anchors(response.text)
+    if cache is not None and response.status_code == 200:
+        cache.set_anchors(url, anchors)
+    return anchors
+
+async def _get_anchors_async(response: httpx.Response, parse_pool: Executor | None = None) -> list[tuple]:
+    '''
+    Get the anchors of a page fetched by an async scraper.
+
+    Args:
+    - response: httpx response.
+    - parse_pool: Pool from link_extractors.create_parse_pool that parses the raw bytes, so the event loop keeps
+      fetching while the pages are parsed on the other cores. Parses in the event loop thread if None.
+
+    Returns:
+    - Same as _get_anchors.
+    '''
+    if parse_pool is None:
+        return _get_anchors(response)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(parse_pool, link_extractors.extract_anchors_from_bytes, response.content, response.encoding)
+
+def _load_releases_high_water_mark(path: str) -> list[tuple]:
+    '''
+    Load the newest (title, href) releases seen by the last incremental crawl, or an empty list.
+    '''
+    try:
+        with open(path, 'r') as file:
+            return [tuple(entry) for entry in json.load(file)]
+    except (OSError, ValueError):
+        return []
+
+def _save_releases_high_water_mark(path: str, head: list[tuple]) -> None:
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(head, file)
+    os.replace(temp_path, path)
+
+def _find_releases_high_water_mark(entries: list[tuple], head: list[tuple]):
+    '''
+    Find where the releases of the last crawl start in a release page.
+
+    A single entry is not enough because a show that gets a new episode moves back to the top,
+    so the mark is the run of values.AF_RELEASES_HWM_SIZE newest entries seen last time.
+
+    Returns:
+    - Tuple (index, complete) with the index of the first already known entry and whether the whole mark was found.
+      complete is False when the entries end with the beginning of the mark, which must be confirmed by the next page.
+      (None, False) if the mark is not in the entries.
+    '''
+    size = min(values.AF_RELEASES_HWM_SIZE, len(head))
+    if size == 0:
+        return None, False
+    for i in range(len(entries)):
+        window = entries[i:i + size]
+        if window == head[:len(window)]:
+            return i, len(window) == size
+    return None, False
+
+class ReleasesHighWaterMark:
+    '''
+    High-water mark of the incremental release crawl, with the entries read by the current crawl.
+
+    The crawl does not move the mark: the consumer calls commit() for each release once it is stored, so a
+    crash or a crawl cut by extract_amount never marks as seen a release that was not processed. The releases
+    must be committed from the oldest to the newest for the mark to advance.
+    '''
+    def __init__(self, path: str | None = None):
+        '''
+        Args:
+        - path: JSON file where the mark is stored, values.AF_RELEASES_HWM_PATH if None.
+        '''
+        self.path = path or values.AF_RELEASES_HWM_PATH
+        self.head = _load_releases_high_water_mark(self.path)  # Mark saved by the last commit
+        self.entries: list[tuple] = []  # (title, href) newer than the mark read by the crawl, in page order
+        self.reached = False  # Whether the crawl found the mark after the entries
+
+    def commit(self, href: str) -> None:
+        '''
+        Save as the mark the run of releases starting at href, after the release was stored.
+        Releases not read by the crawl are ignored.
+        '''
+        index = next((i for i, (_, entry_href) in enumerate(self.entries) if entry_href == href), None)
+        if index is None:
+            return
+        older = self.entries[index:] + (self.head if self.reached else [])
+        _save_releases_high_water_mark(self.path, older[:values.AF_RELEASES_HWM_SIZE])
+
+def get_title_and_hyperlinks_from_af(url_af=None, headers=values.HEADERS, extract_amount=10, start_page=1, extract_dub=False, session: requests.Session | None = None, incremental=False, high_water_mark: ReleasesHighWaterMark | None = None, on_page=None, stream=None, print_log=False):
     """
     Extracts text and hyperlinks from a web page.
 
     Args:
-    - url_af: URL of the AnimeFire releases page.
+    - url_af: URL of the first AnimeFire releases page, values.URL_AF_RELEASES if None.
     - headers: Headers to use for the HTTP request.
     - extract_amount: Number of links to extract.
     - start_page: Page number to start extraction from.
     - extract_dub: Boolean indicating whether to include dubbed links.
+    - session: HTTP session used for the requests, the shared session from http_session if None.
+    - incremental: Stop paging at the releases already seen by the last incremental crawl (the high-water mark).
+                   Pages are read until the mark (up to values.AF_RELEASES_HARD_LIMIT releases) and the extract_amount
+                   oldest new releases are returned, so the releases left for the next crawl are never behind the mark.
+                   If the mark is not found (e.g. it fell past the hard limit) the extract_amount newest releases are returned.
+    - high_water_mark: Mark used by the incremental crawl, loaded from values.AF_RELEASES_HWM_PATH if None.
+                       The entries read are kept in it, the caller commits each release once it is stored.
+    - on_page: Function called with the page number and the entries added from it after each page is read.
+    - stream: Read each page in chunks and close the connection as soon as it has the releases still needed,
+              values.AF_RELEASES_STREAM if None. Streamed pages skip the HTTP cache.
     - print_log: Boolean indicating whether to print log messages.
 
     Returns:
     - List of tuples containing title and hyperlink from the release page of Anime Fire.
     """
+    session = session or http_session.get_default_session()
     results = []
     page = start_page
-    hard_limit = 100
-    extract_amount = min(extract_amount, hard_limit)  # Apply hard limit
+    url_af = url_af or values.URL_AF_RELEASES
+    extract_amount = min(extract_amount, values.AF_RELEASES_HARD_LIMIT)  # Apply hard limit
+    if incremental and high_water_mark is None:
+        high_water_mark = ReleasesHighWaterMark()
+    known_head = high_water_mark.head if incremental else []
+    # Com marca salva, lê até ela para devolver as mais antigas ainda não vistas
+    limit = values.AF_RELEASES_HARD_LIMIT if known_head else extract_amount
+    reached_high_water_mark = False
+    unconfirmed: list[tuple] = []  # Entries that may be the beginning of the high-water mark
+    stream = values.AF_RELEASES_STREAM if stream is None else stream
+    BASE_URL = values.URL_AF_FILTER_RELEAES
 
-    while len(results) < extract_amount:
-        current_url = url_af.replace("/1", f"/{page}")
-        response = requests.get(current_url, headers=headers)
+    def has_enough_releases(links):
+        # Incremental crawls read a whole high-water mark more, the new releases may end right before it
+        needed = limit - len(results) + (values.AF_RELEASES_HWM_SIZE if incremental else 0)
+        found = sum(1 for href, text in links if href and BASE_URL in href and (extract_dub or "(Dublado)" not in text))
+        return found >= needed
+
+    def add_entries(entries):
+        for text, href in entries:
+            if len(results) >= limit:
+                break
+            if not extract_dub and "(Dublado)" in text:
+                continue
+            results.append((text, href))
+            if print_log:
+                print(f'Texto: {text}, Link: {href}')
+
+    while len(results) < limit and not reached_high_water_mark:
+        head, separator, tail = url_af.rpartition("/1")  # Only the page number, the host may have a "/1" too
+        current_url = f"{head}/{page}{tail}" if separator else url_af
+        response = session.get(current_url, headers=headers, stream=stream)
         try:
             response.raise_for_status()  # Check if there was an error in the request
-            soup = BeautifulSoup(response.text, 'html.parser')
-            links = soup.find_all('a')
-            BASE_URL = values.URL_AF_FILTER_RELEAES
-
-            for link in links:
-                href = link.get('href')
-                text = link.get_text()
-                if href and BASE_URL in href:
-                    if not extract_dub and "(Dublado)" in text:
-                        continue
-                    results.append((text, href))
+            if stream:
+                links = link_extractors.extract_anchors_from_stream(response, stop=has_enough_releases)
+            else:
+                links = _get_anchors(response)
+            entries = [(text, href) for href, text in links if href and BASE_URL in href]
+
+            if incremental:
+                entries = unconfirmed + entries
+                unconfirmed = []
+                known_index, complete = _find_releases_high_water_mark(entries, known_head)
+                if known_index is not None and complete:
+                    entries = entries[:known_index]
+                    reached_high_water_mark = True
+                    high_water_mark.reached = True
                     if print_log:
-                        print(f'Texto: {text}, Link: {href}')
-                    if len(results) >= extract_amount:
-                        break
+                        print(f'Reached releases already seen at page {page}')
+                elif known_index is not None and links:
+                    unconfirmed = entries[known_index:]
+                    entries = entries[:known_index]
+                high_water_mark.entries.extend(entries)
+
+            added = len(results)
+            add_entries(entries)
+            if on_page is not None:
+                on_page(page, results[added:])
 
             page += 1
             if len(links) == 0:  # Break the loop if there are no more links
@@ -56,16 +217,189 @@ def get_title_and_hyperlinks_from_af(url_af=values.URL_AF_RELEASES, headers=valu
             print(f'An error occurred while processing the page: {e}')
             break
 
+    if incremental:
+        high_water_mark.entries.extend(unconfirmed)
+    add_entries(unconfirmed)
+    if incremental and reached_high_water_mark:
+        results = results[-extract_amount:]
+    elif incremental:
+        # Sem a marca, as mais antigas lidas seriam arbitrárias, então começa de novo pelas mais novas
+        results = results[:extract_amount]
     return results
 
 
-def get_episodes_watch_links_from_af(url: str, mal_id: int, print_log=False):
+def _parse_watch_episode_page(response, episode_url: str, episode_number: int, mal_id: int, anchors: list[tuple] | None = None):
+    '''
+    Check if an Anime Fire watch page is a valid episode page.
+
+    Args:
+    - anchors: Anchors of the page already extracted, extracted from the response if None.
+
+    Returns:
+    - Dictionary with MAL ID, episode number and watch link, or None if the episode does not exist.
+    '''
+    if response.status_code == 404:
+        return None
+    links = anchors if anchors is not None else _get_anchors(response)  # Verifica se há hyperlinks na página
+    if not links:  # Se não houver hyperlinks, considera a página inválida
+        return None
+    return {"mal_id": mal_id, "ep": episode_number, "watch_link": episode_url}
+
+def _parse_download_episode_page(response, episode_number: int, mal_id: int, anchors: list[tuple] | None = None):
+    '''
+    Extract the SD and HD download links from an Anime Fire download page.
+
+    Args:
+    - anchors: Anchors of the page already extracted, extracted from the response if None.
+
+    Returns:
+    - Dictionary with MAL ID, episode number, SD and HD links and temp flag, or None if the episode has no download links.
+    '''
+    if response.status_code == 404:
+        return None
+    links = anchors if anchors is not None else _get_anchors(response)  # Find all anchor tags
+    FILTER_STRINGS = values.URLS_AF_FILTER_DOWNLOADS_LINKS
+    download_links = [href for href, _ in links if href and any(fs in href for fs in FILTER_STRINGS)]
+    if not download_links:
+        return None
+    episode_links = {'mal_id': mal_id, 'episode': episode_number, 'sd': None, 'hd': None, 'temp': False}
+    for link in download_links:
+        if "(SD)" in link:
+            episode_links['sd'] = link
+        elif "(HD)" in link:
+            episode_links['hd'] = link
+        if "mp4_temp" in link:
+            episode_links['temp'] = True
+    return episode_links
+
+def _probe_episodes(fetch_episode, start_episode=0, on_episode=None):
+    '''
+    Probe episode pages one at a time until the first missing episode (episode 0 may be missing).
+    An episode whose fetch raises also stops the probe (except episode 0), keeping the episodes found before it.
+
+    Args:
+    - fetch_episode: Function receiving an episode number and returning a dict or None if the episode is missing.
+    - start_episode: First episode number to probe.
+    - on_episode: Function called with each episode found, in episode order, as soon as it is found.
+
+    Returns:
+    - List with the results of fetch_episode, ordered by episode number.
+    '''
+    results: list[dict] = []
+    for i in range(start_episode, values.AF_MAX_EPISODES):
+        try:
+            episode = fetch_episode(i)
+        except Exception as e:
+            print(f'An error occurred while processing episode {i}: {e}')
+            episode = None
+            if i != 0:
+                break
+        if episode is None:
+            if i == 0:
+                continue  # Se der erro no episódio 0, continue verificando
+            break  # Sai do loop quando não encontrar mais episódios
+        results.append(episode)
+        if on_episode is not None:
+            on_episode(episode)
+    return results
+
+def _find_last_episode(probe, start_episode=0):
+    '''
+    Find the last existing episode galloping (1, 2, 4, 8, ...) past start_episode and then
+    binary searching inside the bracket, using O(log n) probes instead of O(n).
+
+    Args:
+    - probe: Function receiving an episode number and returning True if the episode exists.
+    - start_episode: First episode number that may exist.
+
+    Returns:
+    - The number of the last existing episode, or None if there are no episodes.
+    '''
+    first = max(start_episode, 1)  # Episode 0 is optional, so it can't bracket the search
+    if first >= values.AF_MAX_EPISODES or not probe(first):
+        if start_episode == 0 and probe(0):
+            return 0
+        return None
+
+    # Gallop: low always exists, high is missing (or the hard limit, never probed)
+    low, step = first, 1
+    while True:
+        high = min(first + step, values.AF_MAX_EPISODES)
+        if high == values.AF_MAX_EPISODES or not probe(high):
+            break
+        low = high
+        step *= 2
+
+    # Binary search inside (low, high)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if probe(middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+def _probe_episodes_gallop(fetch_episode, start_episode=0, max_workers=8, on_episode=None):
+    '''
+    Probe episode pages discovering the last episode with _find_last_episode and then fetching
+    the known range in parallel. Pages fetched during the discovery are not requested again.
+    An episode whose fetch raises counts as missing in the discovery and ends the results, keeping
+    the episodes before it.
+
+    Args:
+    - fetch_episode: Function receiving an episode number and returning a dict or None if the episode is missing.
+    - start_episode: First episode number to probe.
+    - max_workers: Number of threads used to fetch the known range.
+    - on_episode: Function called with each episode found, in episode order, once the whole range is fetched.
+
+    Returns:
+    - List with the results of fetch_episode, ordered by episode number.
+    '''
+    fetched: dict = {}
+    failed: set[int] = set()
+
+    def safe_fetch(i: int):
+        try:
+            return fetch_episode(i)
+        except Exception as e:
+            print(f'An error occurred while processing episode {i}: {e}')
+            failed.add(i)
+            return None
+
+    def probe(i: int) -> bool:
+        if i not in fetched:
+            fetched[i] = safe_fetch(i)
+        return fetched[i] is not None
+
+    last_episode = _find_last_episode(probe, start_episode=start_episode)
+    if last_episode is None:
+        return []
+
+    missing = [i for i in range(start_episode, last_episode + 1) if i not in fetched]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i, episode in zip(missing, executor.map(safe_fetch, missing)):
+            fetched[i] = episode
+
+    failed.discard(0)  # Episode 0 is optional
+    if failed:
+        last_episode = min(min(failed) - 1, last_episode)
+    results = [fetched[i] for i in range(start_episode, last_episode + 1) if fetched[i] is not None]
+    if on_episode is not None:
+        # Os workers terminam fora de ordem, então os episódios só são entregues depois
+        for episode in results:
+            on_episode(episode)
+    return results
+
+def get_episodes_watch_links_from_af(url: str, mal_id: int, start_episode=0, gallop=False, session: requests.Session | None = None, print_log=False):
     '''
     Get all the episodes watch links in Anime Fire from an all-episodes Anime Fire URL.
 
     Args:
     - url: An Anime Fire all episodes URL in the generic format: https://animefire.plus/animes/anime-name-todos-os-episodios.
     - mal_id: The MAL ID of the anime.
+    - start_episode: First episode to probe, the episodes before it are not requested.
+    - gallop: Discover the last episode with galloping/binary search and fetch the episodes in parallel.
+    - session: HTTP session used for the requests, the shared session from http_session if None.
     - print_log: Boolean indicating whether to print log messages.
 
     Returns:
@@ -77,93 +411,328 @@ def get_episodes_watch_links_from_af(url: str, mal_id: int, print_log=False):
     if print_log:
         print(f'Base URL: {url}')
 
+    session = session or http_session.get_default_session()
+    base_url = url.split("-todos-os-episodios")[0]  # Remove a parte '-todos-os-episodios' da URL
+
+    def fetch_episode(i: int):
+        episode_url = f"{base_url}/{i}"
+        episode_response = session.get(episode_url)
+        episode = _parse_watch_episode_page(episode_response, episode_url, i, mal_id)
+        if episode and print_log:
+            print(f'Watch link for episode {i}: {episode_url}')
+        return episode
+
     results: list[dict] = []
     try:
-        base_url = url.split("-todos-os-episodios")[0]  # Remove a parte '-todos-os-episodios' da URL
-
-        for i in range(1000):  # Assume que não haverá mais de 1000 episódios
-            episode_url = f"{base_url}/{i}"
-            episode_response = requests.get(episode_url)
-            if episode_response.status_code == 404:
-                if i == 0:
-                    continue  # Se der erro no episódio 0, continue verificando
-                else:
-                    break  # Sai do loop quando não encontrar mais episódios
+        if gallop:
+            results = _probe_episodes_gallop(fetch_episode, start_episode=start_episode)
+        else:
+            results = _probe_episodes(fetch_episode, start_episode=start_episode)
+    except Exception as e:
+        print(f'An error occurred while processing the page: {e}')
 
-            soup = BeautifulSoup(episode_response.text, 'html.parser')
-            links = soup.find_all('a')  # Verifica se há hyperlinks na página
+    return results
 
-            if not links:  # Se não houver hyperlinks, considera a página inválida
-                if i == 0:
-                    continue  # Se a página estiver vazia no episódio 0, continue verificando
-                else:
-                    break  # Sai do loop quando encontrar uma página sem hyperlinks
+async def _probe_episodes_async(fetch_episode, start_episode=0, max_in_flight=16, on_episode=None):
+    '''
+    Probe episode pages concurrently keeping at most max_in_flight requests in flight.
 
-            if print_log:
-                print(f'Watch link for episode {i}: {episode_url}')
-            
-            results.append({"mal_id": mal_id, "ep": i, "watch_link": episode_url})
+    Episodes are consumed in order, so the first missing episode (except episode 0) stops the probe
+    and cancels the requests still in flight. An episode whose fetch raises also stops the probe
+    (except episode 0), keeping the episodes consumed before it.
 
-    except Exception as e:
-        print(f'An error occurred while processing the page: {e}')
+    Args:
+    - fetch_episode: Coroutine function receiving an episode number and returning a dict or None if the episode is missing.
+    - start_episode: First episode number to probe.
+    - max_in_flight: Maximum number of concurrent requests.
+    - on_episode: Function called with each episode found, in episode order, as soon as it is consumed.
 
+    Returns:
+    - List with the results of fetch_episode, ordered by episode number.
+    '''
+    results: list[dict] = []
+    pending: deque = deque()
+    next_episode = start_episode
+    try:
+        while pending or next_episode < values.AF_MAX_EPISODES:
+            while len(pending) < max_in_flight and next_episode < values.AF_MAX_EPISODES:
+                pending.append((next_episode, asyncio.ensure_future(fetch_episode(next_episode))))
+                next_episode += 1
+            episode_number, task = pending.popleft()
+            try:
+                episode = await task
+            except Exception as e:
+                print(f'An error occurred while processing episode {episode_number}: {e}')
+                episode = None
+                if episode_number != 0:
+                    break
+            if episode is None:
+                if episode_number == 0:
+                    continue  # Se der erro no episódio 0, continue verificando
+                break  # Sai do loop quando não encontrar mais episódios
+            results.append(episode)
+            if on_episode is not None:
+                on_episode(episode)
+    finally:
+        for _, task in pending:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
     return results
 
-def get_episodes_download_links_from_af(anime_name: str, mal_id: int, url=values.URL_AF_DOWNLOADS, print_log=False):
+async def _fetch_anchors_async(client: httpx.AsyncClient, url: str, parse_pool: Executor | None = None):
+    '''
+    Returns:
+    - The response and its anchors, the anchors are not extracted (None) from 404 pages.
+    '''
+    response = await client.get(url)
+    if response.status_code == 404:
+        return response, None
+    return response, await _get_anchors_async(response, parse_pool)
+
+def get_episodes_download_links_from_af(anime_name: str, mal_id: int, url=None, start_episode=0, gallop=False, session: requests.Session | None = None, print_log=False):
     '''
     Get all the episodes download links in Anime Fire from an anime name.
 
     Args:
     - anime_name: Name of the anime in the format: name-of-anime.
     - mal_id: The MAL ID of the anime.
-    - url: Base URL for Anime Fire download links.
+    - url: Base URL for Anime Fire download links, values.URL_AF_DOWNLOADS if None.
+    - start_episode: First episode to probe, the episodes before it are not requested.
+    - gallop: Discover the last episode with galloping/binary search and fetch the episodes in parallel.
+    - session: HTTP session used for the requests, the shared session from http_session if None.
     - print_log: Boolean indicating whether to print log messages.
 
     Returns:
     - List of dictionaries containing episode number, download links for SD and HD versions, a boolean indicating if the episode is temporary, and MAL ID of the anime.
     '''
-    results: list[dict] = []
+    session = session or http_session.get_default_session()
+    url = url or values.URL_AF_DOWNLOADS
     base_url = f"{url}{anime_name}/"
     if print_log:
         print(f'Base URL: {base_url}')
-    
+
+    def fetch_episode(i: int):
+        episode_url = f"{base_url}{i}"
+        episode_response = session.get(episode_url)
+        episode_links = _parse_download_episode_page(episode_response, i, mal_id)
+        if episode_links and print_log:
+            print(f"Download links for episode {i}: {episode_links}")
+        return episode_links
+
+    results: list[dict] = []
     try:
-        for i in range(1000):  # Assume que não haverá mais de 1000 episódios
-            episode_url = f"{base_url}{i}"
-            episode_response = requests.get(episode_url)
-            if episode_response.status_code == 404:
-                if i == 0:
-                    continue  # Se der erro no episódio 0, continue verificando
-                else:
-                    break  # Sai do loop quando não encontrar mais episódios
-            
-            soup = BeautifulSoup(episode_response.text, 'html.parser')
-            
-            links = soup.find_all('a')  # Find all anchor tags
-            FILTER_STRINGS = values.URLS_AF_FILTER_DOWNLOADS_LINKS
-            download_links = [link.get('href') for link in links if link.get('href') and any(fs in link.get('href') for fs in FILTER_STRINGS)]
-            
-            if not download_links and i != 0:
-                break  # Sai do loop se não encontrar links após o episódio 0
-            
-            if download_links:
-                episode_links = {'mal_id': mal_id, 'episode': i, 'sd': None, 'hd': None, 'temp': False}
-                for link in download_links:
-                    if "(SD)" in link:
-                        episode_links['sd'] = link
-                    elif "(HD)" in link:
-                        episode_links['hd'] = link
-                    if "mp4_temp" in link:
-                        episode_links['temp'] = True
-                results.append(episode_links)
-                if print_log:
-                    print(f"Download links for episode {i}: {episode_links}")
-    
+        if gallop:
+            results = _probe_episodes_gallop(fetch_episode, start_episode=start_episode)
+        else:
+            results = _probe_episodes(fetch_episode, start_episode=start_episode)
     except Exception as e:
         print(f'An error occurred while processing the page: {e}')
 
     return results
 
+def _has_download_links(episode: dict) -> bool:
+    return episode['download_link_hd'] is not None and episode['download_link_sd'] is not None
+
+def _drop_episodes_without_download_links(episodes: list[dict], url: str) -> list[dict]:
+    '''
+    Leave out the episodes missing the HD or SD download link, the episodes table requires both.
+    They are not stored, so a delta scrape probes them again while they are the last episodes.
+    '''
+    for episode in episodes:
+        if not _has_download_links(episode):
+            print(f"Episode {episode['episode_number']} of {url} has no download links, skipped")
+    return [episode for episode in episodes if _has_download_links(episode)]
+
+def _run_coroutine(coroutine):
+    '''
+    Run a coroutine from synchronous code. asyncio.run can't be nested, so inside a running event loop
+    (e.g. the async main) it runs in a worker thread with its own loop.
+    '''
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+def get_episodes_links_from_af(url: str, mal_id: int, start_episode=0, gallop=False, max_in_flight: int | None = None, download_url=None, session: requests.Session | None = None, on_episode=None, print_log=False):
+    '''
+    Get the watch and download links of all the episodes of an anime in a single pass.
+
+    The watch page and the download page of an episode are fetched in the same unit of work and merged
+    by episode number, so a missing download page doesn't misalign the other episodes.
+
+    Args:
+    - url: An Anime Fire all episodes URL in the generic format: https://animefire.plus/animes/anime-name-todos-os-episodios.
+    - mal_id: The MAL ID of the anime.
+    - start_episode: First episode to probe, the episodes before it are not requested.
+    - gallop: Discover the last episode with galloping/binary search and fetch the episodes in parallel.
+    - max_in_flight: Without gallop, episodes probed at the same time by get_episodes_links_from_af_async,
+                     values.AF_EPISODES_MAX_IN_FLIGHT if None. 1 probes one episode at a time with session.
+    - download_url: Base URL for Anime Fire download links, values.URL_AF_DOWNLOADS if None.
+    - session: HTTP session used for the one at a time and gallop modes, the shared session from http_session if None.
+    - on_episode: Function called with the dictionary of each episode found, in episode order. Called as soon as
+                  the episode is found, or after the parallel fetch in gallop mode. Not called for the episodes
+                  without download links.
+    - print_log: Boolean indicating whether to print log messages.
+
+    Returns:
+    - List of dictionaries containing MAL ID, episode number, watch link, HD and SD download links and a boolean
+      indicating if the episode is temporary. Episodes whose download page is missing are probed past, but left
+      out and logged.
+    '''
+    if url is None:
+        return None
+
+    max_in_flight = values.AF_EPISODES_MAX_IN_FLIGHT if max_in_flight is None else max_in_flight
+    if not gallop and max_in_flight > 1:
+        # Janela limitada de episódios em paralelo, consumidos em ordem
+        return _run_coroutine(get_episodes_links_from_af_async(
+            url, mal_id, start_episode=start_episode, download_url=download_url, max_in_flight=max_in_flight,
+            on_episode=on_episode, print_log=print_log
+        ))
+
+    if print_log:
+        print(f'Base URL: {url}')
+
+    session = session or http_session.get_default_session()
+    base_url = url.split("-todos-os-episodios")[0]  # Remove a parte '-todos-os-episodios' da URL
+    anime_name = get_anime_name_from_af_url(url)
+    download_url = download_url or values.URL_AF_DOWNLOADS
+
+    def fetch_episode(i: int):
+        watch_url = f"{base_url}/{i}"
+        watch_episode = _parse_watch_episode_page(session.get(watch_url), watch_url, i, mal_id)
+        if watch_episode is None:
+            return None  # The watch page decides if the episode exists
+        download_episode = _parse_download_episode_page(session.get(f"{download_url}{anime_name}/{i}"), i, mal_id) or {}
+        episode = {
+            'mal_id': mal_id,
+            'episode_number': i,
+            'watch_link': watch_url,
+            'download_link_hd': download_episode.get('hd'),
+            'download_link_sd': download_episode.get('sd'),
+            'temp': download_episode.get('temp', False)
+        }
+        if print_log:
+            print(f'Links for episode {i}: {episode}')
+        return episode
+
+    def record_episode(episode: dict):
+        if on_episode is not None and _has_download_links(episode):
+            on_episode(episode)
+
+    results: list[dict] = []
+    try:
+        if gallop:
+            results = _probe_episodes_gallop(fetch_episode, start_episode=start_episode, on_episode=record_episode)
+        else:
+            results = _probe_episodes(fetch_episode, start_episode=start_episode, on_episode=record_episode)
+    except Exception as e:
+        print(f'An error occurred while processing the page: {e}')
+
+    return _drop_episodes_without_download_links(results, url)
+
+async def get_episodes_links_from_af_async(url: str, mal_id: int, start_episode=0, download_url=None, client: httpx.AsyncClient | None = None, max_in_flight=16, parse_pool: Executor | None = None, on_episode=None, print_log=False):
+    '''
+    Async version of get_episodes_links_from_af. Fetching stays in the event loop and, with a parse_pool,
+    parsing runs in other processes, so large crawls are not limited by a single core.
+
+    Args:
+    - url: An Anime Fire all episodes URL in the generic format: https://animefire.plus/animes/anime-name-todos-os-episodios.
+    - mal_id: The MAL ID of the anime.
+    - start_episode: First episode to probe, the episodes before it are not requested.
+    - download_url: Base URL for Anime Fire download links, values.URL_AF_DOWNLOADS if None.
+    - client: httpx.AsyncClient used for the requests, a new one from http_session.create_async_client is created if None.
+    - max_in_flight: Maximum number of episodes fetched at the same time.
+    - parse_pool: Process pool from link_extractors.create_parse_pool that parses the pages, parses in the event loop if None.
+    - on_episode: Same as get_episodes_links_from_af.
+    - print_log: Boolean indicating whether to print log messages.
+
+    Returns:
+    - Same as get_episodes_links_from_af.
+    '''
+    if url is None:
+        return None
+
+    if print_log:
+        print(f'Base URL: {url}')
+
+    base_url = url.split("-todos-os-episodios")[0]  # Remove a parte '-todos-os-episodios' da URL
+    anime_name = get_anime_name_from_af_url(url)
+    download_url = download_url or values.URL_AF_DOWNLOADS
+
+    async def fetch_episode(i: int):
+        watch_url = f"{base_url}/{i}"
+        watch_response, anchors = await _fetch_anchors_async(client, watch_url, parse_pool)
+        if _parse_watch_episode_page(watch_response, watch_url, i, mal_id, anchors=anchors) is None:
+            return None  # The watch page decides if the episode exists
+        download_response, anchors = await _fetch_anchors_async(client, f"{download_url}{anime_name}/{i}", parse_pool)
+        download_episode = _parse_download_episode_page(download_response, i, mal_id, anchors=anchors) or {}
+        episode = {
+            'mal_id': mal_id,
+            'episode_number': i,
+            'watch_link': watch_url,
+            'download_link_hd': download_episode.get('hd'),
+            'download_link_sd': download_episode.get('sd'),
+            'temp': download_episode.get('temp', False)
+        }
+        if print_log:
+            print(f'Links for episode {i}: {episode}')
+        return episode
+
+    def record_episode(episode: dict):
+        if on_episode is not None and _has_download_links(episode):
+            on_episode(episode)
+
+    owns_client = client is None
+    if owns_client:
+        client = http_session.create_async_client()
+    results: list[dict] = []
+    try:
+        results = await _probe_episodes_async(fetch_episode, start_episode=start_episode, max_in_flight=max_in_flight, on_episode=record_episode)
+    except Exception as e:
+        print(f'An error occurred while processing the page: {e}')
+    finally:
+        if owns_client:
+            await client.aclose()
+
+    return _drop_episodes_without_download_links(results, url)
+
+def backfill_episodes_links_from_af(animes: list[tuple], download_url=None, max_concurrent_animes=4, max_in_flight=16, parse_workers=values.PARSE_POOL_WORKERS, print_log=False):
+    '''
+    Get the episodes links of many animes at once, for bulk backfills. The pages are fetched by a single
+    event loop and parsed by a process pool, so throughput scales with the cores.
+
+    Args:
+    - animes: List of (Anime Fire all episodes URL, MAL ID, start episode) tuples.
+    - download_url: Base URL for Anime Fire download links, values.URL_AF_DOWNLOADS if None.
+    - max_concurrent_animes: Number of animes probed at the same time.
+    - max_in_flight: Maximum number of episodes of an anime fetched at the same time.
+    - parse_workers: Number of parse processes, one per core if None. 0 parses in the event loop.
+    - print_log: Boolean indicating whether to print log messages.
+
+    Returns:
+    - List with the result of get_episodes_links_from_af_async for each anime, in the order of animes.
+    '''
+    async def backfill():
+        semaphore = asyncio.Semaphore(max_concurrent_animes)
+        parse_pool = link_extractors.create_parse_pool(parse_workers) if parse_workers != 0 else None
+        client = http_session.create_async_client(max_connections=max_concurrent_animes * max_in_flight, max_keepalive_connections=max_concurrent_animes * max_in_flight)
+
+        async def backfill_anime(url: str, mal_id: int, start_episode: int):
+            async with semaphore:
+                return await get_episodes_links_from_af_async(url, mal_id, start_episode=start_episode, download_url=download_url, client=client, max_in_flight=max_in_flight, parse_pool=parse_pool, print_log=print_log)
+
+        try:
+            return await asyncio.gather(*(backfill_anime(*anime) for anime in animes))
+        finally:
+            await client.aclose()
+            if parse_pool is not None:
+                parse_pool.shutdown()
+
+    return _run_coroutine(backfill())
+
 def get_anime_name_from_af_url(af_link: str, print_log = False):
     '''
     Extract the anime name from an Anime Fire link.
@@ -189,40 +758,102 @@ def get_anime_name_from_af_url(af_link: str, print_log = False):
 
 
 
-def search_anime_id_on_jikan_v4(anime_name: str, print_log=False) -> int:
+def search_anime_candidates_on_jikan_v4(anime_name: str, limit: int = values.JIKAN_SEARCH_CANDIDATES, jikan: jikan_client.JikanClient | None = None, print_log=False):
+    '''
+    Search a anime in MyAnimeList (MAL) with the Jikan_v4 API, keeping several results to re-rank.
+
+    Args:
+    - anime_name: String with the anime name to search.
+    - limit: Maximum number of results.
+    - jikan: Rate-limited Jikan client, the shared client from jikan_client if None.
+    - print_log: Boolean indicating whether to print log messages.
+
+    Returns:
+    - List of dictionaries with 'mal_id', 'title', 'title_english', 'title_japanese', 'title_synonyms' and 'titles'
+      in the Jikan order (empty if not found), or values.RATE_LIMITED if Jikan kept refusing the request.
+    '''
+    jikan = jikan or jikan_client.get_default_client()
+    search_url = f"{values.URL_JIKAN_SEARCH}{anime_name}&limit={limit}"
+    try:
+        data = jikan.get_json(search_url)
+    except jikan_client.JikanRateLimitError as e:
+        print(e)
+        return values.RATE_LIMITED
+
+    if not data or not data.get('data'):
+        return []
+    candidates = [
+        {
+            'mal_id': anime['mal_id'],
+            'title': anime.get('title'),
+            'title_english': anime.get('title_english'),
+            'title_japanese': anime.get('title_japanese'),
+            'title_synonyms': anime.get('title_synonyms') or [],
+            'titles': anime.get('titles') or [],
+        }
+        for anime in data['data'][:limit] if 'mal_id' in anime
+    ]
+    if print_log:
+        print([(candidate['mal_id'], candidate['title']) for candidate in candidates])
+    return candidates
+
+def search_anime_id_on_jikan_v4(anime_name: str, jikan: jikan_client.JikanClient | None = None, print_log=False) -> int:
     '''
     The Jikan_v4 API is used to search a anime in MyAnimeList (MAL).
+    The results are re-ranked by title similarity, so a sequel or a spin-off listed first by Jikan is not taken.
 
     Args:
     - anime_name: String with the anime name to search.
+    - jikan: Rate-limited Jikan client, the shared client from jikan_client if None.
     - print_log: Boolean indicating whether to print log messages.
 
     Returns:
-    - Integer containing the anime id in MAL.
-    '''
-    BAD_ID = values.BAD_ID
-    # Passo 1: Realizar uma pesquisa pelo nome do anime
-    search_url = f"{values.URL_JIKAN_SEARCH}{anime_name}"
-    response = requests.get(search_url)
-    data = response.json()
-
-    # Verificar se a pesquisa retornou resultados
-    if 'data' in data and data['data']:
-        # Pegar o ID do primeiro resultado da pesquisa
-        anime_id = data['data'][0]['mal_id']
+    - Integer containing the anime id in MAL, values.BAD_ID if not found or values.RATE_LIMITED if Jikan kept refusing the request.
+    '''
+    candidates = search_anime_candidates_on_jikan_v4(title_matcher.normalize_title(anime_name), jikan=jikan, print_log=print_log)
+    if candidates == values.RATE_LIMITED:
+        return values.RATE_LIMITED
+
+    if candidates:
+        anime_id, _ = title_matcher.rank_candidates(anime_name, candidates)[0]
         if(print_log):
             print(anime_id)
         return anime_id
     else:
         print("Anime não encontrado.")
-        return BAD_ID
+        return values.BAD_ID
     
-def get_anime_resource_from_jikan_v4(anime_id: int, print_log=False):
+def _anime_dict_from_jikan(anime_id: int, anime_data: dict) -> dict:
+    '''
+    Convert a Jikan anime object to the anime dictionary used by the database (see shared_components/db_structs.py Anime).
+    '''
+    return {
+        'mal_id': anime_id,
+        'title': anime_data.get('title', 'N/A'),
+        'title_english': anime_data.get('title_english', 'N/A'),
+        'title_japanese': anime_data.get('title_japanese', 'N/A'),
+        'title_synonyms': anime_data.get('title_synonyms') or [],
+        'type': anime_data.get('type', 'N/A'),
+        'episodes': anime_data.get('episodes', 'N/A'),
+        'status': anime_data.get('status', 'N/A'),
+        'airing': anime_data.get('airing', 'N/A'),
+        'aired': anime_data.get('aired', {}).get('string', 'N/A'),
+        'rating': anime_data.get('rating', 'N/A'),
+        'duration': anime_data.get('duration', 'N/A'),
+        'season': anime_data.get('season', 'N/A'),
+        'year': anime_data.get('year', 'N/A'),
+        'studios': ', '.join([studio['name'] for studio in anime_data.get('studios', [])]),
+        'producers': ', '.join([producer['name'] for producer in anime_data.get('producers', [])]),
+        'synopsis': anime_data.get('synopsis', 'N/A')
+    }
+
+def get_anime_resource_from_jikan_v4(anime_id: int, jikan: jikan_client.JikanClient | None = None, print_log=False):
     '''
     Get anime data from MAL through MyAnimeList (MAL) id by Jikan_v4 API
 
     Args:
     - anime_id: Integer containing the anime id get from MAL
+    - jikan: Rate-limited Jikan client, the shared client from jikan_client if None.
     - print_log: Boolean indicating whether to print log messages.
 
     Returns:
@@ -231,37 +862,21 @@ def get_anime_resource_from_jikan_v4(anime_id: int, print_log=False):
     if anime_id == values.BAD_ID:
         return None
 
+    jikan = jikan or jikan_client.get_default_client()
     search_url = f"{values.URL_JIKAN_SEARCH_BY_MALID}{anime_id}"
-    response = requests.get(search_url)
-    
     try:
-        data = response.json()
-    except ValueError:
-        print("Error decoding JSON response")
+        data = jikan.get_json(search_url)
+    except jikan_client.JikanRateLimitError as e:
+        print(e)
+        return None
+    if data is None:
         return None
 
     if 'data' in data:
         anime_data = data['data']
         if isinstance(anime_data, dict):  # Verifica se anime_data é um dicionário
 
-            anime_dict = {
-                'mal_id': anime_id,
-                'title': anime_data.get('title', 'N/A'),
-                'title_english': anime_data.get('title_english', 'N/A'),
-                'title_japanese': anime_data.get('title_japanese', 'N/A'),
-                'type': anime_data.get('type', 'N/A'),
-                'episodes': anime_data.get('episodes', 'N/A'),
-                'status': anime_data.get('status', 'N/A'),
-                'airing': anime_data.get('airing', 'N/A'),
-                'aired': anime_data.get('aired', {}).get('string', 'N/A'),
-                'rating': anime_data.get('rating', 'N/A'),
-                'duration': anime_data.get('duration', 'N/A'),
-                'season': anime_data.get('season', 'N/A'),
-                'year': anime_data.get('year', 'N/A'),
-                'studios': ', '.join([studio['name'] for studio in anime_data.get('studios', [])]),
-                'producers': ', '.join([producer['name'] for producer in anime_data.get('producers', [])]),
-                'synopsis': anime_data.get('synopsis', 'N/A')
-            }
+            anime_dict = _anime_dict_from_jikan(anime_id, anime_data)
 
             if print_log:
                 print(anime_dict)
@@ -273,33 +888,70 @@ def get_anime_resource_from_jikan_v4(anime_id: int, print_log=False):
     else:
         print("Anime not found.")
         return None
+
+def get_season_animes_from_jikan_v4(max_pages: int = values.JIKAN_SEASON_MAX_PAGES, jikan: jikan_client.JikanClient | None = None, print_log=False) -> list[dict]:
+    '''
+    Get the data of every anime of the current season with the paginated Jikan_v4 seasonal listing,
+    which returns 25 full anime objects per request instead of one.
+
+    Args:
+    - max_pages: Maximum number of listing pages requested.
+    - jikan: Rate-limited Jikan client, the shared client from jikan_client if None.
+    - print_log: Boolean indicating whether to print log messages.
+
+    Returns:
+    - List of anime dictionaries in the get_anime_resource_from_jikan_v4 format. The animes of the pages
+      read before an error are kept.
+    '''
+    jikan = jikan or jikan_client.get_default_client()
+    animes: dict[int, dict] = {}
+    for page in range(1, max_pages + 1):
+        try:
+            data = jikan.get_json(f"{values.URL_JIKAN_SEASON_NOW}?page={page}")
+        except jikan_client.JikanRateLimitError as e:
+            print(e)
+            break
+        if not data or not isinstance(data.get('data'), list):
+            print(f"Unexpected season listing response on page {page}")
+            break
+        for anime_data in data['data']:
+            if 'mal_id' in anime_data:
+                # A listagem pode repetir animes entre páginas
+                animes[anime_data['mal_id']] = _anime_dict_from_jikan(anime_data['mal_id'], anime_data)
+        if print_log:
+            print(f'Season page {page}: {len(animes)} animes')
+        if not data.get('pagination', {}).get('has_next_page'):
+            break
+    return list(animes.values())
     
-def extract_releasing_animes_from_af(url_af=values.URL_AF_RELEASES, haders=values.HEADERS, extract_amount = 10, start_page = 1, print_log=False):
+def extract_releasing_animes_from_af(url_af=None, haders=values.HEADERS, extract_amount = 10, start_page = 1, incremental=False, session: requests.Session | None = None, jikan: jikan_client.JikanClient | None = None, resolve_mal_id=None, get_start_episode=None, get_anime_metadata=None, gallop=False, print_log=False):
     '''
     Collect wacth and download links from Anime Fire and anime metadatas from MyAnimeList
 
     Args:
-    - url_af: Url
+    - url_af: URL of the first Anime Fire releases page, values.URL_AF_RELEASES if None.
     - haders: User agent
     - extract_amount: Number of links to extract.
     - start_page: Page number to start extraction from.
+    - incremental: Only extract the releases newer than the ones seen by the last incremental crawl, oldest first.
+                   The high-water mark advances as the releases are processed.
+    - session: HTTP session shared by all the Anime Fire requests, the shared session from http_session if None.
+    - jikan: Rate-limited Jikan client, the shared client from jikan_client if None.
+    - resolve_mal_id: Function receiving the release title and the Anime Fire URL and returning the MAL ID. Searches Jikan if None.
+    - get_start_episode: Function receiving the MAL ID and returning the first episode to probe. Probes from episode 0 if None.
+    - get_anime_metadata: Function receiving the MAL ID and returning the anime dictionary. Requests Jikan if None.
+    - gallop: Find the last episode of each anime with galloping/binary search (see get_episodes_links_from_af).
     - print_log: Boolean indicating whether to print log messages.
 
     Returns:
-    - watch_links: Dictionary containing Anime Fire website links.
-
-        Dictionary contains:
-            'mal_id': ID of the anime on MAL.
-            'ep': Episode number.
-            'watch_link': Hyperlink to the episode viewing page on Anime Fire.
-
-    - download_links: List of dictionaries containing Anime Fire download links.
+    - episodes_links: List with one list of episode dictionaries per anime, from get_episodes_links_from_af.
 
         Each dictionary contains:
             'mal_id': ID of the anime on MAL.
-            'episode': Episode number.
-            'sd': Download link for the SD (standard definition) version of the episode.
-            'hd': Download link for the HD (high definition) version of the episode.
+            'episode_number': Episode number.
+            'watch_link': Hyperlink to the episode viewing page on Anime Fire.
+            'download_link_hd': Download link for the HD (high definition) version of the episode.
+            'download_link_sd': Download link for the SD (standard definition) version of the episode.
             'temp': Boolean value indicating if the episode is temporary.
 
     - animes_metadata: List of dictionaries containing anime metadata from MyAnimeList (MAL) via the Jikan_v4 API.
@@ -322,50 +974,140 @@ def extract_releasing_animes_from_af(url_af=values.URL_AF_RELEASES, haders=value
             'producers': Producers of the anime.
             'synopsis': Synopsis of the anime.
     '''
-    anime_releases = get_title_and_hyperlinks_from_af(url_af=url_af, headers=haders, extract_amount=extract_amount, start_page=start_page, print_log=print_log) 
-    # Etapa 2: Pesquisar cada anime na API do Jikan e obter o mal_id
-    anime_ids = []
-    watch_links = []
-    download_links = []   
-    for anime in anime_releases:
-        anime_id = search_anime_id_on_jikan_v4(anime[0], print_log=print_log)
-        if anime_id != values.BAD_ID:
-            anime_ids.append(anime_id)
-            watch_link = get_episodes_watch_links_from_af(anime[1], anime_id, print_log=print_log)
-            watch_links.append(watch_link)
-            anime_name = get_anime_name_from_af_url(anime[1], print_log=print_log)
-            download_link = get_episodes_download_links_from_af(anime_name, anime_id,print_log=print_log)
-            download_links.append(download_link)
-
-    # Etapa 3: Obter detalhes do anime
+    episodes_links = []
     animes_metadata = []
-    for anime_id in anime_ids:
-        data = get_anime_resource_from_jikan_v4(anime_id, print_log=print_log)
-        if data:
-            animes_metadata.append(data)
-    return watch_links, download_links, animes_metadata
+    for anime_metadata, anime_episodes_links in iter_releasing_animes_from_af(
+            url_af=url_af, haders=haders, extract_amount=extract_amount, start_page=start_page, incremental=incremental,
+            session=session, jikan=jikan, resolve_mal_id=resolve_mal_id, get_start_episode=get_start_episode,
+            get_anime_metadata=get_anime_metadata, gallop=gallop, print_log=print_log
+        ):
+        episodes_links.append(anime_episodes_links)
+        if anime_metadata:
+            animes_metadata.append(anime_metadata)
+    return episodes_links, animes_metadata
+
+
+def iter_releasing_animes_from_af(url_af=None, haders=values.HEADERS, extract_amount = 10, start_page = 1, incremental=False, session: requests.Session | None = None, jikan: jikan_client.JikanClient | None = None, resolve_mal_id=None, get_start_episode=None, get_anime_metadata=None, checkpoint: CrawlCheckpoint | None = None, gallop=False, print_log=False):
+    '''
+    Streaming version of extract_releasing_animes_from_af: each anime is fully resolved and yielded before
+    the next one is scraped, so the caller can store it right away and only one anime is kept in memory.
+
+    Args:
+    - Same as extract_releasing_animes_from_af.
+    - checkpoint: Progress of the crawl. Every release page, MAL ID, episode and metadata is saved in it and an anime is
+      marked done when the caller asks for the next one, so a crawl resumed with the same checkpoint skips what was done.
+
+    Yields:
+    - (anime_metadata, episodes_links) of one anime.
+        - anime_metadata: Dictionary from get_anime_resource_from_jikan_v4, None if the Jikan request failed.
+        - episodes_links: List of episode dictionaries from get_episodes_links_from_af.
+    '''
+    session = session or http_session.get_default_session()
+    jikan = jikan or jikan_client.get_default_client()
+    if resolve_mal_id is None:
+        resolve_mal_id = lambda title, af_url: search_anime_id_on_jikan_v4(title, jikan=jikan, print_log=print_log)
+    if get_anime_metadata is None:
+        get_anime_metadata = lambda mal_id: get_anime_resource_from_jikan_v4(mal_id, jikan=jikan, print_log=print_log)
+    high_water_mark = ReleasesHighWaterMark() if incremental else None
+    if checkpoint is None:
+        anime_releases = get_title_and_hyperlinks_from_af(url_af=url_af, headers=haders, extract_amount=extract_amount, start_page=start_page, session=session, incremental=incremental, high_water_mark=high_water_mark, print_log=print_log)
+        if incremental:
+            anime_releases.reverse()
+    elif checkpoint.releases_done:
+        # The entries read before the crash are lost, so a resumed crawl leaves the mark as it is
+        anime_releases = [tuple(entry) for entry in checkpoint.releases]
+    else:
+        # Continua da página seguinte à última salva
+        previous_releases = [tuple(entry) for entry in checkpoint.releases]
+        anime_releases = previous_releases + get_title_and_hyperlinks_from_af(
+            url_af=url_af, headers=haders, extract_amount=extract_amount - len(previous_releases),
+            start_page=checkpoint.page + 1 if checkpoint.page else start_page, session=session,
+            incremental=incremental, high_water_mark=high_water_mark, on_page=checkpoint.add_release_page, print_log=print_log
+        )
+        if incremental:
+            anime_releases.reverse()
+        checkpoint.finish_releases(anime_releases)
+
+    # A marca só avança até a última release processada, e nunca depois de uma que ficou para trás
+    commit_high_water_mark = high_water_mark is not None
+    for title, af_url in anime_releases:
+        state = None
+        if checkpoint is not None:
+            if checkpoint.is_anime_done(af_url):
+                continue
+            state = checkpoint.get_anime(af_url)
+        # Pesquisar o anime na API do Jikan e obter o mal_id
+        if state and state['mal_id'] is not None:
+            anime_id = state['mal_id']
+        else:
+            anime_id = resolve_mal_id(title, af_url)
+        if anime_id in (values.BAD_ID, values.RATE_LIMITED):
+            if checkpoint is not None and anime_id == values.BAD_ID:
+                checkpoint.finish_anime(af_url)
+            if anime_id == values.RATE_LIMITED:
+                commit_high_water_mark = False  # Retried by the next crawl
+            elif commit_high_water_mark:
+                high_water_mark.commit(af_url)
+            continue
+        if checkpoint is None:
+            on_episode = None
+            done_episodes = []
+        else:
+            if not state or state['mal_id'] is None:
+                checkpoint.set_mal_id(af_url, anime_id)
+            on_episode = lambda episode, af_url=af_url: checkpoint.add_episode(af_url, episode)
+            done_episodes = state['episodes'] if state else []
+
+        if done_episodes:
+            start_episode = done_episodes[-1]['episode_number'] + 1
+        else:
+            start_episode = get_start_episode(anime_id) if get_start_episode else 0
+        episodes_links = done_episodes + get_episodes_links_from_af(af_url, anime_id, start_episode=start_episode, gallop=gallop, session=session, on_episode=on_episode, print_log=print_log)
+        # Obter detalhes do anime
+        if state and state['metadata'] is not None:
+            anime_metadata = state['metadata']
+        else:
+            anime_metadata = get_anime_metadata(anime_id)
+            if checkpoint is not None and anime_metadata:
+                checkpoint.set_metadata(af_url, anime_metadata)
+        yield anime_metadata, episodes_links
+        if checkpoint is not None:
+            checkpoint.finish_anime(af_url)  # O consumidor já processou a unidade
+        if commit_high_water_mark:
+            high_water_mark.commit(af_url)
 
 
-def extract_custom_anime_from_af(anime_url_on_af: str, print_log= False):
+def extract_custom_anime_from_af(anime_url_on_af: str, session: requests.Session | None = None, jikan: jikan_client.JikanClient | None = None, resolve_mal_id=None, get_start_episode=None, get_anime_metadata=None, print_log= False):
     """
     Extrct a single anime from Anime Fire.
 
     Args:
      - anime_url_on_af: URL to the anime overview page on Anime Fire following the format: 
                         https://animefire.plus/animes/anime-name-todos-os-episodios.
+     - session: HTTP session shared by all the Anime Fire requests, the shared session from http_session if None.
+     - jikan: Rate-limited Jikan client, the shared client from jikan_client if None.
+     - resolve_mal_id: Function receiving the anime name and the Anime Fire URL and returning the MAL ID. Searches Jikan if None.
+     - get_start_episode: Function receiving the MAL ID and returning the first episode to probe. Probes from episode 0 if None.
+     - get_anime_metadata: Function receiving the MAL ID and returning the anime dictionary. Requests Jikan if None.
      - print_log: Enable logging for debugging purposes.
 
     Returns:
-     - A tuple of: watch_links, download_links, anime_metadata_from_mal
+     - A tuple of: episodes_links (see get_episodes_links_from_af), anime_metadata_from_mal
     """
+    session = session or http_session.get_default_session()
+    jikan = jikan or jikan_client.get_default_client()
     anime_name_romaji = anime_url_on_af.split('/')[-1].rstrip("-todos-os-episodios")
-    anime_mal_id: int = search_anime_id_on_jikan_v4(anime_name=anime_name_romaji, print_log=print_log)
-    if(anime_mal_id == values.BAD_ID):
+    if resolve_mal_id is None:
+        resolve_mal_id = lambda title, af_url: search_anime_id_on_jikan_v4(anime_name=title, jikan=jikan, print_log=print_log)
+    if get_anime_metadata is None:
+        get_anime_metadata = lambda mal_id: get_anime_resource_from_jikan_v4(anime_id=mal_id, jikan=jikan, print_log=print_log)
+    anime_mal_id: int = resolve_mal_id(anime_name_romaji, anime_url_on_af)
+    if(anime_mal_id in (values.BAD_ID, values.RATE_LIMITED)):
         raise ValueError('Anime not found')
-    anime_data = get_anime_resource_from_jikan_v4(anime_id=anime_mal_id, print_log=print_log)
-    download_links = get_episodes_download_links_from_af(anime_name=anime_name_romaji, mal_id=anime_mal_id, print_log=print_log)
-    watch_links = get_episodes_watch_links_from_af(url=anime_url_on_af, mal_id=anime_mal_id, print_log=print_log)
-    return watch_links, download_links, anime_data
+    anime_data = get_anime_metadata(anime_mal_id)
+    start_episode = get_start_episode(anime_mal_id) if get_start_episode else 0
+    episodes_links = get_episodes_links_from_af(url=anime_url_on_af, mal_id=anime_mal_id, start_episode=start_episode, session=session, print_log=print_log)
+    return episodes_links, anime_data
 
 
 
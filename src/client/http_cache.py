@@ -0,0 +1,243 @@
+'''
+On-disk HTTP response cache for the scrapers.
+
+Response bodies are stored in files and indexed in a small sqlite3 database together with
+their ETag/Last-Modified validators. Fresh entries are served without touching the network,
+stale ones are revalidated with If-None-Match/If-Modified-Since and a 304 answer reuses the
+stored body. The anchors extracted from a cached body are memoized too, so an unchanged page
+is not parsed again.
+'''
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from shared_components import values
+
+
+def jikan_anime_ttl(content: bytes) -> int:
+    '''
+    TTL for a Jikan /anime/{id} response: finished shows rarely change, airing ones do.
+    '''
+    try:
+        anime_data = json.loads(content).get('data') or {}
+    except ValueError:
+        return 0
+    if anime_data.get('airing') is False:
+        return values.HTTP_CACHE_TTL_JIKAN_FINISHED
+    return values.HTTP_CACHE_TTL_JIKAN_AIRING
+
+
+# (URL regex, TTL in seconds or function receiving the body and returning the TTL).
+# URLs without a matching rule are not cached.
+DEFAULT_TTL_RULES: list = [
+    (r'^https://api\.jikan\.moe/v4/anime/\d+$', jikan_anime_ttl),
+    (r'^https://api\.jikan\.moe/v4/anime\?q=', values.HTTP_CACHE_TTL_JIKAN_SEARCH),
+    (r'^https://api\.jikan\.moe/v4/seasons/now', values.HTTP_CACHE_TTL_JIKAN_AIRING),
+    (r'^https://animefire\.plus/download/', values.HTTP_CACHE_TTL_AF_EPISODES),
+    (r'^https://animefire\.plus/animes/', values.HTTP_CACHE_TTL_AF_EPISODES),
+    (r'^https://animefire\.plus/em-lancamento/', 0),  # Always revalidate the release pages
+]
+
+
+class HttpCache:
+    def __init__(self, cache_dir=values.HTTP_CACHE_DIR, max_bytes=values.HTTP_CACHE_MAX_BYTES, ttl_rules=None):
+        '''
+        Args:
+        - cache_dir: Directory where the bodies and the index are stored.
+        - max_bytes: Maximum size of the stored bodies, least recently used entries are evicted above it.
+        - ttl_rules: List of (URL regex, TTL) pairs, the first match wins. DEFAULT_TTL_RULES if None.
+        '''
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in (ttl_rules or DEFAULT_TTL_RULES)]
+        os.makedirs(cache_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'), check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                file_name TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                anchors TEXT
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)')
+        self.conn.commit()
+
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.cache_dir, file_name)
+
+    def is_cacheable(self, url: str) -> bool:
+        return any(pattern.search(url) for pattern, _ in self.ttl_rules)
+
+    def ttl_for(self, url: str, content: bytes) -> int:
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl(content) if callable(ttl) else ttl
+        return 0
+
+    def get(self, url: str):
+        '''
+        Get a stored entry. The access time used by the LRU eviction is only written when it is older than
+        values.HTTP_CACHE_ACCESS_RESOLUTION seconds, so most hits don't write to the index.
+
+        Returns:
+        - Dictionary with status_code, headers, etag, last_modified, fresh and content, or None if the URL is not stored.
+        '''
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT file_name, status_code, headers, etag, last_modified, expires_at, accessed_at FROM entries WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            file_name, status_code, headers, etag, last_modified, expires_at, accessed_at = row
+            try:
+                with open(self._path(file_name), 'rb') as file:
+                    content = file.read()
+            except OSError:
+                self._delete(url, file_name)
+                self.conn.commit()
+                return None
+            now = time.time()
+            if now - accessed_at >= values.HTTP_CACHE_ACCESS_RESOLUTION:
+                self.conn.execute('UPDATE entries SET accessed_at = ? WHERE url = ?', (now, url))
+                self.conn.commit()
+        return {
+            'status_code': status_code, 'headers': json.loads(headers), 'etag': etag,
+            'last_modified': last_modified, 'fresh': expires_at > time.time(), 'content': content
+        }
+
+    def store(self, url: str, response: Response) -> None:
+        '''
+        Store a 200 response body with its validators. Invalidates the memoized anchors of the URL.
+        '''
+        content = response.content
+        now = time.time()
+        file_name = hashlib.sha1(url.encode()).hexdigest() + '.body'
+        with self.lock:
+            with open(self._path(file_name), 'wb') as file:
+                file.write(content)
+            self.conn.execute('''
+                INSERT OR REPLACE INTO entries (
+                    url, file_name, status_code, headers, etag, last_modified, expires_at, accessed_at, size, anchors
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
+            ''', (
+                url, file_name, response.status_code, json.dumps(dict(response.headers)),
+                response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                now + self.ttl_for(url, content), now, len(content)
+            ))
+            self._evict()
+            self.conn.commit()
+
+    def refresh(self, url: str, content: bytes) -> None:
+        '''
+        Restart the TTL of an entry after a 304 answer.
+        '''
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                'UPDATE entries SET expires_at = ?, accessed_at = ? WHERE url = ?', (now + self.ttl_for(url, content), now, url)
+            )
+            self.conn.commit()
+
+    def get_anchors(self, url: str):
+        '''
+        Get the (href, text) anchors memoized for the stored body of the URL, or None.
+        '''
+        with self.lock:
+            row = self.conn.execute('SELECT anchors FROM entries WHERE url = ?', (url,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return [tuple(anchor) for anchor in json.loads(row[0])]
+
+    def set_anchors(self, url: str, anchors: list) -> None:
+        with self.lock:
+            self.conn.execute('UPDATE entries SET anchors = ? WHERE url = ?', (json.dumps(anchors), url))
+            self.conn.commit()
+
+    def _delete(self, url: str, file_name: str) -> None:
+        self.conn.execute('DELETE FROM entries WHERE url = ?', (url,))
+        try:
+            os.remove(self._path(file_name))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        # Must be called holding self.lock
+        total_size = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+        rows = self.conn.execute('SELECT url, file_name, size FROM entries ORDER BY accessed_at').fetchall()
+        for url, file_name, size in rows:
+            if total_size <= self.max_bytes:
+                break
+            self._delete(url, file_name)
+            total_size -= size
+
+    def close(self):
+        self.conn.close()
+
+
+class CachingAdapter(HTTPAdapter):
+    '''
+    requests transport adapter that serves GET requests from an HttpCache.
+
+    Responses built from the cache have from_cache = True. Responses whose body is stored carry the cache
+    in their cache attribute (None for the others) so the scrapers can memoize what they extract from it.
+    '''
+    def __init__(self, cache: HttpCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def _build_cached_response(self, request, entry: dict) -> Response:
+        response = Response()
+        response.status_code = entry['status_code']
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = entry['content']
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.from_cache = True
+        response.cache = self.cache
+        return response
+
+    def send(self, request, **kwargs):
+        # Streamed responses may be closed before the body is read in full, so they are neither stored nor served
+        if request.method != 'GET' or kwargs.get('stream') or not self.cache.is_cacheable(request.url):
+            return super().send(request, **kwargs)
+
+        entry = self.cache.get(request.url)
+        if entry is not None:
+            if entry['fresh']:
+                return self._build_cached_response(request, entry)
+            if entry['etag']:
+                request.headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self.cache.refresh(request.url, entry['content'])
+            return self._build_cached_response(request, entry)
+        response.from_cache = False
+        response.cache = None
+        if response.status_code == 200:
+            self.cache.store(request.url, response)
+            response.cache = self.cache
+        return response
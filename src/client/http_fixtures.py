@@ -0,0 +1,251 @@
+'''
+Record/replay HTTP fixtures for the scrapers.
+
+A RecordingAdapter saves every request/response made through a session into a FixtureArchive,
+a gzip compressed JSON lines file. ReplayAdapter (requests) and ReplayTransport (httpx) serve
+the archive locally, with optional latency and error injection, so the scrapers can be
+benchmarked and regression tested without touching animefire.plus or api.jikan.moe.
+'''
+import asyncio
+import base64
+import gzip
+import json
+import random
+import threading
+import time
+import httpx
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from shared_components import values
+
+# The bodies are stored decoded, so these headers don't describe them anymore
+_SKIPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection')
+
+
+class FixtureArchive:
+    def __init__(self, path: str):
+        '''
+        Args:
+        - path: Path of the .jsonl.gz archive.
+        '''
+        self.path = path
+        self.entries: dict[tuple, list[dict]] = {}  # (method, url) -> responses in the order they were recorded
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(responses) for responses in self.entries.values())
+
+    def load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault((entry['method'], entry['url']), []).append(entry)
+        return self
+
+    def save(self):
+        with self.lock:
+            entries = [entry for responses in self.entries.values() for entry in responses]
+        with gzip.open(self.path, 'wt', encoding='utf-8') as file:
+            for entry in entries:
+                file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def record(self, method: str, url: str, status_code: int, headers: dict, content: bytes, elapsed: float):
+        entry = {
+            'method': method,
+            'url': url,
+            'status_code': status_code,
+            'headers': {key: value for key, value in headers.items() if key.lower() not in _SKIPPED_HEADERS},
+            'elapsed': elapsed,
+        }
+        try:
+            entry['body'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['body_b64'] = base64.b64encode(content).decode('ascii')
+        with self.lock:
+            self.entries.setdefault((method, url), []).append(entry)
+
+    def lookup(self, method: str, url: str, index: int):
+        '''
+        Get the index-th recorded response of a request, repeating the last one when the request was
+        recorded fewer times.
+
+        Returns:
+        - (status_code, headers, content), or None if the request was never recorded.
+        '''
+        responses = self.entries.get((method, url))
+        if not responses:
+            return None
+        entry = responses[min(index, len(responses) - 1)]
+        if 'body_b64' in entry:
+            content = base64.b64decode(entry['body_b64'])
+        else:
+            content = entry['body'].encode('utf-8')
+        return entry['status_code'], entry['headers'], content
+
+
+class RecordingAdapter(HTTPAdapter):
+    '''
+    requests transport adapter that sends the requests normally and records them in a FixtureArchive.
+    '''
+    def __init__(self, archive: FixtureArchive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    @property
+    def request_count(self) -> int:
+        return len(self.archive)
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        content = response.content  # Reads streamed bodies too, iter_content keeps working on the read body
+        self.archive.record(request.method, request.url, response.status_code, dict(response.headers), content, time.perf_counter() - start)
+        return response
+
+
+class _Replayer:
+    '''
+    Shared state of the replay transports: lookups, counters, latency and error injection.
+    '''
+    def __init__(self, archive: FixtureArchive, latency=0.0, jitter=0.0, error_rate=0.0, error_status=None, missing_status=404, seed=None):
+        self.archive = archive
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.missing_status = missing_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.seen: dict[tuple, int] = {}
+        self.request_count = 0
+        self.missing_count = 0
+        self.error_count = 0
+
+    def delay(self) -> float:
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def next_response(self, method: str, url: str):
+        '''
+        Returns:
+        - (status_code, headers, content) of the request, or None if a connection error must be raised.
+        '''
+        with self.lock:
+            self.request_count += 1
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.error_count += 1
+                if self.error_status is None:
+                    return None
+                return self.error_status, {}, b''
+            index = self.seen.get((method, url), 0)
+            self.seen[(method, url)] = index + 1
+        replayed = self.archive.lookup(method, url, index)
+        if replayed is None:
+            with self.lock:
+                self.missing_count += 1
+            return self.missing_status, {}, b''
+        return replayed
+
+
+class ReplayAdapter(BaseAdapter):
+    '''
+    requests transport adapter that answers the requests from a FixtureArchive without using the network.
+    '''
+    def __init__(self, archive: FixtureArchive, latency=0.0, jitter=0.0, error_rate=0.0, error_status=None, missing_status=404, seed=None):
+        '''
+        Args:
+        - archive: Loaded fixture archive.
+        - latency: Seconds waited before each response.
+        - jitter: Maximum random deviation, in seconds, added to the latency.
+        - error_rate: Probability of a request failing.
+        - error_status: Status code of the failed requests (e.g. 429 or 503), a connection error is raised if None.
+        - missing_status: Status code of the requests that are not in the archive.
+        - seed: Seed of the latency and error randomness, for reproducible runs.
+        '''
+        super().__init__()
+        self.replayer = _Replayer(archive, latency, jitter, error_rate, error_status, missing_status, seed)
+
+    @property
+    def request_count(self) -> int:
+        return self.replayer.request_count
+
+    def send(self, request, **kwargs):
+        delay = self.replayer.delay()
+        if delay:
+            time.sleep(delay)
+        replayed = self.replayer.next_response(request.method, request.url)
+        if replayed is None:
+            raise requests.ConnectionError(f'Injected connection error: {request.url}', request=request)
+        status_code, headers, content = replayed
+        response = Response()
+        response.status_code = status_code
+        response.reason = 'Replayed'
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = content
+        response._content_consumed = True  # iter_content of streamed requests reads the replayed body
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    '''
+    httpx transport that answers the requests of an AsyncClient from a FixtureArchive. Same options as ReplayAdapter.
+    '''
+    def __init__(self, archive: FixtureArchive, latency=0.0, jitter=0.0, error_rate=0.0, error_status=None, missing_status=404, seed=None):
+        self.replayer = _Replayer(archive, latency, jitter, error_rate, error_status, missing_status, seed)
+
+    @property
+    def request_count(self) -> int:
+        return self.replayer.request_count
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        delay = self.replayer.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        replayed = self.replayer.next_response(request.method, str(request.url))
+        if replayed is None:
+            raise httpx.ConnectError(f'Injected connection error: {request.url}', request=request)
+        status_code, headers, content = replayed
+        return httpx.Response(status_code, headers=headers, content=content, request=request)
+
+
+def create_recording_session(archive: FixtureArchive, headers=values.HEADERS) -> requests.Session:
+    '''
+    Create a session that records every request it makes into archive. Save it with archive.save().
+    '''
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = RecordingAdapter(archive, pool_connections=values.HTTP_POOL_HOSTS, pool_maxsize=values.HTTP_POOL_PER_HOST, pool_block=True)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def create_replay_session(archive: FixtureArchive, headers=values.HEADERS, **replay_options) -> requests.Session:
+    '''
+    Create a session served by a ReplayAdapter, replay_options are passed to it. The adapter is
+    mounted for both schemes and can be reached with session.get_adapter(url).
+    '''
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = ReplayAdapter(archive, **replay_options)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def create_replay_async_client(archive: FixtureArchive, headers=values.HEADERS, **replay_options) -> httpx.AsyncClient:
+    '''
+    Create an httpx.AsyncClient served by a ReplayTransport, replay_options are passed to it.
+    '''
+    return httpx.AsyncClient(headers=headers, transport=ReplayTransport(archive, **replay_options))
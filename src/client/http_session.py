@@ -0,0 +1,92 @@
+'''
+Shared HTTP clients used by the scrapers in data_colect.
+
+A single requests.Session keeps TCP+TLS connections alive between requests, so the
+thousands of requests of a crawl don't pay a new handshake each time. With a RequestScheduler
+the requests to each host also follow its adaptive concurrency limit and are retried with backoff.
+'''
+import threading
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from client.http_cache import CachingAdapter, HttpCache
+from client.request_scheduler import RequestScheduler, ScheduledAdapter, ScheduledAsyncTransport, get_default_scheduler
+from shared_components import values
+
+_default_session: requests.Session | None = None
+_default_session_lock = threading.Lock()
+
+
+class ScheduledCachingAdapter(CachingAdapter, ScheduledAdapter):
+    '''
+    Cache in front of the scheduler: cache hits don't take a request slot of the host.
+    '''
+    pass
+
+
+def create_session(headers=values.HEADERS, pool_hosts=values.HTTP_POOL_HOSTS, pool_per_host=values.HTTP_POOL_PER_HOST, cache: HttpCache | None = None, scheduler: RequestScheduler | None = None) -> requests.Session:
+    '''
+    Create a requests.Session with keep-alive connection pooling.
+
+    Args:
+    - headers: Headers sent in every request.
+    - pool_hosts: Number of hosts with a connection pool kept alive.
+    - pool_per_host: Maximum number of connections open to a single host. Threads wait for a free connection when the limit is reached.
+    - cache: On-disk response cache used for the GET requests, no cache if None.
+    - scheduler: Per-host concurrency scheduler, requests are sent unscheduled and without retries if None.
+
+    Returns:
+    - The configured session.
+    '''
+    session = requests.Session()
+    session.headers.update(headers)
+    pool_kwargs = {'pool_connections': pool_hosts, 'pool_maxsize': pool_per_host, 'pool_block': True}
+    if cache is not None and scheduler is not None:
+        adapter = ScheduledCachingAdapter(cache, scheduler=scheduler, **pool_kwargs)
+    elif cache is not None:
+        adapter = CachingAdapter(cache, **pool_kwargs)
+    elif scheduler is not None:
+        adapter = ScheduledAdapter(scheduler=scheduler, **pool_kwargs)
+    else:
+        adapter = HTTPAdapter(**pool_kwargs)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_default_session() -> requests.Session:
+    '''
+    Get the session shared by all scraper functions that don't receive one, creating it on first use.
+    The session uses the on-disk cache when values.HTTP_CACHE_ENABLED is set and the default
+    scheduler when values.SCHEDULER_ENABLED is set.
+    '''
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            cache = HttpCache() if values.HTTP_CACHE_ENABLED else None
+            scheduler = get_default_scheduler() if values.SCHEDULER_ENABLED else None
+            _default_session = create_session(cache=cache, scheduler=scheduler)
+        return _default_session
+
+
+def create_async_client(headers=values.HEADERS, max_connections=values.HTTP_POOL_PER_HOST, max_keepalive_connections=values.HTTP_POOL_PER_HOST, scheduler: RequestScheduler | None = None) -> httpx.AsyncClient:
+    '''
+    Create an httpx.AsyncClient with keep-alive connection pooling for the async scrapers.
+
+    httpx limits are global for the client, so use one client per host to get per-host limits.
+
+    Args:
+    - headers: Headers sent in every request.
+    - max_connections: Maximum number of open connections.
+    - max_keepalive_connections: Maximum number of idle connections kept alive.
+    - scheduler: Per-host concurrency scheduler, the default scheduler if None and values.SCHEDULER_ENABLED is set.
+
+    Returns:
+    - The configured client. The caller must close it with aclose().
+    '''
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+    if scheduler is None and values.SCHEDULER_ENABLED:
+        scheduler = get_default_scheduler()
+    if scheduler is None:
+        return httpx.AsyncClient(headers=headers, limits=limits)
+    return httpx.AsyncClient(headers=headers, transport=ScheduledAsyncTransport(scheduler, limits=limits))
@@ -0,0 +1,158 @@
+'''
+Rate-limit-aware client for the Jikan v4 API.
+
+Jikan allows about 3 requests per second and 60 per minute. Requests wait for a token of
+both buckets before being sent, a 429 answer pauses every request for the Retry-After time
+and concurrent requests for the same URL share a single in-flight fetch.
+'''
+import threading
+import time
+from concurrent.futures import Future
+import requests
+from client import http_session
+from client.request_scheduler import retry_after_seconds
+from shared_components import values
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+class JikanRateLimitError(Exception):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        '''
+        Args:
+        - rate: Tokens added per second.
+        - capacity: Maximum number of tokens, the size of a burst.
+        '''
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        '''
+        Take a token, sleeping until one is available.
+        '''
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def drain(self):
+        '''
+        Remove all the tokens, used when the server says the quota is exhausted.
+        '''
+        with self.lock:
+            self._refill()
+            self.tokens = 0
+
+
+class JikanClient:
+    def __init__(
+            self, session: requests.Session | None = None, per_second: float | None = None,
+            per_minute: float | None = None, max_retries: int | None = None
+        ):
+        '''
+        Args:
+        - session: HTTP session used for the requests, the shared session from http_session if None.
+        - per_second: Requests allowed per second, values.JIKAN_REQUESTS_PER_SECOND if None.
+        - per_minute: Requests allowed per minute, values.JIKAN_REQUESTS_PER_MINUTE if None.
+        - max_retries: Retries of a request answered with 429 before giving up, values.JIKAN_MAX_RETRIES if None.
+        '''
+        per_second = per_second or values.JIKAN_REQUESTS_PER_SECOND
+        per_minute = per_minute or values.JIKAN_REQUESTS_PER_MINUTE
+        max_retries = values.JIKAN_MAX_RETRIES if max_retries is None else max_retries
+        self.session = session or http_session.get_default_session()
+        self.buckets = [TokenBucket(per_second, per_second), TokenBucket(per_minute / 60, per_minute)]
+        self.max_retries = max_retries
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.in_flight: dict[str, Future] = {}
+
+    def _wait_for_slot(self):
+        while True:
+            with self.lock:
+                wait = self.blocked_until - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        for bucket in self.buckets:
+            bucket.acquire()
+
+    def _fetch(self, url: str):
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_slot()
+            response = self.session.get(url)
+            if response.status_code == 429:
+                delay = retry_after_seconds(response.headers.get('Retry-After'))
+                if delay is None:
+                    delay = 2 ** attempt
+                with self.lock:
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+                for bucket in self.buckets:
+                    bucket.drain()
+                continue
+            try:
+                return response.json()
+            except ValueError:
+                print("Error decoding JSON response")
+                return None
+        raise JikanRateLimitError(f"Jikan rate limit exceeded after {self.max_retries} retries: {url}")
+
+    def get_json(self, url: str):
+        '''
+        GET a Jikan URL respecting the rate limits. Concurrent calls with the same URL wait for a single request.
+
+        Args:
+        - url: Full Jikan API URL.
+
+        Returns:
+        - The decoded JSON, or None if the response is not JSON.
+
+        Raises:
+        - JikanRateLimitError: The request was still answered with 429 after max_retries retries.
+        '''
+        with self.lock:
+            future = self.in_flight.get(url)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.in_flight[url] = future
+        if not owner:
+            return future.result()
+
+        try:
+            data = self._fetch(url)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[url]
+
+
+def get_default_client() -> JikanClient:
+    '''
+    Get the Jikan client shared by all scraper functions that don't receive one, creating it on first use.
+    '''
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = JikanClient()
+        return _default_client
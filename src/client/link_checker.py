@@ -0,0 +1,69 @@
+'''
+Concurrent liveness checks of the download links stored in the database.
+
+A link is checked with a HEAD request, or with a GET of its first byte when the host doesn't
+answer HEAD, so no video is downloaded.
+'''
+import asyncio
+import httpx
+from client import http_session
+from shared_components import values
+
+TEMP_FOLDER = '/mp4_temp/'
+PERMANENT_FOLDER = '/mp4/'
+
+
+def permanent_url(temp_url: str | None) -> str | None:
+    '''
+    Get the permanent (mp4/) URL of a temporary (mp4_temp/) download link, None for an episode without the link.
+    '''
+    if temp_url is None:
+        return None
+    return temp_url.replace(TEMP_FOLDER, PERMANENT_FOLDER, 1)
+
+
+async def check_link(client: httpx.AsyncClient, url: str):
+    '''
+    Check if a download link is alive.
+
+    Returns:
+    - (alive, status_code), status_code is None if the host could not be reached.
+    '''
+    try:
+        response = await client.head(url, follow_redirects=True, timeout=values.LINK_CHECK_TIMEOUT)
+        if response.status_code in (403, 405, 501):  # Host doesn't accept HEAD, pede só o primeiro byte
+            async with client.stream('GET', url, headers={'Range': 'bytes=0-0'}, follow_redirects=True, timeout=values.LINK_CHECK_TIMEOUT) as response:
+                pass
+        return response.status_code in (200, 206), response.status_code
+    except httpx.HTTPError as e:
+        print(f'Error checking link {url}: {e}')
+        return False, None
+
+
+async def check_links(urls: list[str], client: httpx.AsyncClient | None = None, max_in_flight=values.LINK_CHECK_CONCURRENCY) -> dict:
+    '''
+    Check many download links concurrently.
+
+    Args:
+    - urls: Links to check, duplicates are checked once.
+    - client: httpx.AsyncClient used for the requests, a new one from http_session.create_async_client is created if None.
+    - max_in_flight: Maximum number of links checked at the same time.
+
+    Returns:
+    - Dictionary of url -> (alive, status_code).
+    '''
+    semaphore = asyncio.Semaphore(max_in_flight)
+    owns_client = client is None
+    if owns_client:
+        client = http_session.create_async_client(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+
+    async def check(url: str):
+        async with semaphore:
+            return url, await check_link(client, url)
+
+    try:
+        results = await asyncio.gather(*(check(url) for url in dict.fromkeys(urls)))
+    finally:
+        if owns_client:
+            await client.aclose()
+    return dict(results)
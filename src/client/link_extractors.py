@@ -0,0 +1,151 @@
+'''
+Backends that extract the (href, text) pairs of the anchors of an HTML page.
+
+The scrapers only need the anchors, so the default backend is a streaming html.parser
+subclass that never builds a document tree. BeautifulSoup, restricted to the <a> tags,
+is kept as a fallback.
+'''
+import codecs
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup, SoupStrainer
+from shared_components import values
+
+
+class AnchorParser(HTMLParser):
+    '''
+    Streaming parser that only keeps the anchors. Can be fed in chunks with feed().
+    '''
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.anchors: list[list] = []  # [href, text] in document order
+        self.open_anchors: list[tuple] = []  # (index in anchors, text parts) of the anchors not closed yet
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        href = dict(attrs).get('href')
+        self.anchors.append([href, ''])
+        self.open_anchors.append((len(self.anchors) - 1, []))
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self.open_anchors:
+            index, parts = self.open_anchors.pop()
+            self.anchors[index][1] = ''.join(parts)
+
+    def handle_data(self, data):
+        for _, parts in self.open_anchors:
+            parts.append(data)
+
+    def close(self):
+        super().close()
+        while self.open_anchors:  # Anchors never closed keep the text read until the end
+            index, parts = self.open_anchors.pop()
+            self.anchors[index][1] = ''.join(parts)
+
+    def get_anchors(self, closed_only=False) -> list[tuple]:
+        '''
+        Args:
+        - closed_only: Leave out the anchors whose text was not read until </a> yet, used while the page is still being fed.
+        '''
+        anchors = self.anchors
+        if closed_only and self.open_anchors:
+            anchors = anchors[:self.open_anchors[0][0]]
+        return [(href, text) for href, text in anchors]
+
+
+def extract_anchors_stream(html: str) -> list[tuple]:
+    parser = AnchorParser()
+    parser.feed(html)
+    parser.close()
+    return parser.get_anchors()
+
+
+def extract_anchors_bs4(html: str) -> list[tuple]:
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('a'))
+    return [(link.get('href'), link.get_text()) for link in soup.find_all('a')]
+
+
+EXTRACTORS = {
+    'stream': extract_anchors_stream,
+    'bs4': extract_anchors_bs4,
+}
+
+
+def extract_anchors(html: str, backend: str | None = None) -> list[tuple]:
+    '''
+    Extract the anchors of a page.
+
+    Args:
+    - html: Page content.
+    - backend: Name of the backend in EXTRACTORS, values.LINK_EXTRACTOR if None.
+
+    Returns:
+    - List of (href, text) tuples in document order, href is None for anchors without it.
+    '''
+    backend = backend or values.LINK_EXTRACTOR
+    try:
+        return EXTRACTORS[backend](html)
+    except Exception as e:
+        if backend == 'bs4':
+            raise
+        print(f'Link extractor {backend} failed, falling back to bs4: {e}')
+        return extract_anchors_bs4(html)
+
+
+def extract_anchors_from_bytes(content: bytes, encoding: str | None = None, backend: str | None = None) -> list[tuple]:
+    '''
+    Decode and extract the anchors of a raw page. Runs in the worker processes of the parse pool,
+    so only the bytes go to the worker and only the anchor tuples come back.
+
+    Args:
+    - content: Raw page body.
+    - encoding: Charset of the response, utf-8 if None.
+    - backend: Same as extract_anchors.
+
+    Returns:
+    - Same as extract_anchors.
+    '''
+    return extract_anchors(content.decode(encoding or 'utf-8', errors='replace'), backend=backend)
+
+
+def extract_anchors_from_stream(response, stop=None, chunk_size: int = values.AF_STREAM_CHUNK_SIZE) -> list[tuple]:
+    '''
+    Extract the anchors of a requests response opened with stream=True, feeding the body to an AnchorParser
+    chunk by chunk. The response is closed as soon as stop returns True, so the rest of the page is neither
+    downloaded nor parsed.
+
+    Args:
+    - response: requests response opened with stream=True.
+    - stop: Function receiving the anchors read so far and returning whether they are enough. Reads the whole page if None.
+    - chunk_size: Bytes read from the connection at a time.
+
+    Returns:
+    - Same as extract_anchors, only the anchors read until stop returned True.
+    '''
+    parser = AnchorParser()
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    try:
+        for chunk in response.iter_content(chunk_size):
+            parser.feed(decoder.decode(chunk))
+            if stop is not None and stop(parser.get_anchors(closed_only=True)):
+                return parser.get_anchors(closed_only=True)
+        parser.feed(decoder.decode(b'', final=True))
+        parser.close()
+        return parser.get_anchors()
+    finally:
+        response.close()  # Libera a conexão sem ler o resto do corpo
+
+
+def create_parse_pool(max_workers: int | None = values.PARSE_POOL_WORKERS) -> ProcessPoolExecutor:
+    '''
+    Create the process pool that parses pages for the async scrapers, so parsing scales with the
+    cores instead of blocking the event loop.
+
+    Args:
+    - max_workers: Number of worker processes, one per core if None.
+
+    Returns:
+    - The pool. The caller must close it with shutdown().
+    '''
+    return ProcessPoolExecutor(max_workers=max_workers)
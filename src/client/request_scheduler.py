@@ -0,0 +1,267 @@
+'''
+Per-host adaptive concurrency for the scrapers.
+
+Each host gets its own concurrency limit, adjusted AIMD-style: every fast successful response
+adds about one request per window to the limit, while a 429, a 5xx, a connection error or a
+latency well above the fastest seen cuts it by values.SCHEDULER_DECREASE_FACTOR. Failed requests
+are retried with jittered exponential backoff (or the Retry-After time), so each upstream runs as
+fast as it tolerates. The 429s of the hosts in values.SCHEDULER_NO_RETRY_429_HOSTS are returned
+to the caller, which enforces the quota of those hosts itself.
+'''
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from shared_components import values
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def retry_after_seconds(retry_after: str | None):
+    '''
+    Parse a Retry-After header, in seconds or as an HTTP date.
+
+    Returns:
+    - Seconds to wait, or None if the header is missing or invalid.
+    '''
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_overload(status_code: int | None) -> bool:
+    '''
+    429 and 5xx answers (and connection errors, status None) mean the host wants less traffic.
+    '''
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
+class HostLimiter:
+    def __init__(self, initial_limit: float, min_limit: float, max_limit: float, decrease_factor: float, latency_tolerance: float):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.min_latency = None  # Fastest response seen, the latency of an idle host
+        self.latency = None  # Moving average of the latency
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self.condition:
+            if self.in_flight < max(1, int(self.limit)):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        '''
+        Take a request slot, waiting while the host is at its limit.
+        '''
+        with self.condition:
+            while self.in_flight >= max(1, int(self.limit)):
+                self.condition.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        # Slots are released by threads too, so the event loop polls instead of waiting on the condition
+        while not self.try_acquire():
+            await asyncio.sleep(0.01)
+
+    def release(self, status_code: int | None, latency: float):
+        '''
+        Free a request slot and adjust the limit with the outcome of the request.
+
+        Args:
+        - status_code: Status of the response, None for a connection error.
+        - latency: Seconds the request took.
+        '''
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            congested = _is_overload(status_code)
+            if not congested:
+                self.min_latency = latency if self.min_latency is None else min(self.min_latency, latency)
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+                congested = latency > self.latency_tolerance * self.min_latency and latency > values.SCHEDULER_MIN_SLOW_LATENCY
+            if congested:
+                # A single decrease per round trip, the requests already in flight saw the same congestion
+                if now - self.last_decrease > (self.latency or 0.0):
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self.last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def snapshot(self) -> dict:
+        with self.condition:
+            return {'limit': self.limit, 'in_flight': self.in_flight, 'latency': self.latency, 'min_latency': self.min_latency}
+
+
+class RequestScheduler:
+    def __init__(
+            self, initial_limit=None, min_limit=None, max_limit=None, decrease_factor=None,
+            latency_tolerance=None, max_retries=None, backoff_base=None, backoff_max=None, no_retry_429_hosts=None
+        ):
+        '''
+        All the arguments default to the SCHEDULER_* constants of shared_components/values.py.
+
+        Args:
+        - initial_limit: Concurrent requests allowed to a host before any feedback.
+        - min_limit: Lowest concurrency limit of a host.
+        - max_limit: Highest concurrency limit of a host, keep it at most the connection pool size.
+        - decrease_factor: Multiplier applied to the limit on congestion.
+        - latency_tolerance: A response slower than this many times the fastest response counts as congestion.
+        - max_retries: Retries of a request that got a 429, a 5xx or a connection error.
+        - backoff_base: Seconds of the first backoff, doubled at each retry.
+        - backoff_max: Highest backoff in seconds.
+        - no_retry_429_hosts: Hosts whose 429 answers are returned to the caller instead of retried, because the caller
+          enforces the quota of the host and must see them (e.g. the Jikan client). They still cut the concurrency limit.
+          values.SCHEDULER_NO_RETRY_429_HOSTS, read at each request, if None.
+        '''
+        self.initial_limit = initial_limit or values.SCHEDULER_INITIAL_LIMIT
+        self.min_limit = min_limit or values.SCHEDULER_MIN_LIMIT
+        self.max_limit = max_limit or values.SCHEDULER_MAX_LIMIT
+        self.decrease_factor = decrease_factor or values.SCHEDULER_DECREASE_FACTOR
+        self.latency_tolerance = latency_tolerance or values.SCHEDULER_LATENCY_TOLERANCE
+        self.max_retries = values.SCHEDULER_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base or values.SCHEDULER_BACKOFF_BASE
+        self.backoff_max = backoff_max or values.SCHEDULER_BACKOFF_MAX
+        self.no_retry_429_hosts = None if no_retry_429_hosts is None else set(no_retry_429_hosts)
+        self.limiters: dict[str, HostLimiter] = {}
+        self.lock = threading.Lock()
+
+    def limiter(self, url: str) -> HostLimiter:
+        host = urlsplit(url).netloc
+        with self.lock:
+            limiter = self.limiters.get(host)
+            if limiter is None:
+                limiter = HostLimiter(self.initial_limit, self.min_limit, self.max_limit, self.decrease_factor, self.latency_tolerance)
+                self.limiters[host] = limiter
+            return limiter
+
+    def backoff_delay(self, attempt: int, retry_after: float | None = None) -> float:
+        '''
+        Full jitter exponential backoff, never shorter than the Retry-After time of the server.
+        '''
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def should_retry(self, status_code: int | None, attempt: int, url: str | None = None) -> bool:
+        if status_code == 429 and url is not None:
+            # The default scheduler outlives changes to values (e.g. point_values_at), so the hosts are read here
+            no_retry_429_hosts = values.SCHEDULER_NO_RETRY_429_HOSTS if self.no_retry_429_hosts is None else self.no_retry_429_hosts
+            if urlsplit(url).netloc in no_retry_429_hosts:
+                return False
+        return _is_overload(status_code) and attempt < self.max_retries
+
+    def get_limits(self) -> dict:
+        '''
+        Current state of every host seen.
+
+        Returns:
+        - Dictionary of host -> {'limit', 'in_flight', 'latency', 'min_latency'}.
+        '''
+        with self.lock:
+            limiters = dict(self.limiters)
+        return {host: limiter.snapshot() for host, limiter in limiters.items()}
+
+
+class ScheduledAdapter(HTTPAdapter):
+    '''
+    requests transport adapter that sends the requests through a RequestScheduler.
+    '''
+    def __init__(self, scheduler: RequestScheduler | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.scheduler = scheduler or get_default_scheduler()
+
+    def send(self, request, **kwargs):
+        limiter = self.scheduler.limiter(request.url)
+        attempt = 0
+        while True:
+            limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                limiter.release(None, time.monotonic() - start)
+                if not self.scheduler.should_retry(None, attempt):
+                    raise
+                time.sleep(self.scheduler.backoff_delay(attempt))
+                attempt += 1
+                continue
+            limiter.release(response.status_code, time.monotonic() - start)
+            if not self.scheduler.should_retry(response.status_code, attempt, request.url):
+                return response
+            retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+            response.close()
+            time.sleep(self.scheduler.backoff_delay(attempt, retry_after))
+            attempt += 1
+
+
+class ScheduledAsyncTransport(httpx.AsyncBaseTransport):
+    '''
+    httpx transport that sends the requests of an AsyncClient through a RequestScheduler.
+    '''
+    def __init__(self, scheduler: RequestScheduler | None = None, transport: httpx.AsyncBaseTransport | None = None, **transport_kwargs):
+        '''
+        Args:
+        - scheduler: Scheduler shared with the other clients, the default scheduler if None.
+        - transport: Transport that sends the requests, an httpx.AsyncHTTPTransport with transport_kwargs if None.
+        '''
+        self.scheduler = scheduler or get_default_scheduler()
+        self.transport = transport or httpx.AsyncHTTPTransport(**transport_kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        limiter = self.scheduler.limiter(str(request.url))
+        attempt = 0
+        while True:
+            await limiter.acquire_async()
+            start = time.monotonic()
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                limiter.release(None, time.monotonic() - start)
+                if not self.scheduler.should_retry(None, attempt):
+                    raise
+                await asyncio.sleep(self.scheduler.backoff_delay(attempt))
+                attempt += 1
+                continue
+            limiter.release(response.status_code, time.monotonic() - start)
+            if not self.scheduler.should_retry(response.status_code, attempt, str(request.url)):
+                return response
+            retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+            await response.aclose()
+            await asyncio.sleep(self.scheduler.backoff_delay(attempt, retry_after))
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def get_default_scheduler() -> RequestScheduler:
+    '''
+    Get the scheduler shared by all the sessions and clients, so the limits of a host are global.
+    '''
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
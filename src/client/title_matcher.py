@@ -0,0 +1,176 @@
+'''
+Local fuzzy matching of Anime Fire titles to MAL IDs.
+
+Titles are normalized (accents, punctuation and the Anime Fire "Dublado"/"Legendado" tags removed)
+and compared by the similarity of their trigram sets, like PostgreSQL's pg_trgm. Titles with
+different numbers ("Season 2", "2nd Season", "II") are penalized, so a sequel doesn't match the
+first season. An inverted index of the trigrams keeps a lookup proportional to the titles that share
+trigrams with the query, not to the size of the index.
+'''
+import re
+import threading
+import unicodedata
+from shared_components import values
+
+# Tags added by Anime Fire to the titles, they are not part of the MAL titles
+AF_TITLE_TAGS = ('todos os episodios', 'dublado', 'legendado', 'dub', 'leg')
+ROMAN_NUMERALS = {'ii': '2', 'iii': '3', 'iv': '4', 'v': '5', 'vi': '6'}
+
+_ORDINAL = re.compile(r'\b(\d+)(?:st|nd|rd|th|a|o|ª|º)\b')
+_NON_WORD = re.compile(r'[\W_]+')
+_AF_TAGS = re.compile(r'\b(?:' + '|'.join(AF_TITLE_TAGS) + r')\b')
+
+
+def normalize_title(title: str) -> str:
+    '''
+    Normalize a title for matching: lowercase, no accents, no punctuation, no Anime Fire tags
+    and ordinals/roman numerals written as numbers.
+    '''
+    title = unicodedata.normalize('NFKD', title.lower())
+    title = ''.join(char for char in title if not unicodedata.combining(char))
+    title = _NON_WORD.sub(' ', title.replace('-', ' '))
+    title = _AF_TAGS.sub(' ', title)
+    title = _ORDINAL.sub(r'\1', title)
+    return ' '.join(ROMAN_NUMERALS.get(word, word) for word in title.split())
+
+
+def trigrams(normalized_title: str) -> set[str]:
+    '''
+    Trigrams of each word of a normalized title, padded like pg_trgm ("  w", " wo", "wor", "ord", "rd ").
+    '''
+    result = set()
+    for word in normalized_title.split():
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def _numbers(normalized_title: str) -> frozenset[str]:
+    return frozenset(word for word in normalized_title.split() if word.isdigit())
+
+
+def similarity(title_a: str, title_b: str) -> float:
+    '''
+    Similarity between two titles, from 0 (nothing in common) to 1 (same normalized title).
+    '''
+    a, b = normalize_title(title_a), normalize_title(title_b)
+    return _score(trigrams(a), _numbers(a), trigrams(b), _numbers(b))
+
+
+def _score(trigrams_a: set, numbers_a: frozenset, trigrams_b: set, numbers_b: frozenset, shared: int | None = None) -> float:
+    if not trigrams_a or not trigrams_b:
+        return 0.0
+    if shared is None:
+        shared = len(trigrams_a & trigrams_b)
+    score = shared / (len(trigrams_a) + len(trigrams_b) - shared)
+    if numbers_a != numbers_b:
+        score *= values.TITLE_MATCH_NUMBER_PENALTY
+    return score
+
+
+def candidate_titles(candidate: dict) -> list[str]:
+    '''
+    Every title of a Jikan anime: main, English, Japanese, synonyms and the alternative titles list.
+    '''
+    titles = [candidate.get('title'), candidate.get('title_english'), candidate.get('title_japanese')]
+    titles += candidate.get('title_synonyms') or []
+    titles += [title.get('title') for title in candidate.get('titles') or []]
+    return [title for title in dict.fromkeys(titles) if title and title != 'N/A']
+
+
+class TitleMatcher:
+    def __init__(self):
+        self.entries: list[tuple] = []  # (mal_id, trigrams, numbers) of each title
+        self.known: set[tuple] = set()  # (mal_id, normalized title) already indexed
+        self.index: dict[str, set[int]] = {}  # trigram -> positions in entries
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, mal_id: int, *titles: str):
+        '''
+        Index titles (main title and aliases) of an anime.
+        '''
+        with self.lock:
+            for title in titles:
+                if not title or mal_id in (None, values.BAD_ID):
+                    continue
+                normalized = normalize_title(title)
+                title_trigrams = trigrams(normalized)
+                if not title_trigrams or (mal_id, normalized) in self.known:
+                    continue
+                self.known.add((mal_id, normalized))
+                position = len(self.entries)
+                self.entries.append((mal_id, title_trigrams, _numbers(normalized)))
+                for trigram in title_trigrams:
+                    self.index.setdefault(trigram, set()).add(position)
+
+    def add_candidate(self, candidate: dict):
+        '''
+        Index the titles of an anime returned by the Jikan search.
+        '''
+        self.add(candidate['mal_id'], *candidate_titles(candidate))
+
+    def match(self, title: str, limit=5) -> list[tuple]:
+        '''
+        Rank the indexed animes by the similarity of their closest title to a title.
+
+        Returns:
+        - List of (mal_id, score), best first, at most limit items.
+        '''
+        normalized = normalize_title(title)
+        query_trigrams = trigrams(normalized)
+        query_numbers = _numbers(normalized)
+        with self.lock:
+            shared: dict[int, int] = {}
+            for trigram in query_trigrams:
+                for position in self.index.get(trigram, ()):
+                    shared[position] = shared.get(position, 0) + 1
+            best: dict[int, tuple] = {}  # mal_id -> (score, position of its first title)
+            for position, count in shared.items():
+                mal_id, entry_trigrams, entry_numbers = self.entries[position]
+                score = _score(query_trigrams, query_numbers, entry_trigrams, entry_numbers, shared=count)
+                previous_score, first_position = best.get(mal_id, (0.0, position))
+                best[mal_id] = (max(score, previous_score), min(position, first_position))
+        # Ties keep the order the animes were indexed (Jikan's relevance order)
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[1][1]))
+        return [(mal_id, score) for mal_id, (score, _) in ranked[:limit]]
+
+    def resolve(self, title: str, threshold: float | None = None, margin: float | None = None):
+        '''
+        Resolve a title locally if the best match is unambiguous.
+
+        Args:
+        - threshold: Lowest score accepted, values.TITLE_MATCH_THRESHOLD if None.
+        - margin: Lowest difference to the second best anime, values.TITLE_MATCH_MARGIN if None.
+
+        Returns:
+        - (mal_id, score), or None if there is no match good enough and the title must be searched on Jikan.
+        '''
+        threshold = values.TITLE_MATCH_THRESHOLD if threshold is None else threshold
+        margin = values.TITLE_MATCH_MARGIN if margin is None else margin
+        ranked = self.match(title, limit=2)
+        if not ranked or ranked[0][1] < threshold:
+            return None
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < margin:
+            return None
+        return ranked[0]
+
+
+def rank_candidates(title: str, candidates: list[dict]) -> list[tuple]:
+    '''
+    Re-rank the animes of a Jikan search by the similarity of their titles to the searched title.
+
+    Returns:
+    - List of (mal_id, score), best first. Candidates with the same score keep the Jikan order.
+    '''
+    matcher = TitleMatcher()
+    for candidate in candidates:
+        matcher.add_candidate(candidate)
+    ranked = matcher.match(title, limit=len(candidates))
+    # Candidates without any trigram in common still count, after the others
+    scores = dict(ranked)
+    for candidate in candidates:
+        scores.setdefault(candidate['mal_id'], 0.0)
+    return list(scores.items())
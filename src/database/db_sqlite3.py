@@ -1,16 +1,69 @@
+import json
 import sqlite3
 from typing import Optional
 from interface.db_interface import (
-    AnimesTableInterface, ChannelsTableInterface, DatabaseManagerInterface, EpisodeTableInterface,
-    MsgsAnTableInterface, MsgsEpTableInterface, PlatformsTableInterface
+    AnimeMetadataTableInterface, AnimesTableInterface, ChannelsTableInterface, DatabaseManagerInterface, EpisodeTableInterface, LinkChecksTableInterface,
+    MalIdResolutionsTableInterface, MsgsAnTableInterface, MsgsEpTableInterface, PlatformsTableInterface
 )
-from shared_components.db_structs import Anime, Episode, Platform, Channel, MsgAn, MsgEp
+from shared_components.db_structs import Anime, AnimeMetadata, Episode, LinkCheck, MalIdResolution, Platform, Channel, MsgAn, MsgEp
 from shared_components import values
 import logging
 
 # Configurar o logger
 logging.basicConfig(filename=values.LOG_PATH, level=logging.ERROR)
 
+# Parameters per query, kept below the SQLITE_MAX_VARIABLE_NUMBER of old SQLite builds (999)
+SQLITE_MAX_PARAMS = 900
+
+
+def _chunks(items: list, size: int = SQLITE_MAX_PARAMS):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _upsert_results(rows: list, last_sequence: int, keys: list, description: str) -> list[tuple]:
+    '''
+    Convert the result of DatabaseManagerInterface.execute_returning for an upsert returning the primary key.
+
+    Returns:
+        - List of (primary key, inserted) for each row, (values.INSERT_FAILED, False) for a row rejected by a constraint.
+    '''
+    results = []
+    for key, row in zip(keys, rows):
+        if isinstance(row, sqlite3.Error) or row is None:
+            logging.error(f"An error occurred upserting {description}: {key}.\nErrmsg: {row}")
+            results.append((values.INSERT_FAILED, False))
+        else:
+            results.append((row[0], row[0] > last_sequence))
+    return results
+
+
+def _insert_many_results(errors: list, keys: list, primary_keys: dict, description: str) -> list[int]:
+    '''
+    Convert the errors of DatabaseManagerInterface.execute_many to the results of insert_many.
+
+    Args:
+        - errors: Result of execute_many, one item per row.
+        - keys: Natural key of each row, used to find its primary key and in the log messages.
+        - primary_keys: Natural key -> primary key of the rows in the table after the insert.
+        - description: Name of the row type used in the log messages.
+
+    Returns:
+        - List with the primary key of each row inserted, values.EXISTS_IN_DB for a row that conflicts with a
+          stored one, or values.INSERT_FAILED for a row rejected by another constraint.
+    '''
+    results = []
+    for key, error in zip(keys, errors):
+        if error is None:
+            results.append(primary_keys.get(key, values.BAD_ID))
+        elif 'UNIQUE' in str(error):
+            logging.error(f"{description} already exists: {key}.\nErrmsg: {error}")
+            results.append(values.EXISTS_IN_DB)
+        else:
+            logging.error(f"An error occurred inserting {description}: {key}.\nErrmsg: {error}")
+            results.append(values.INSERT_FAILED)
+    return results
+
 
 class SqliteDB:
     def __init__(self, path):
@@ -327,6 +380,49 @@ class SQLiteAnimes(AnimesTableInterface):
             logging.error(f"An error occurred inserting anime: {anime.title}.\nErrmsg: {e}")
             return values.BAD_ID
 
+    def upsert(self, anime: Anime):
+        '''
+        Insert an anime or, if its mal_id is stored, refresh its metadata, in a single statement.
+
+        Returns:
+            - (anime_id, inserted): inserted is False when the anime already existed. anime_id is values.INSERT_FAILED
+              if the row is rejected by a constraint, values.BAD_ID if the statement could not run.
+        '''
+        return self.upsert_many([anime])[0]
+
+    def upsert_many(self, animes: list[Anime]):
+        '''
+        Upsert many animes in a single transaction, see upsert.
+        '''
+        query = '''
+            INSERT INTO animes (
+                mal_id, title, title_english, title_japanese, type, episodes, 
+                status, airing, aired, rating, duration, season, year, studios, 
+                producers, synopsis
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(mal_id) DO UPDATE SET
+                title = excluded.title, title_english = excluded.title_english, title_japanese = excluded.title_japanese,
+                type = excluded.type, episodes = excluded.episodes, status = excluded.status, airing = excluded.airing,
+                aired = excluded.aired, rating = excluded.rating, duration = excluded.duration, season = excluded.season,
+                year = excluded.year, studios = excluded.studios, producers = excluded.producers, synopsis = excluded.synopsis
+            RETURNING anime_id
+        '''
+        params_list = [
+            (
+                anime.mal_id, anime.title, anime.title_english, anime.title_japanese, anime.type, 
+                anime.episodes, anime.status, anime.airing, anime.aired, anime.rating, 
+                anime.duration, anime.season, anime.year, anime.studios, anime.producers, 
+                anime.synopsis
+            )
+            for anime in animes
+        ]
+        try:
+            rows, last_sequence = self.database_manager.execute_returning(query, params_list, sequence_table='animes')
+        except sqlite3.Error as e:
+            logging.error(f"An error occurred upserting {len(animes)} animes.\nErrmsg: {e}")
+            return [(values.BAD_ID, False)] * len(animes)
+        return _upsert_results(rows, last_sequence, [anime.mal_id for anime in animes], 'anime')
+
     def get_primary_key(self, mal_id: int):
         query = 'SELECT anime_id FROM animes WHERE mal_id = ?'
         value = self.database_manager.fetch_value(query, (mal_id,))
@@ -353,6 +449,42 @@ class SQLiteAnimes(AnimesTableInterface):
             anime_data = dict(zip(column_names, row))
             return Anime.from_dict(anime_data)
         return values.NOT_FOUND
+
+    def get_titles(self):
+        '''
+        Get the titles of every anime, used to build the local title matcher.
+
+        Returns:
+            - List of (mal_id, title, title_english, title_japanese).
+        '''
+        query = 'SELECT mal_id, title, title_english, title_japanese FROM animes'
+        return self.database_manager.fetch_all(query)
+
+    def get_backfill_candidates(self, max_age: int, limit: int):
+        '''
+        Get the animes whose episodes are missing or stale: animes without episodes, and airing animes whose
+        newest episode was stored more than max_age seconds ago. Only animes with a resolved Anime Fire slug.
+
+        Args:
+            - max_age: Seconds after the newest episode of an airing anime before it is stale.
+            - limit: Maximum number of animes returned.
+
+        Returns:
+            - List of (af_slug, mal_id, last episode number or None), the least recently updated first.
+        '''
+        # MIN(af_slug) prefere o slug legendado ao "-dublado" do mesmo anime
+        query = '''
+            SELECT MIN(mal_id_resolutions.af_slug), animes.mal_id, MAX(episodes.episode_number)
+            FROM animes
+            JOIN mal_id_resolutions ON mal_id_resolutions.mal_id = animes.mal_id
+            LEFT JOIN episodes ON episodes.mal_id = animes.mal_id
+            GROUP BY animes.mal_id
+            HAVING MAX(episodes.episode_number) IS NULL
+                OR (animes.airing AND MAX(episodes.creation_date) <= datetime('now', ?))
+            ORDER BY MAX(episodes.creation_date)
+            LIMIT ?
+        '''
+        return self.database_manager.fetch_all(query, (f'-{max_age} seconds', limit))
                
 
 class SQLiteEpisodes(EpisodeTableInterface):
@@ -400,6 +532,78 @@ class SQLiteEpisodes(EpisodeTableInterface):
             logging.error(f"An error occurred inserting episode: {episode.episode_number}.\nErrmsg: {e}")
             return values.BAD_ID
 
+    def insert_many(self, episodes: list[Episode]):
+        '''
+        Insert many episodes in a single transaction.
+
+        Returns:
+            - List with the episode_id of each episode, values.EXISTS_IN_DB if it conflicts with a stored episode
+              or values.INSERT_FAILED if it was rejected.
+        '''
+        query = '''
+            INSERT INTO episodes (
+                anime_id, mal_id, episode_number, watch_link, 
+                download_link_hd, download_link_sd, temp
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        '''
+        params_list = [
+            (
+                episode.anime_id, episode.mal_id, episode.episode_number, episode.watch_link, 
+                episode.download_link_hd, episode.download_link_sd, episode.temp
+            )
+            for episode in episodes
+        ]
+        try:
+            errors = self.database_manager.execute_many(query, params_list)
+        except sqlite3.Error as e:
+            logging.error(f"An error occurred inserting {len(episodes)} episodes.\nErrmsg: {e}")
+            return [values.BAD_ID] * len(episodes)
+        keys = [(episode.mal_id, episode.episode_number) for episode in episodes]
+        primary_keys = {}
+        for chunk in _chunks(list(dict.fromkeys(mal_id for mal_id, _ in keys))):
+            query = f"SELECT mal_id, episode_number, episode_id FROM episodes WHERE mal_id IN ({', '.join('?' * len(chunk))})"
+            for mal_id, episode_number, episode_id in self.database_manager.fetch_all(query, tuple(chunk)):
+                primary_keys[(mal_id, episode_number)] = episode_id
+        return _insert_many_results(errors, keys, primary_keys, 'episode')
+
+    def upsert(self, episode: Episode):
+        '''
+        Insert an episode or, if its (mal_id, episode_number) is stored, refresh its links, in a single statement.
+
+        Returns:
+            - (episode_id, inserted): inserted is False when the episode already existed. episode_id is values.INSERT_FAILED
+              if the row is rejected by a constraint, values.BAD_ID if the statement could not run.
+        '''
+        return self.upsert_many([episode])[0]
+
+    def upsert_many(self, episodes: list[Episode]):
+        '''
+        Upsert many episodes in a single transaction, see upsert.
+        '''
+        query = '''
+            INSERT INTO episodes (
+                anime_id, mal_id, episode_number, watch_link, 
+                download_link_hd, download_link_sd, temp
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(mal_id, episode_number) DO UPDATE SET
+                watch_link = excluded.watch_link, download_link_hd = excluded.download_link_hd,
+                download_link_sd = excluded.download_link_sd, temp = excluded.temp
+            RETURNING episode_id
+        '''
+        params_list = [
+            (
+                episode.anime_id, episode.mal_id, episode.episode_number, episode.watch_link, 
+                episode.download_link_hd, episode.download_link_sd, episode.temp
+            )
+            for episode in episodes
+        ]
+        try:
+            rows, last_sequence = self.database_manager.execute_returning(query, params_list, sequence_table='episodes')
+        except sqlite3.Error as e:
+            logging.error(f"An error occurred upserting {len(episodes)} episodes.\nErrmsg: {e}")
+            return [(values.BAD_ID, False)] * len(episodes)
+        return _upsert_results(rows, last_sequence, [(episode.mal_id, episode.episode_number) for episode in episodes], 'episode')
+
 
     def get_primary_key(self, mal_id:int, episode_number:int):
         query = 'SELECT episode_id FROM episodes WHERE mal_id = ? AND episode_number = ?' 
@@ -422,6 +626,36 @@ class SQLiteEpisodes(EpisodeTableInterface):
             return Episode.from_dict(data)
         return values.NOT_FOUND
 
+    def get_last_episode_number(self, mal_id: int):
+        """
+        Get the highest episode number stored for an anime.
+
+        Args:
+            - mal_id: MAL ID of the anime.
+
+        Returns:
+            - The highest episode number, or None if the anime has no episodes.
+        """
+        query = 'SELECT MAX(episode_number) FROM episodes WHERE mal_id = ?'
+        params = (mal_id,)
+        return self.database_manager.fetch_value(query, params)
+
+    def update_download_links(self, episode_id: int, download_link_hd: str, download_link_sd: str, temp: int):
+        """
+        Replace the download links of an episode, used to promote a temporary (mp4_temp) episode to its permanent links.
+
+        Returns:
+            - The episode_id, or values.BAD_ID if the update failed.
+        """
+        query = 'UPDATE episodes SET download_link_hd = ?, download_link_sd = ?, temp = ? WHERE episode_id = ?'
+        params = (download_link_hd, download_link_sd, temp, episode_id)
+        try:
+            self.database_manager.execute_non_query(query, params)
+            return episode_id
+        except sqlite3.Error as e:
+            logging.error(f"An error occurred updating the download links of episode: {episode_id}.\nErrmsg: {e}")
+            return values.BAD_ID
+
     def get_episodes_by_mal_id(self, mal_id: int):
         """
         Get all episodes corresponding to a given MAL ID.
@@ -696,6 +930,211 @@ class SQLiteMsgsEp(MsgsEpTableInterface):
             return MsgEp.from_dict(data)
         return values.NOT_FOUND
 
+class SQLiteMalIdResolutions(MalIdResolutionsTableInterface):
+    def __init__(self, database_manager: DatabaseManagerInterface) -> None:
+        super().__init__(database_manager)
+
+    def create_table(self) -> None:
+        # af_slug is UNIQUE, so resolving a known title is a single indexed lookup.
+        query = '''
+            CREATE TABLE IF NOT EXISTS mal_id_resolutions (
+                resolution_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                af_slug TEXT UNIQUE NOT NULL,
+                title TEXT NOT NULL,
+                mal_id INTEGER NOT NULL,
+                confidence REAL,
+                resolved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        '''
+        self.database_manager.execute_non_query(query)
+
+    def insert_data(self, resolution: MalIdResolution) -> int:
+        # Replaces the old resolution of the slug, restarting its TTL.
+        query = '''
+            INSERT OR REPLACE INTO mal_id_resolutions (
+                af_slug, title, mal_id, confidence
+            ) VALUES (?, ?, ?, ?)
+        '''
+        params = (
+            resolution.af_slug, resolution.title, resolution.mal_id, resolution.confidence
+        )
+        try:
+            primary_key = self.database_manager.execute_non_query(query, params)
+            if primary_key is None:
+                ValueError(f"Failed to retrieve primary key for resolution: {resolution.af_slug}")
+                return values.BAD_ID
+            return primary_key
+        except sqlite3.Error as e:
+            logging.error(f"An error occurred inserting resolution: {resolution.af_slug}.\nErrmsg: {e}")
+            return values.BAD_ID
+
+    def get_primary_key(self, af_slug:str) -> int:
+        query = 'SELECT resolution_id FROM mal_id_resolutions WHERE af_slug = ?'
+        params = (af_slug,)
+        value = self.database_manager.fetch_value(query, params)
+        if value:
+            try:
+                primary_key = int(value)
+            except (ValueError, TypeError):
+                return values.BAD_ID
+            return primary_key
+        return values.BAD_ID
+
+    def get_by_id(self, resolution_id:int):
+        query = 'SELECT * FROM mal_id_resolutions WHERE resolution_id = ?'
+        params = (resolution_id,)
+        row, column_names = self.database_manager.fetch_one_and_get_column_names(query, params)
+        if row:
+            data = dict(zip(column_names, row))
+            return MalIdResolution.from_dict(data)
+        return values.NOT_FOUND
+
+    def get_by_slug(self, af_slug:str, ttl:int = values.RESOLUTION_TTL, negative_ttl:int = values.RESOLUTION_NEGATIVE_TTL):
+        """
+        Get the resolution of an Anime Fire slug if it is not expired.
+
+        Args:
+            - af_slug: Anime name in the Anime Fire URL format: name-of-anime.
+            - ttl: Seconds a resolution to a mal_id is valid.
+            - negative_ttl: Seconds a resolution to values.BAD_ID (not found) is valid.
+
+        Returns:
+            - The MalIdResolution, or values.NOT_FOUND if there is no valid resolution.
+        """
+        query = '''
+            SELECT * FROM mal_id_resolutions
+            WHERE af_slug = ? AND resolved_at > datetime('now', CASE WHEN mal_id = ? THEN ? ELSE ? END)
+        '''
+        params = (af_slug, values.BAD_ID, f'-{negative_ttl} seconds', f'-{ttl} seconds')
+        row, column_names = self.database_manager.fetch_one_and_get_column_names(query, params)
+        if row:
+            data = dict(zip(column_names, row))
+            return MalIdResolution.from_dict(data)
+        return values.NOT_FOUND
+
+    def get_confident_titles(self, min_confidence:float):
+        """
+        Get the Anime Fire titles resolved with a confidence of at least min_confidence, they are aliases of the MAL titles.
+
+        Returns:
+            - List of (mal_id, title).
+        """
+        query = 'SELECT mal_id, title FROM mal_id_resolutions WHERE mal_id > 0 AND confidence >= ?'
+        return self.database_manager.fetch_all(query, (min_confidence,))
+
+class SQLiteLinkChecks(LinkChecksTableInterface):
+    def __init__(self, database_manager: DatabaseManagerInterface) -> None:
+        super().__init__(database_manager)
+
+    def create_table(self) -> None:
+        # One row per URL with the result of its last check.
+        query = '''
+            CREATE TABLE IF NOT EXISTS link_checks (
+                link_check_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT UNIQUE NOT NULL,
+                episode_id INTEGER REFERENCES episodes(episode_id) ON DELETE CASCADE ON UPDATE CASCADE,
+                alive INTEGER NOT NULL,
+                status_code INTEGER,
+                checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        '''
+        self.database_manager.execute_non_query(query)
+
+    def insert_data(self, link_check: LinkCheck) -> int:
+        # Replaces the last check of the URL.
+        query = '''
+            INSERT OR REPLACE INTO link_checks (
+                url, episode_id, alive, status_code
+            ) VALUES (?, ?, ?, ?)
+        '''
+        params = (link_check.url, link_check.episode_id, link_check.alive, link_check.status_code)
+        try:
+            primary_key = self.database_manager.execute_non_query(query, params)
+            if primary_key is None:
+                ValueError(f"Failed to retrieve primary key for link check: {link_check.url}")
+                return values.BAD_ID
+            return primary_key
+        except sqlite3.Error as e:
+            logging.error(f"An error occurred inserting link check: {link_check.url}.\nErrmsg: {e}")
+            return values.BAD_ID
+
+    def insert_many(self, link_checks: list[LinkCheck]):
+        # Replaces the last check of each URL, all in a single transaction.
+        query = '''
+            INSERT OR REPLACE INTO link_checks (
+                url, episode_id, alive, status_code
+            ) VALUES (?, ?, ?, ?)
+        '''
+        params_list = [(link_check.url, link_check.episode_id, link_check.alive, link_check.status_code) for link_check in link_checks]
+        try:
+            errors = self.database_manager.execute_many(query, params_list)
+        except sqlite3.Error as e:
+            logging.error(f"An error occurred inserting {len(link_checks)} link checks.\nErrmsg: {e}")
+            return [values.BAD_ID] * len(link_checks)
+        urls = [link_check.url for link_check in link_checks]
+        primary_keys = {}
+        for chunk in _chunks(urls):
+            query = f"SELECT url, link_check_id FROM link_checks WHERE url IN ({', '.join('?' * len(chunk))})"
+            primary_keys.update(self.database_manager.fetch_all(query, tuple(chunk)))
+        return _insert_many_results(errors, urls, primary_keys, 'link check')
+
+    def get_primary_key(self, url:str) -> int:
+        query = 'SELECT link_check_id FROM link_checks WHERE url = ?'
+        params = (url,)
+        value = self.database_manager.fetch_value(query, params)
+        if value:
+            try:
+                primary_key = int(value)
+            except (ValueError, TypeError):
+                return values.BAD_ID
+            return primary_key
+        return values.BAD_ID
+
+    def get_by_id(self, link_check_id:int):
+        query = 'SELECT * FROM link_checks WHERE link_check_id = ?'
+        params = (link_check_id,)
+        row, column_names = self.database_manager.fetch_one_and_get_column_names(query, params)
+        if row:
+            data = dict(zip(column_names, row))
+            return LinkCheck.from_dict(data)
+        return values.NOT_FOUND
+
+    def get_by_url(self, url:str):
+        query = 'SELECT * FROM link_checks WHERE url = ?'
+        params = (url,)
+        row, column_names = self.database_manager.fetch_one_and_get_column_names(query, params)
+        if row:
+            data = dict(zip(column_names, row))
+            return LinkCheck.from_dict(data)
+        return values.NOT_FOUND
+
+    def get_links_to_check(self, max_age:int, limit:int):
+        """
+        Get the download links never checked or checked more than max_age seconds ago, temporary episodes first.
+
+        Args:
+            - max_age: Seconds a check is valid.
+            - limit: Maximum number of links returned.
+
+        Returns:
+            - List of (episode_id, url, temp) tuples.
+        """
+        query = '''
+            SELECT links.episode_id, links.url, links.temp
+            FROM (
+                SELECT episode_id, download_link_hd AS url, temp FROM episodes
+                UNION ALL
+                SELECT episode_id, download_link_sd AS url, temp FROM episodes
+            ) AS links
+            LEFT JOIN link_checks ON link_checks.url = links.url
+            WHERE links.url IS NOT NULL
+                AND (link_checks.checked_at IS NULL OR link_checks.checked_at <= datetime('now', ?))
+            ORDER BY links.temp DESC, link_checks.checked_at
+            LIMIT ?
+        '''
+        params = (f'-{max_age} seconds', limit)
+        return self.database_manager.fetch_all(query, params)
+
 class MsgsGe:
     def __init__(self, cursor):
         self.cursor = cursor
@@ -984,3 +1423,79 @@ class WatchList:
             return result[0]
         else:
             return None
+
+class SQLiteAnimeMetadata(AnimeMetadataTableInterface):
+    def __init__(self, database_manager: DatabaseManagerInterface) -> None:
+        super().__init__(database_manager)
+
+    def create_table(self) -> None:
+        # Jikan metadata prefetched in bulk, one row per anime with its dictionary as JSON.
+        query = '''
+            CREATE TABLE IF NOT EXISTS anime_metadata (
+                mal_id INTEGER PRIMARY KEY,
+                data TEXT NOT NULL,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        '''
+        self.database_manager.execute_non_query(query)
+
+    def insert_data(self, metadata: AnimeMetadata) -> int:
+        # Replaces the old metadata of the anime, restarting its TTL.
+        query = 'INSERT OR REPLACE INTO anime_metadata (mal_id, data) VALUES (?, ?)'
+        params = (metadata.mal_id, json.dumps(metadata.data, ensure_ascii=False))
+        try:
+            primary_key = self.database_manager.execute_non_query(query, params)
+            if primary_key is None:
+                ValueError(f"Failed to retrieve primary key for anime metadata: {metadata.mal_id}")
+                return values.BAD_ID
+            return primary_key
+        except (sqlite3.Error, TypeError) as e:
+            logging.error(f"An error occurred inserting anime metadata: {metadata.mal_id}.\nErrmsg: {e}")
+            return values.BAD_ID
+
+    def insert_many(self, metadata_list: list[AnimeMetadata]):
+        # Replaces the old metadata of each anime, all in a single transaction. mal_id is the primary key.
+        query = 'INSERT OR REPLACE INTO anime_metadata (mal_id, data) VALUES (?, ?)'
+        try:
+            params_list = [(metadata.mal_id, json.dumps(metadata.data, ensure_ascii=False)) for metadata in metadata_list]
+            errors = self.database_manager.execute_many(query, params_list)
+        except (sqlite3.Error, TypeError) as e:
+            logging.error(f"An error occurred inserting {len(metadata_list)} anime metadata.\nErrmsg: {e}")
+            return [values.BAD_ID] * len(metadata_list)
+        mal_ids = [metadata.mal_id for metadata in metadata_list]
+        return _insert_many_results(errors, mal_ids, {mal_id: mal_id for mal_id in mal_ids}, 'anime metadata')
+
+    def get_primary_key(self, mal_id:int) -> int:
+        query = 'SELECT mal_id FROM anime_metadata WHERE mal_id = ?'
+        value = self.database_manager.fetch_value(query, (mal_id,))
+        if value:
+            try:
+                primary_key = int(value)
+            except (ValueError, TypeError):
+                return values.BAD_ID
+            return primary_key
+        return values.BAD_ID
+
+    def get_by_id(self, mal_id:int):
+        query = 'SELECT * FROM anime_metadata WHERE mal_id = ?'
+        row, column_names = self.database_manager.fetch_one_and_get_column_names(query, (mal_id,))
+        if row:
+            data = dict(zip(column_names, row))
+            data['data'] = json.loads(data['data'])
+            return AnimeMetadata.from_dict(data)
+        return values.NOT_FOUND
+
+    def get_fresh(self, mal_id:int, ttl:int = values.ANIME_METADATA_TTL):
+        """
+        Get the metadata of an anime if it was fetched less than ttl seconds ago.
+
+        Returns:
+            - The AnimeMetadata, or values.NOT_FOUND if there is no fresh metadata.
+        """
+        query = "SELECT * FROM anime_metadata WHERE mal_id = ? AND fetched_at > datetime('now', ?)"
+        row, column_names = self.database_manager.fetch_one_and_get_column_names(query, (mal_id, f'-{ttl} seconds'))
+        if row:
+            data = dict(zip(column_names, row))
+            data['data'] = json.loads(data['data'])
+            return AnimeMetadata.from_dict(data)
+        return values.NOT_FOUND
@@ -1,81 +1,248 @@
+import asyncio
+import time
+import weakref
+from functools import partial
 from interface.db_factory_and_manager import TableFactory
 from interface.db_interface import DatabaseManagerInterface
-from client import data_colect
-from shared_components.db_structs import Anime, Episode, Platform, Channel, MsgAn, MsgEp
+from client import data_colect, link_checker, title_matcher
+from shared_components.checkpoint import CrawlCheckpoint
+from shared_components.db_structs import Anime, AnimeMetadata, Episode, LinkCheck, MalIdResolution, Platform, Channel, MsgAn, MsgEp
 from shared_components import values
 
-def _insert_animes_into_database(
-        db_manager:DatabaseManagerInterface, watch_links: list[list[dict]],
-        download_links: list[list[dict]], animes_metadata: list[dict], print_log=False
-    ):
-    animes: list[Anime] = []
-    episodes: list[Episode] = []
+_title_matchers = weakref.WeakKeyDictionary()  # db_manager -> TitleMatcher
+_season_prefetches = weakref.WeakKeyDictionary()  # db_manager -> fetched_at of the season prefetch in its title matcher
+
+def get_title_matcher(db_manager:DatabaseManagerInterface) -> title_matcher.TitleMatcher:
+    '''
+    Get the local title matcher of a database, built on first use from the titles of the stored animes
+    and the Anime Fire titles resolved with confidence. The Jikan search results are added to it as they come.
+    '''
+    matcher = _title_matchers.get(db_manager)
+    if matcher is None:
+        table = TableFactory(db_manager)
+        matcher = title_matcher.TitleMatcher()
+        for mal_id, *titles in table.get_animes().get_titles():
+            matcher.add(mal_id, *titles)
+        for mal_id, title in table.get_resolutions().get_confident_titles(values.TITLE_MATCH_THRESHOLD):
+            matcher.add(mal_id, title)
+        _title_matchers[db_manager] = matcher
+    return matcher
+
+def resolve_mal_id(db_manager:DatabaseManagerInterface, title: str, af_url: str, print_log=False) -> int:
+    '''
+    Resolve an Anime Fire title to its MAL ID. A title not in the mal_id_resolutions table is matched
+    against the local title matcher, and only a title without an unambiguous local match is searched on Jikan.
+
+    Args:
+     - title: Title of the anime on Anime Fire, used in the Jikan search.
+     - af_url: Anime Fire URL of the anime, its slug is the resolution key.
+     - print_log: Boolean indicating whether to print log messages.
+
+    Returns:
+     - The MAL ID, or values.BAD_ID if the anime is not found. Misses are cached for values.RESOLUTION_NEGATIVE_TTL seconds.
+    '''
     table = TableFactory(db_manager)
+    af_slug = data_colect.get_anime_name_from_af_url(af_url)
+    resolution = table.get_resolutions().get_by_slug(af_slug)
+    if resolution != values.NOT_FOUND:
+        if print_log:
+            print(f'Resolved from database: {af_slug} -> {resolution.mal_id}')
+        return resolution.mal_id
+
+    matcher = get_title_matcher(db_manager)
+    match = matcher.resolve(title)
+    if match is not None:
+        mal_id, confidence = match
+        if print_log:
+            print(f'Resolved locally: {title} -> {mal_id} ({confidence:.2f})')
+        table.get_resolutions().insert_data(MalIdResolution(af_slug, title, mal_id, confidence))
+        return mal_id
 
+    candidates = data_colect.search_anime_candidates_on_jikan_v4(title_matcher.normalize_title(title), print_log=print_log)
+    if candidates == values.RATE_LIMITED:  # A refused search says nothing about the title
+        return values.RATE_LIMITED
+    mal_id, confidence = values.BAD_ID, None
+    if candidates:
+        for candidate in candidates:
+            matcher.add_candidate(candidate)
+        mal_id, confidence = title_matcher.rank_candidates(title, candidates)[0]
+        if print_log:
+            print(f'Resolved on Jikan: {title} -> {mal_id} ({confidence:.2f})')
+    table.get_resolutions().insert_data(MalIdResolution(af_slug, title, mal_id, confidence))
+    return mal_id
+
+def prefetch_season_metadata(db_manager:DatabaseManagerInterface, max_age:int = values.ANIME_METADATA_TTL, print_log=False) -> int:
+    '''
+    Store the Jikan metadata of every anime of the current season, read 25 animes per request from the seasonal
+    listing, so get_anime_metadata finds the releases of the season without a request per anime.
+    The titles are added to the title matcher too, so the releases of the season resolve without a Jikan search.
+    The prefetch is recorded in the anime_metadata table (values.SEASON_PREFETCH_MAL_ID row), so it is not repeated
+    by a new process while it is fresh.
+
+    Args:
+     - max_age: Seconds a prefetch is valid, a prefetch done less than max_age seconds ago is not repeated.
+     - print_log: Boolean indicating whether to print log messages.
+
+    Returns:
+     - The number of animes stored, 0 if the prefetch was skipped.
+    '''
+    table = TableFactory(db_manager)
+    matcher = get_title_matcher(db_manager)
+    last_prefetch = table.get_anime_metadata().get_fresh(values.SEASON_PREFETCH_MAL_ID, max_age)
+    if last_prefetch != values.NOT_FOUND:
+        if _season_prefetches.get(db_manager) != last_prefetch.fetched_at:
+            # Prefetch feita por outro processo: só falta colocar os títulos no matcher deste
+            for mal_id in last_prefetch.data['mal_ids']:
+                metadata = table.get_anime_metadata().get_by_id(mal_id)
+                if metadata != values.NOT_FOUND:
+                    matcher.add_candidate(metadata.data)
+            _season_prefetches[db_manager] = last_prefetch.fetched_at
+        if print_log:
+            print('Season metadata still fresh, prefetch skipped')
+        return 0
+    season_animes = data_colect.get_season_animes_from_jikan_v4(print_log=print_log)
+    table.get_anime_metadata().insert_many([AnimeMetadata(anime_data['mal_id'], anime_data) for anime_data in season_animes])
+    for anime_data in season_animes:
+        matcher.add_candidate(anime_data)
+    if season_animes:
+        mal_ids = [anime_data['mal_id'] for anime_data in season_animes]
+        table.get_anime_metadata().insert_data(AnimeMetadata(values.SEASON_PREFETCH_MAL_ID, {'mal_ids': mal_ids}))
+        _season_prefetches[db_manager] = table.get_anime_metadata().get_by_id(values.SEASON_PREFETCH_MAL_ID).fetched_at
     if print_log:
-        print('\n>>>>>> Add Anime <<<<<<\n')
+        print(f'Season metadata prefetched: {len(season_animes)} animes')
+    return len(season_animes)
+
+def get_anime_metadata(db_manager:DatabaseManagerInterface, mal_id: int, print_log=False):
+    '''
+    Get the Jikan metadata of an anime from the anime_metadata table, requesting Jikan only if it is missing or expired.
+
+    Returns:
+     - Anime dictionary (see data_colect.get_anime_resource_from_jikan_v4), or None if the Jikan request failed.
+    '''
+    table = TableFactory(db_manager)
+    metadata = table.get_anime_metadata().get_fresh(mal_id, values.ANIME_METADATA_TTL)
+    if metadata != values.NOT_FOUND:
+        if print_log:
+            print(f'Metadata from database: {mal_id}')
+        return metadata.data
+    anime_data = data_colect.get_anime_resource_from_jikan_v4(mal_id, print_log=print_log)
+    if anime_data:
+        table.get_anime_metadata().insert_data(AnimeMetadata(mal_id, anime_data))
+    return anime_data
+
+def get_delta_start_episode(db_manager:DatabaseManagerInterface, mal_id: int) -> int:
+    '''
+    Get the first episode of an anime that is not in the database yet, so only the new episodes are scraped.
+
+    Returns:
+     - The highest episode number stored plus one, or 0 if the anime has no episodes.
+    '''
+    table = TableFactory(db_manager)
+    last_episode_number = table.get_episodes().get_last_episode_number(mal_id)
+    if last_episode_number is None:
+        return 0
+    return last_episode_number + 1
+
+def _insert_anime_unit_into_database(
+        db_manager:DatabaseManagerInterface, anime_metadata: dict | None,
+        episodes_links: list[dict], print_log=False
+    ):
+    '''
+    Insert one anime and its episodes, as yielded by data_colect.iter_releasing_animes_from_af.
+    An anime or episode already stored is updated with the data scraped (status, airing, links).
+
+    Returns:
+     - The anime inserted (None if it already existed or has no metadata) and the list of episodes inserted.
+    '''
+    inserted_anime = None
+    episodes: list[Episode] = []
+    table = TableFactory(db_manager)
+    anime_ids: dict[int, int] = {}
 
-    # Inserir animes
-    for anime_data in animes_metadata:
+    if anime_metadata:
+        if print_log:
+            print('\n>>>>>> Add Anime <<<<<<\n')
         # Criar instância do objeto Anime
-        anime = Anime.from_dict(anime_data)
-        # Verifica se já existe
-        anime_id = table.get_animes().get_primary_key(anime.mal_id)
-        if anime_id is None or anime_id == values.BAD_ID:
-            anime_id = table.get_animes().insert_data(anime)
-            anime.anime_id=anime_id
-            animes.append(anime)
-            if anime_id is not None or anime_id != values.BAD_ID:
-                if print_log:
-                    print(f'Anime added: {anime}')
-        else:
-            print(f"Anime {anime.title} already exists in database")
-    
-    combined_episodes = []
-    for watch_list, download_list in zip(watch_links, download_links):
-        for watch_episode, download_episode in zip(watch_list, download_list):
-            # Certifique-se de que os episódios têm o mesmo número
-            assert watch_episode['ep'] == download_episode['episode'], "Números de episódio diferentes"
-            
-            # Combine os dados do episódio de assistir e fazer download
-            combined_episode = {
-                'mal_id': watch_episode['mal_id'],
-                'episode_number': watch_episode['ep'],
-                'watch_link': watch_episode['watch_link'],
-                'download_link_hd': download_episode['hd'],
-                'download_link_sd': download_episode['sd'],
-                'temp': download_episode['temp']
-            }
-            combined_episodes.append(combined_episode)
-
-    # Agora, combined_links contém todos os episódios combinados em uma estrutura de dicionário de listas
+        anime = Anime.from_dict(anime_metadata)
+        # Insere, ou atualiza os metadados se já existe, em um comando só
+        anime_id, inserted = table.get_animes().upsert(anime)
+        anime.anime_id = anime_id
+        if inserted:
+            inserted_anime = anime
+            anime_ids[anime.mal_id] = anime_id
+            if print_log:
+                print(f'Anime added: {anime}')
+        elif anime_id not in (values.BAD_ID, values.INSERT_FAILED):
+            anime_ids[anime.mal_id] = anime_id
+            print(f"Anime {anime.title} already exists in database, metadata updated")
+
     if print_log:
         print('\n>>>>>> Add Episode <<<<<<\n')
 
-    for episode_data in combined_episodes:
+    # Os links de assistir e fazer download já vêm combinados por número de episódio
+    new_episodes: list[Episode] = []
+    for episode_data in episodes_links:
         # Obter anime_id com base no mal_id do episódio
-        anime_id = table.get_animes().get_primary_key(episode_data['mal_id'])
-        # Incluir anime_id nos dados do episódio
-        episode_data['anime_id'] = anime_id
-        # Criar o objeto Episode a partir dos dados do episódio
-        episode = Episode.from_dict(episode_data)
-        # Verificar se o episodio existe no banco de dados
-        episode_id = table.get_episodes().get_primary_key(episode.mal_id, episode.episode_number)
-        if episode_id is None or episode_id == values.BAD_ID:
-            # Se o episódio não existe, inseri-lo e adicionar à lista de episódios
-            episode_id = table.get_episodes().insert_data(episode)
-            episode.episode_id = episode_id
-            episodes.append(episode)
-            if episode_id is not None or episode_id != values.BAD_ID:
-                if print_log:
-                    print(f'Episode added: {episode}')
-        else:
-            # Se o episódio já existe, imprimir mensagem de aviso
+        mal_id = episode_data['mal_id']
+        if mal_id not in anime_ids:
+            anime_ids[mal_id] = table.get_animes().get_primary_key(mal_id)
+        episode_data['anime_id'] = anime_ids[mal_id]
+        new_episodes.append(Episode.from_dict(episode_data))
+    if not new_episodes:
+        return inserted_anime, episodes
+
+    # Todos os episódios em uma transação só, os que já existem têm os links atualizados
+    inserted_ids = set()
+    for episode, (episode_id, inserted) in zip(new_episodes, table.get_episodes().upsert_many(new_episodes)):
+        if episode_id in (values.BAD_ID, values.INSERT_FAILED):
+            continue
+        if not inserted or episode_id in inserted_ids:
             print(f'Episode already exists: id - {episode_id}, mal_id - {episode.mal_id}, ep - {episode.episode_number}')
-    return animes, episodes
+            continue
+        inserted_ids.add(episode_id)
+        episode.episode_id = episode_id
+        episodes.append(episode)
+        if print_log:
+            print(f'Episode added: {episode}')
+    return inserted_anime, episodes
+
+def iter_releasing_animes_from_af_into_database(
+        db_manager:DatabaseManagerInterface, extract_amount:int = 1, start_page:int = 1, incremental=False, delta=False,
+        checkpoint_path:str | None = None, resume=False, prefetch_season=True, gallop=False, print_log=False
+    ):
+    '''
+    Extract the releases from Anime Fire and MyAnimeList storing each anime as soon as it is scraped,
+    so a failure only loses the anime being scraped and memory does not grow with extract_amount.
+
+    Args:
+     - Same as extract_releasing_animes_from_af_and_insert_into_database.
+
+    Yields:
+     - The anime inserted (None if it already existed) and the list of its episodes inserted, one anime at a time.
+    '''
+    checkpoint = None
+    if checkpoint_path is not None:
+        checkpoint = CrawlCheckpoint(checkpoint_path)
+        if not resume:
+            checkpoint.reset()
+        elif print_log:
+            print(f'Resuming crawl: {len(checkpoint.done)} animes done, {len(checkpoint.releases)} releases read')
+    if prefetch_season:
+        prefetch_season_metadata(db_manager, print_log=print_log)
+    for anime_metadata, episodes_links in data_colect.iter_releasing_animes_from_af(
+            extract_amount=extract_amount, start_page=start_page, incremental=incremental,
+            resolve_mal_id=partial(resolve_mal_id, db_manager, print_log=print_log),
+            get_start_episode=partial(get_delta_start_episode, db_manager) if delta else None,
+            get_anime_metadata=partial(get_anime_metadata, db_manager, print_log=print_log),
+            checkpoint=checkpoint, gallop=gallop, print_log=print_log
+        ):
+        yield _insert_anime_unit_into_database(db_manager, anime_metadata, episodes_links, print_log=print_log)
+    if checkpoint is not None:
+        checkpoint.reset()  # Crawl finished, the next one starts from scratch
 
 def extract_releasing_animes_from_af_and_insert_into_database(
-        db_manager:DatabaseManagerInterface, extract_amount:int = 1, start_page:int = 1, print_log=False
+        db_manager:DatabaseManagerInterface, extract_amount:int = 1, start_page:int = 1, incremental=False, delta=False,
+        checkpoint_path:str | None = None, resume=False, prefetch_season=True, gallop=False, print_log=False
     ):
     '''
     Exxtract dara from Anime Fire and MyAnimeList and inserts in a sqlite3 database
@@ -83,48 +250,210 @@ def extract_releasing_animes_from_af_and_insert_into_database(
     Args:
      - extract_amount: Amount of url to be extracted from Anime Fire, each url correspond to 1 anime.
      - start_page: Release page number in Anime Fire to start the extract. Exemple page: https://animefire.plus/em-lancamento/1.
+     - incremental: Only extract the releases newer than the ones seen by the last incremental extract.
+     - delta: Only scrape the episodes after the last episode of each anime stored in the database.
+     - checkpoint_path: File where the progress of the crawl is saved after each step, no checkpoint if None.
+     - resume: Continue the crawl saved in checkpoint_path instead of starting it again.
+     - prefetch_season: Prefetch the metadata of the current season before the crawl (see prefetch_season_metadata).
+     - gallop: Find the last episode of each anime with galloping/binary search (see data_colect.get_episodes_links_from_af).
      - database_path: Full path for the sqlite3 database file, editable in shared_components/values.py.
      - print_log: Boolean indicating whether to print log messages.
 
     Rreturns:
      - None.
     '''
-    watch_links, download_links, animes_metadata = data_colect.extract_releasing_animes_from_af(
-        extract_amount=extract_amount, start_page=start_page, print_log=print_log
-    )
-    # Conectar ao banco de dados SQLite
-    animes, episodes = _insert_animes_into_database(
-        db_manager, watch_links=watch_links, download_links=download_links,
-        animes_metadata=animes_metadata, print_log=print_log
-    )
+    animes: list[Anime] = []
+    episodes: list[Episode] = []
+    for anime, anime_episodes in iter_releasing_animes_from_af_into_database(
+            db_manager, extract_amount=extract_amount, start_page=start_page, incremental=incremental,
+            delta=delta, checkpoint_path=checkpoint_path, resume=resume, prefetch_season=prefetch_season, gallop=gallop, print_log=print_log
+        ):
+        if anime is not None:
+            animes.append(anime)
+        episodes.extend(anime_episodes)
     return animes, episodes
+
+def poll_releasing_animes_from_af_into_database(
+        db_manager:DatabaseManagerInterface, extract_amount:int = 10, interval:int = values.AF_RELEASES_POLL_INTERVAL, print_log=False
+    ):
+    '''
+    Keep extracting the new releases from Anime Fire into the database every interval seconds.
+
+    Each iteration is incremental and delta, so when nothing was released it costs a single release page request
+    and an anime with a new episode only has its new episodes scraped.
+
+    Args:
+     - extract_amount: Maximum amount of new animes extracted in each iteration.
+     - interval: Seconds between iterations.
+     - print_log: Boolean indicating whether to print log messages.
+    '''
+    while True:
+        animes_added = 0
+        episodes_added = 0
+        for anime, episodes in iter_releasing_animes_from_af_into_database(
+                db_manager, extract_amount=extract_amount, incremental=True, delta=True, print_log=print_log
+            ):
+            animes_added += anime is not None
+            episodes_added += len(episodes)
+        if print_log:
+            print(f'Poll finished: {animes_added} animes and {episodes_added} episodes added')
+        time.sleep(interval)
     
 
-def insert_custom_anime_from_af_into_database(db_manager:DatabaseManagerInterface, url_af: str,print_log=False):
+def insert_custom_anime_from_af_into_database(db_manager:DatabaseManagerInterface, url_af: str, delta=False, print_log=False):
     '''
     Insert a single anime from anime fire into the database.
 
     Args:
      - anime_url_on_af: URL to the anime overview page on Anime Fire following the format: 
                         https://animefire.plus/animes/anime-name-todos-os-episodios.
+     - delta: Only scrape the episodes after the last episode of the anime stored in the database.
      - database_path: Full path for the sqlite3 database file, editable in shared_components/values.py.
      - print_log: Boolean indicating whether to print log messages.
 
     Returns:
      - A anime and this anime episodes.
     '''
-    watch_links, download_links, anime_data = data_colect.extract_custom_anime_from_af(
-        anime_url_on_af=url_af, print_log=print_log
-    )
-    animes, episodes = _insert_animes_into_database(
-        db_manager,
-        watch_links=[watch_links],
-        download_links=[download_links],
-        animes_metadata=[anime_data],
-        print_log=print_log
+    episodes_links, anime_data = data_colect.extract_custom_anime_from_af(
+        anime_url_on_af=url_af, resolve_mal_id=partial(resolve_mal_id, db_manager, print_log=print_log),
+        get_start_episode=partial(get_delta_start_episode, db_manager) if delta else None,
+        get_anime_metadata=partial(get_anime_metadata, db_manager, print_log=print_log), print_log=print_log
     )
+    anime, episodes = _insert_anime_unit_into_database(db_manager, anime_data, episodes_links, print_log=print_log)
+    animes = [anime] if anime is not None else []
     return animes, episodes
 
+def save_download_link_check(db_manager:DatabaseManagerInterface, url: str, alive: bool, status_code: int | None = None, episode_id: int | None = None):
+    '''
+    Store the result of a download link check, replacing the previous one.
+    '''
+    table = TableFactory(db_manager)
+    return table.get_link_checks().insert_data(LinkCheck(url, int(alive), status_code, episode_id))
+
+def is_download_link_dead(db_manager:DatabaseManagerInterface, url: str) -> bool:
+    '''
+    Check if the last check of a download link found it dead, so the publisher doesn't try it.
+
+    Returns:
+     - True if the link was checked and was dead, False if it was alive or never checked.
+    '''
+    table = TableFactory(db_manager)
+    link_check = table.get_link_checks().get_by_url(url)
+    return link_check != values.NOT_FOUND and not link_check.alive
+
+async def check_download_links(
+        db_manager:DatabaseManagerInterface, max_age:int = values.LINK_CHECK_INTERVAL, limit:int = values.LINK_CHECK_BATCH, print_log=False
+    ):
+    '''
+    Check the stored download links never checked or checked more than max_age seconds ago, temporary episodes first.
+
+    The permanent (mp4/) links of the temporary episodes are checked too, and an episode whose permanent
+    links are all alive is promoted: its row gets the permanent links and temp = 0.
+
+    Args:
+     - max_age: Seconds a check is valid.
+     - limit: Maximum number of stored links checked.
+     - print_log: Boolean indicating whether to print log messages.
+
+    Returns:
+     - The number of stored links checked and the number of episodes promoted.
+    '''
+    table = TableFactory(db_manager)
+    links = table.get_link_checks().get_links_to_check(max_age, limit)
+    urls = [url for _, url, _ in links]
+
+    # Links permanentes dos episódios temporários
+    promotions: dict[int, Episode] = {}
+    for episode_id in {episode_id for episode_id, _, temp in links if temp}:
+        episode = table.get_episodes().get_by_id(episode_id)
+        if episode == values.NOT_FOUND:
+            continue
+        episode.download_link_hd = link_checker.permanent_url(episode.download_link_hd)
+        episode.download_link_sd = link_checker.permanent_url(episode.download_link_sd)
+        promotions[episode_id] = episode
+        # Um episódio pode ter só um dos links
+        urls += [url for url in (episode.download_link_hd, episode.download_link_sd) if url is not None]
+
+    results = await link_checker.check_links(urls)
+
+    link_checks = []
+    for episode_id, url, _ in links:
+        alive, status_code = results[url]
+        link_checks.append(LinkCheck(url, int(alive), status_code, episode_id))
+        if print_log and not alive:
+            print(f'Dead link: episode {episode_id}, {url} ({status_code})')
+    table.get_link_checks().insert_many(link_checks)
+
+    promoted = 0
+    for episode_id, episode in promotions.items():
+        permanent_urls = [url for url in (episode.download_link_hd, episode.download_link_sd) if url is not None]
+        if not permanent_urls or not all(results[url][0] for url in permanent_urls):
+            continue
+        if table.get_episodes().update_download_links(episode_id, episode.download_link_hd, episode.download_link_sd, 0) == values.BAD_ID:
+            continue
+        table.get_link_checks().insert_many([LinkCheck(url, 1, results[url][1], episode_id) for url in permanent_urls])
+        promoted += 1
+        if print_log:
+            print(f'Episode promoted to permanent links: {episode_id}')
+    return len(links), promoted
+
+async def run_link_checker(
+        db_manager:DatabaseManagerInterface, max_age:int = values.LINK_CHECK_INTERVAL, limit:int = values.LINK_CHECK_BATCH,
+        interval:int = values.LINK_CHECK_POLL_INTERVAL, print_log=False
+    ):
+    '''
+    Keep checking the download links in the background, sleeping interval seconds when every link is up to date.
+    '''
+    while True:
+        checked, promoted = await check_download_links(db_manager, max_age=max_age, limit=limit, print_log=print_log)
+        if print_log:
+            print(f'Link check finished: {checked} links checked and {promoted} episodes promoted')
+        if checked < limit:
+            await asyncio.sleep(interval)
+
+def backfill_episodes_into_database(
+        db_manager:DatabaseManagerInterface, max_age:int = values.BACKFILL_MAX_AGE, limit:int = values.BACKFILL_BATCH, print_log=False
+    ):
+    '''
+    Scrape the episodes missing from the stored animes in bulk (see data_colect.backfill_episodes_links_from_af):
+    animes without episodes and airing animes not updated for max_age seconds, from their last stored episode on.
+
+    Args:
+     - max_age: Seconds after the newest episode of an airing anime before it is backfilled again.
+     - limit: Maximum number of animes backfilled.
+     - print_log: Boolean indicating whether to print log messages.
+
+    Returns:
+     - The number of animes backfilled and the number of episodes inserted.
+    '''
+    table = TableFactory(db_manager)
+    candidates = table.get_animes().get_backfill_candidates(max_age, limit)
+    if not candidates:
+        return 0, 0
+    animes = [
+        (f'{values.URL_AF_FILTER_RELEAES}{af_slug}-todos-os-episodios', mal_id, 0 if last_episode is None else last_episode + 1)
+        for af_slug, mal_id, last_episode in candidates
+    ]
+    episodes: list[Episode] = []
+    for (_, mal_id, _), episodes_links in zip(animes, data_colect.backfill_episodes_links_from_af(animes, print_log=print_log)):
+        anime_id = table.get_animes().get_primary_key(mal_id)
+        for episode_data in episodes_links or []:
+            episode_data['anime_id'] = anime_id
+            episodes.append(Episode.from_dict(episode_data))
+
+    if not episodes:
+        return len(animes), 0
+
+    # Só episódios depois do último salvo, então a inserção em lote basta
+    inserted = 0
+    for episode, episode_id in zip(episodes, table.get_episodes().insert_many(episodes)):
+        if episode_id in (values.BAD_ID, values.EXISTS_IN_DB, values.INSERT_FAILED):
+            continue
+        inserted += 1
+        if print_log:
+            print(f'Episode added: {episode.mal_id} ep {episode.episode_number}')
+    return len(animes), inserted
+
 def get_anime_from_database(db_manager:DatabaseManagerInterface, mal_id: int):
     '''
     Get anime and coorespondents episodes data from the database.
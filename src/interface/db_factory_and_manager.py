@@ -1,18 +1,48 @@
+import asyncio
+import queue
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Type, TypeVar
 from database.db_sqlite3 import (
-    SQLiteAnimes, SQLiteChannels, SQLiteEpisodes, SQLiteMsgsAn, SQLiteMsgsEp, SQLitePlatforms
+    SQLiteAnimeMetadata, SQLiteAnimes, SQLiteChannels, SQLiteEpisodes, SQLiteLinkChecks, SQLiteMalIdResolutions, SQLiteMsgsAn, SQLiteMsgsEp,
+    SQLitePlatforms
 )
 from interface.db_interface import (
-    AnimesTableInterface, ChannelsTableInterface, DatabaseManagerInterface, EpisodesTableInterface,
-    MsgsAnTableInterface, MsgsEpTableInterface, PlatformsTableInterface, TableInterface
+    AnimeMetadataTableInterface, AnimesTableInterface, AsyncDatabaseManagerInterface, ChannelsTableInterface, DatabaseManagerInterface,
+    EpisodesTableInterface, LinkChecksTableInterface, MalIdResolutionsTableInterface, MsgsAnTableInterface, MsgsEpTableInterface, PlatformsTableInterface, TableInterface
 )
 from shared_components import values
 
 class SQLiteDatabaseManager(DatabaseManagerInterface):
-    def __init__(self, db_path: str):
-        self.conn = sqlite3.connect(db_path)
+    def __init__(self, db_path: str, profile: str | dict | None = None, check_same_thread=True):
+        '''
+        Args:
+            - db_path: Path of the sqlite3 database file.
+            - profile: Name of a connection profile in values.SQLITE_PROFILES, or a dictionary of PRAGMA -> value.
+              values.SQLITE_PROFILE if None.
+            - check_same_thread: Refuse to use the connection from a thread other than the one that created it.
+              Disabled by SQLitePooledDatabaseManager, which hands each connection to a single thread at a time.
+        '''
+        self.conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
         self.cursor = self.conn.cursor()
+        self.apply_profile(values.SQLITE_PROFILE if profile is None else profile)
+
+    def apply_profile(self, profile: str | dict):
+        '''
+        Apply the PRAGMAs of a connection profile (see values.SQLITE_PROFILES) to the connection.
+        '''
+        pragmas = values.SQLITE_PROFILES[profile] if isinstance(profile, str) else profile
+        for name, value in pragmas.items():
+            if not name.isidentifier() or not str(value).lstrip('-').isalnum():
+                raise ValueError(f'Invalid PRAGMA: {name} = {value}')
+            self.cursor.execute(f'PRAGMA {name} = {value}')
+            result = self.cursor.fetchone()
+            # journal_mode devolve o modo que ficou valendo, WAL não funciona em todo sistema de arquivos
+            if name == 'journal_mode' and result and str(result[0]).upper() != str(value).upper():
+                print(f'SQLite journal_mode {value} not available, using {result[0]}')
+        self.profile = profile
 
     def create_tables(self):
         table = TableFactory(self)
@@ -22,6 +52,9 @@ class SQLiteDatabaseManager(DatabaseManagerInterface):
         table.get_channels().create_table()
         table.get_msgs_an().create_table()
         table.get_msgs_ep().create_table()
+        table.get_resolutions().create_table()
+        table.get_link_checks().create_table()
+        table.get_anime_metadata().create_table()
         
     def execute_non_query(self, query: str, params: tuple = ()):
         try:
@@ -32,6 +65,77 @@ class SQLiteDatabaseManager(DatabaseManagerInterface):
             self.conn.rollback()
             raise e
 
+    def execute_many(self, query: str, params_list: list[tuple]):
+        '''
+        Execute a statement once for each params inside a single transaction, so the whole batch costs one commit.
+
+        The batch runs with executemany. If a row violates a constraint, the batch is rolled back and run again
+        row by row in one transaction, skipping the failed rows.
+
+        Returns:
+            - List with one item per params: None if the row was executed, or the sqlite3.IntegrityError it raised.
+        '''
+        params_list = list(params_list)
+        try:
+            self.cursor.executemany(query, params_list)
+            self.conn.commit()
+            return [None] * len(params_list)
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise e
+
+        # Algum registro conflita: repete linha a linha, ainda em uma transação só
+        errors = []
+        try:
+            for params in params_list:
+                try:
+                    self.cursor.execute(query, params)
+                    errors.append(None)
+                except sqlite3.IntegrityError as e:
+                    errors.append(e)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise e
+        return errors
+
+    def execute_returning(self, query: str, params_list: list[tuple], sequence_table: str | None = None):
+        '''
+        Execute a statement with a RETURNING clause (SQLite 3.35+) once for each params inside a single transaction.
+
+        Args:
+            - query: INSERT ... RETURNING statement, usually an upsert.
+            - params_list: Parameters of each execution.
+            - sequence_table: Table whose AUTOINCREMENT counter is read in the transaction, before the statements.
+              Keys above it belong to rows inserted by the statements, the others to rows that already existed.
+
+        Returns:
+            - List with, for each params, the first row returned (None if no row) or the sqlite3.IntegrityError it raised.
+            - The AUTOINCREMENT counter of sequence_table (0 if no row was ever inserted), None if sequence_table is None.
+        '''
+        results = []
+        last_sequence = None
+        try:
+            if not self.conn.in_transaction:
+                self.cursor.execute('BEGIN IMMEDIATE')  # Reserva a escrita antes de ler o contador
+            if sequence_table is not None:
+                self.cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (sequence_table,))
+                row = self.cursor.fetchone()
+                last_sequence = row[0] if row else 0
+            for params in params_list:
+                try:
+                    self.cursor.execute(query, params)
+                    results.append(self.cursor.fetchone())
+                except sqlite3.IntegrityError as e:
+                    results.append(e)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise e
+        return results, last_sequence
+
     def fetch_value(self, query: str, params: tuple = ()):
         try:
             self.cursor.execute(query, params)
@@ -90,10 +194,183 @@ class SQLiteDatabaseManager(DatabaseManagerInterface):
     def get_conn(self):
         return self.conn
 
+class SQLitePooledDatabaseManager(DatabaseManagerInterface):
+    '''
+    Thread-safe manager for concurrent workers: a single writer connection, used by one thread at a time,
+    and a pool of read-only connections. Each connection is a SQLiteDatabaseManager with its own cursor,
+    checked out for the duration of a call, so TableFactory and the tables work unchanged.
+
+    Needs a database file in WAL mode (see values.SQLITE_PROFILES) for the readers not to wait for the writer.
+    '''
+    def __init__(self, db_path: str, readers: int = values.SQLITE_POOL_READERS, profile: str | dict | None = None):
+        '''
+        Args:
+            - db_path: Path of the sqlite3 database file, not ":memory:" (each connection would get its own database).
+            - readers: Number of read-only connections.
+            - profile: Connection profile of every connection, see SQLiteDatabaseManager.
+        '''
+        self.db_path = db_path
+        self.writer_manager = SQLiteDatabaseManager(db_path, profile=profile, check_same_thread=False)
+        self.writer_lock = threading.RLock()
+        self.readers: queue.Queue[SQLiteDatabaseManager] = queue.Queue()
+        self.reader_managers: list[SQLiteDatabaseManager] = []
+        for _ in range(readers):
+            reader = SQLiteDatabaseManager(db_path, profile=profile, check_same_thread=False)
+            reader.apply_profile({'query_only': 'ON'})
+            self.reader_managers.append(reader)
+            self.readers.put(reader)
+
+    @contextmanager
+    def writer(self):
+        '''
+        Check out the writer connection, waiting while another thread writes.
+
+        Yields:
+            - The SQLiteDatabaseManager of the writer connection.
+        '''
+        with self.writer_lock:
+            yield self.writer_manager
+
+    @contextmanager
+    def reader(self):
+        '''
+        Check out a read-only connection, waiting while all of them are in use. It returns to the pool on exit.
+
+        Yields:
+            - The SQLiteDatabaseManager of the reader connection.
+        '''
+        reader = self.readers.get()
+        try:
+            yield reader
+        finally:
+            self.readers.put(reader)
+
+    def create_tables(self):
+        with self.writer() as writer:
+            writer.create_tables()
+
+    def close(self):
+        with self.writer() as writer:
+            writer.close()
+        for reader in self.reader_managers:
+            reader.close()
+
+    def execute_non_query(self, query: str, params: tuple = ()):
+        with self.writer() as writer:
+            return writer.execute_non_query(query, params)
+
+    def execute_many(self, query: str, params_list: list[tuple]):
+        with self.writer() as writer:
+            return writer.execute_many(query, params_list)
+
+    def execute_returning(self, query: str, params_list: list[tuple], sequence_table: str | None = None):
+        with self.writer() as writer:
+            return writer.execute_returning(query, params_list, sequence_table=sequence_table)
+
+    def fetch_value(self, query: str, params: tuple = ()):
+        with self.reader() as reader:
+            return reader.fetch_value(query, params)
+
+    def fetch_one(self, query: str, params: tuple = ()):
+        with self.reader() as reader:
+            return reader.fetch_one(query, params)
+
+    def fetch_all(self, query: str, params: tuple = ()):
+        with self.reader() as reader:
+            return reader.fetch_all(query, params)
+
+    def fetch_one_and_get_column_names(self, query: str, params: tuple = ()):
+        with self.reader() as reader:
+            return reader.fetch_one_and_get_column_names(query, params)
+
+    def fetch_all_and_get_column_names(self, query: str, params: tuple = ()):
+        with self.reader() as reader:
+            return reader.fetch_all_and_get_column_names(query, params)
+
+    def get_cursor(self):
+        # A new cursor of the writer connection, only safe inside a writer() block
+        return self.writer_manager.get_conn().cursor()
+
+    def get_conn(self):
+        # The writer connection, only safe inside a writer() block
+        return self.writer_manager.get_conn()
+
+class AsyncSQLiteDatabaseManager(AsyncDatabaseManagerInterface):
+    '''
+    Manager for asyncio code such as the Telegram bot. The connection lives in a dedicated thread that takes
+    the calls from a request queue one at a time, and every method is awaitable, so a query never blocks the
+    event loop. Use AsyncTableFactory for the tables.
+    '''
+    def __init__(self, db_path: str, profile: str | dict | None = None):
+        '''
+        Args:
+            - db_path: Path of the sqlite3 database file.
+            - profile: Connection profile, see SQLiteDatabaseManager.
+        '''
+        # Um único worker: a thread dedicada e a fila de pedidos do executor
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+        # The connection is created in the DB thread, the only one allowed to use it
+        self.manager = self.executor.submit(SQLiteDatabaseManager, db_path, profile).result()
+
+    async def run(self, func, *args, **kwargs):
+        '''
+        Run a synchronous function in the DB thread and wait for it without blocking the event loop.
+        Used for the db_acess functions, passing self.manager as their db_manager.
+
+        Returns:
+            - The return of func, its exceptions are raised here.
+        '''
+        return await asyncio.wrap_future(self.executor.submit(func, *args, **kwargs))
+
+    def run_blocking(self, func, *args, **kwargs):
+        '''
+        Same as run, for synchronous code outside the event loop (e.g. __init__ methods).
+        '''
+        return self.executor.submit(func, *args, **kwargs).result()
+
+    async def create_tables(self):
+        return await self.run(self.manager.create_tables)
+
+    async def close(self):
+        await self.run(self.manager.close)
+        self.executor.shutdown()
+
+    async def execute_non_query(self, query: str, params: tuple = ()):
+        return await self.run(self.manager.execute_non_query, query, params)
+
+    async def execute_many(self, query: str, params_list: list[tuple]):
+        return await self.run(self.manager.execute_many, query, params_list)
+
+    async def execute_returning(self, query: str, params_list: list[tuple], sequence_table: str | None = None):
+        return await self.run(self.manager.execute_returning, query, params_list, sequence_table)
+
+    async def fetch_value(self, query: str, params: tuple = ()):
+        return await self.run(self.manager.fetch_value, query, params)
+
+    async def fetch_one(self, query: str, params: tuple = ()):
+        return await self.run(self.manager.fetch_one, query, params)
+
+    async def fetch_all(self, query: str, params: tuple = ()):
+        return await self.run(self.manager.fetch_all, query, params)
+
+    async def fetch_one_and_get_column_names(self, query: str, params: tuple = ()):
+        return await self.run(self.manager.fetch_one_and_get_column_names, query, params)
+
+    async def fetch_all_and_get_column_names(self, query: str, params: tuple = ()):
+        return await self.run(self.manager.fetch_all_and_get_column_names, query, params)
+
 class DatabaseManagerFactory:
     @staticmethod
-    def create_sqlite_db_manager() -> DatabaseManagerInterface:
-        return SQLiteDatabaseManager(values.SQLITE_DATABASE_PATH)
+    def create_sqlite_db_manager(profile: str | dict | None = None) -> DatabaseManagerInterface:
+        return SQLiteDatabaseManager(values.SQLITE_DATABASE_PATH, profile=profile)
+
+    @staticmethod
+    def create_sqlite_async_db_manager(profile: str | dict | None = None) -> AsyncDatabaseManagerInterface:
+        return AsyncSQLiteDatabaseManager(values.SQLITE_DATABASE_PATH, profile=profile)
+
+    @staticmethod
+    def create_sqlite_pooled_db_manager(readers: int = values.SQLITE_POOL_READERS, profile: str | dict | None = None) -> DatabaseManagerInterface:
+        return SQLitePooledDatabaseManager(values.SQLITE_DATABASE_PATH, readers=readers, profile=profile)
 
 T = TypeVar('T', bound=TableInterface)
 class TableFactory:
@@ -101,7 +378,7 @@ class TableFactory:
         self.database_manager = database_manager
 
     def _check_db_manager(self, table_class: Type[T]) -> T:
-        if isinstance(self.database_manager, SQLiteDatabaseManager):
+        if isinstance(self.database_manager, (SQLiteDatabaseManager, SQLitePooledDatabaseManager)):
             return table_class(self.database_manager)
         else:
             raise ValueError("Unsupported database type")
@@ -122,4 +399,66 @@ class TableFactory:
         return self._check_db_manager(SQLiteMsgsAn)
 
     def get_msgs_ep(self) -> MsgsEpTableInterface:
-        return self._check_db_manager(SQLiteMsgsEp)
\ No newline at end of file
+        return self._check_db_manager(SQLiteMsgsEp)
+
+    def get_resolutions(self) -> MalIdResolutionsTableInterface:
+        return self._check_db_manager(SQLiteMalIdResolutions)
+
+    def get_link_checks(self) -> LinkChecksTableInterface:
+        return self._check_db_manager(SQLiteLinkChecks)
+
+    def get_anime_metadata(self) -> AnimeMetadataTableInterface:
+        return self._check_db_manager(SQLiteAnimeMetadata)
+
+class AsyncTable:
+    '''
+    Awaitable variant of a table: has the same methods as the wrapped table, each one run in the DB thread
+    of an AsyncDatabaseManagerInterface.
+    '''
+    def __init__(self, database_manager: AsyncDatabaseManagerInterface, table: TableInterface):
+        self.database_manager = database_manager
+        self.table = table
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.table, name)
+        if not callable(attribute):
+            return attribute
+
+        async def run_in_db_thread(*args, **kwargs):
+            return await self.database_manager.run(attribute, *args, **kwargs)
+        return run_in_db_thread
+
+class AsyncTableFactory:
+    '''
+    TableFactory for an AsyncDatabaseManagerInterface, e.g. anime = await AsyncTableFactory(db).get_animes().get_by_mal_id(mal_id).
+    '''
+    def __init__(self, database_manager: AsyncDatabaseManagerInterface):
+        self.database_manager = database_manager
+        self.table_factory = TableFactory(database_manager.manager)
+
+    def get_animes(self) -> AsyncTable:
+        return AsyncTable(self.database_manager, self.table_factory.get_animes())
+
+    def get_episodes(self) -> AsyncTable:
+        return AsyncTable(self.database_manager, self.table_factory.get_episodes())
+
+    def get_platforms(self) -> AsyncTable:
+        return AsyncTable(self.database_manager, self.table_factory.get_platforms())
+
+    def get_channels(self) -> AsyncTable:
+        return AsyncTable(self.database_manager, self.table_factory.get_channels())
+
+    def get_msgs_an(self) -> AsyncTable:
+        return AsyncTable(self.database_manager, self.table_factory.get_msgs_an())
+
+    def get_msgs_ep(self) -> AsyncTable:
+        return AsyncTable(self.database_manager, self.table_factory.get_msgs_ep())
+
+    def get_resolutions(self) -> AsyncTable:
+        return AsyncTable(self.database_manager, self.table_factory.get_resolutions())
+
+    def get_link_checks(self) -> AsyncTable:
+        return AsyncTable(self.database_manager, self.table_factory.get_link_checks())
+
+    def get_anime_metadata(self) -> AsyncTable:
+        return AsyncTable(self.database_manager, self.table_factory.get_anime_metadata())
\ No newline at end of file
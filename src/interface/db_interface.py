@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import List, Any, Union
 from shared_components.db_structs import (
-    Anime, Channel, Episode, MsgAn, MsgEp, Platform
+    Anime, AnimeMetadata, Channel, Episode, LinkCheck, MalIdResolution, MsgAn, MsgEp, Platform
 )
 from shared_components import values
 
@@ -20,6 +20,14 @@ class DatabaseManagerInterface(ABC):
     def execute_non_query(self, query: str, params: tuple = ()) -> Union[int | None]:
         pass
 
+    @abstractmethod
+    def execute_many(self, query: str, params_list: list[tuple]) -> list:
+        pass
+
+    @abstractmethod
+    def execute_returning(self, query: str, params_list: list[tuple], sequence_table: str | None = None) -> tuple:
+        pass
+
     @abstractmethod
     def fetch_value(self, query: str, params: tuple = ()) -> Any:
         pass
@@ -49,6 +57,62 @@ class DatabaseManagerInterface(ABC):
         pass
 
 
+class AsyncDatabaseManagerInterface(ABC):
+    '''
+    Database manager for asyncio code: the queries are awaitable and run on a synchronous manager
+    (the manager attribute) outside the event loop.
+    '''
+    manager: DatabaseManagerInterface
+
+    @abstractmethod
+    async def run(self, func, *args, **kwargs) -> Any:
+        pass
+
+    @abstractmethod
+    def run_blocking(self, func, *args, **kwargs) -> Any:
+        pass
+
+    @abstractmethod
+    async def create_tables(self):
+        pass
+
+    @abstractmethod
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def execute_non_query(self, query: str, params: tuple = ()) -> Union[int | None]:
+        pass
+
+    @abstractmethod
+    async def execute_many(self, query: str, params_list: list[tuple]) -> list:
+        pass
+
+    @abstractmethod
+    async def execute_returning(self, query: str, params_list: list[tuple], sequence_table: str | None = None) -> tuple:
+        pass
+
+    @abstractmethod
+    async def fetch_value(self, query: str, params: tuple = ()) -> Any:
+        pass
+
+    @abstractmethod
+    async def fetch_one(self, query: str, params: tuple = ()) -> Any:
+        pass
+
+    @abstractmethod
+    async def fetch_all(self, query: str, params: tuple = ()) -> list:
+        pass
+
+    @abstractmethod
+    async def fetch_one_and_get_column_names(self, query: str, params: tuple = ()) -> tuple:
+        pass
+
+    @abstractmethod
+    async def fetch_all_and_get_column_names(self, query: str, params: tuple = ()) -> list[tuple]:
+        pass
+
+
 class TableInterface(ABC):
     def __init__(self, database_manager: DatabaseManagerInterface) -> None:
         super().__init__()
@@ -83,6 +147,14 @@ class AnimesTableInterface(TableInterface):
     def insert_data(self, anime:Anime) -> int:
         pass
 
+    @abstractmethod
+    def upsert(self, anime:Anime) -> tuple[int, bool]:
+        pass
+
+    @abstractmethod
+    def upsert_many(self, animes:list[Anime]) -> list[tuple[int, bool]]:
+        pass
+
     @abstractmethod
     def get_primary_key(self, mal_id:int) -> int:
         pass
@@ -95,6 +167,14 @@ class AnimesTableInterface(TableInterface):
     def get_by_mal_id(self, mal_id: int) -> Union[Anime, values.NOT_FOUND]:
         pass
 
+    @abstractmethod
+    def get_titles(self) -> list[tuple]:
+        pass
+
+    @abstractmethod
+    def get_backfill_candidates(self, max_age:int, limit:int) -> list[tuple]:
+        pass
+
 class EpisodesTableInterface(TableInterface):
     def __init__(self, database_manager: DatabaseManagerInterface) -> None:
         super().__init__(database_manager)
@@ -107,6 +187,18 @@ class EpisodesTableInterface(TableInterface):
     def insert_data(self, episode:Episode) -> int:
         pass
 
+    @abstractmethod
+    def insert_many(self, episodes:list[Episode]) -> list[int]:
+        pass
+
+    @abstractmethod
+    def upsert(self, episode:Episode) -> tuple[int, bool]:
+        pass
+
+    @abstractmethod
+    def upsert_many(self, episodes:list[Episode]) -> list[tuple[int, bool]]:
+        pass
+
     @abstractmethod
     def get_primary_key(self, mal_id:int, episode_number:int) -> int:
         pass
@@ -119,6 +211,14 @@ class EpisodesTableInterface(TableInterface):
     def get_by_mal_id(self, mal_id:int) -> Union[list[Episode], values.NOT_FOUND]:
         pass
 
+    @abstractmethod
+    def get_last_episode_number(self, mal_id:int) -> Union[int, None]:
+        pass
+
+    @abstractmethod
+    def update_download_links(self, episode_id:int, download_link_hd:str, download_link_sd:str, temp:int) -> int:
+        pass
+
 class PlatformsTableInterface(TableInterface):
     def __init__(self, database_manager: DatabaseManagerInterface) -> None:
         super().__init__(database_manager)
@@ -199,6 +299,94 @@ class MsgsEpTableInterface(TableInterface):
     def get_by_id(self, msg_ep_id:int) -> MsgEp:
         pass
 
+class MalIdResolutionsTableInterface(TableInterface):
+    def __init__(self, database_manager: DatabaseManagerInterface) -> None:
+        super().__init__(database_manager)
+
+    @abstractmethod
+    def create_table(self) -> None:
+        pass
+
+    @abstractmethod
+    def insert_data(self, resolution:MalIdResolution) -> int:
+        pass
+
+    @abstractmethod
+    def get_primary_key(self, af_slug:str) -> int:
+        pass
+
+    @abstractmethod
+    def get_by_id(self, resolution_id:int) -> MalIdResolution:
+        pass
+
+    @abstractmethod
+    def get_by_slug(self, af_slug:str) -> Union[MalIdResolution, values.NOT_FOUND]:
+        pass
+
+    @abstractmethod
+    def get_confident_titles(self, min_confidence:float) -> list[tuple]:
+        pass
+
+class LinkChecksTableInterface(TableInterface):
+    def __init__(self, database_manager: DatabaseManagerInterface) -> None:
+        super().__init__(database_manager)
+
+    @abstractmethod
+    def create_table(self) -> None:
+        pass
+
+    @abstractmethod
+    def insert_data(self, link_check:LinkCheck) -> int:
+        pass
+
+    @abstractmethod
+    def insert_many(self, link_checks:list[LinkCheck]) -> list[int]:
+        pass
+
+    @abstractmethod
+    def get_primary_key(self, url:str) -> int:
+        pass
+
+    @abstractmethod
+    def get_by_id(self, link_check_id:int) -> LinkCheck:
+        pass
+
+    @abstractmethod
+    def get_by_url(self, url:str) -> Union[LinkCheck, values.NOT_FOUND]:
+        pass
+
+    @abstractmethod
+    def get_links_to_check(self, max_age:int, limit:int) -> list[tuple]:
+        pass
+
+class AnimeMetadataTableInterface(TableInterface):
+    def __init__(self, database_manager: DatabaseManagerInterface) -> None:
+        super().__init__(database_manager)
+
+    @abstractmethod
+    def create_table(self) -> None:
+        pass
+
+    @abstractmethod
+    def insert_data(self, metadata:AnimeMetadata) -> int:
+        pass
+
+    @abstractmethod
+    def insert_many(self, metadata_list:list[AnimeMetadata]) -> list[int]:
+        pass
+
+    @abstractmethod
+    def get_primary_key(self, mal_id:int) -> int:
+        pass
+
+    @abstractmethod
+    def get_by_id(self, mal_id:int) -> AnimeMetadata:
+        pass
+
+    @abstractmethod
+    def get_fresh(self, mal_id:int, ttl:int) -> Union[AnimeMetadata, values.NOT_FOUND]:
+        pass
+
 class EpisodeTableInterface(TableInterface):
     @abstractmethod
     def get_episodes_by_mal_id(self, mal_id: int) -> Union[List[Episode], values.NOT_FOUND]:
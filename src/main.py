@@ -6,9 +6,16 @@ from client.bot_api.animestele_bot import Telena
 import urllib.parse
 from interface.db_factory_and_manager import DatabaseManagerFactory
 from shared_components.queue import Queue
+from shared_components import values
 
-async def main(mode):
-    if mode == 'local_windows_run':
+async def main(mode, args):
+    if mode == 'crawl_releases':
+        await crawl_releases(args.extract_amount, args.start_page, args.resume, args.gallop)
+    elif mode == 'check_links':
+        await check_links()
+    elif mode == 'backfill_episodes':
+        await backfill_episodes()
+    elif mode == 'local_windows_run':
         await local_windows_run()
     elif mode == 'local_windows_debug':
         await local_windows_debug()
@@ -23,6 +30,29 @@ async def main(mode):
     else:
         print(f"Unknown mode: {mode}")
 
+async def crawl_releases(extract_amount, start_page, resume, gallop=False):
+    print("Crawling the Anime Fire releases...")
+    db_manager = DatabaseManagerFactory().create_sqlite_db_manager()
+    db_manager.create_tables()
+    animes, episodes = db_acess.extract_releasing_animes_from_af_and_insert_into_database(
+        db_manager, extract_amount=extract_amount, start_page=start_page,
+        checkpoint_path=values.AF_CRAWL_CHECKPOINT_PATH, resume=resume, gallop=gallop, print_log=True
+    )
+    print(f'{len(animes)} animes and {len(episodes)} episodes added')
+
+async def backfill_episodes():
+    print("Backfilling the missing episodes of the stored animes...")
+    db_manager = DatabaseManagerFactory().create_sqlite_db_manager()
+    db_manager.create_tables()
+    animes, episodes = db_acess.backfill_episodes_into_database(db_manager, print_log=True)
+    print(f'{animes} animes backfilled and {episodes} episodes added')
+
+async def check_links():
+    print("Checking the download links in the background...")
+    db_manager = DatabaseManagerFactory().create_sqlite_db_manager()
+    db_manager.create_tables()
+    await db_acess.run_link_checker(db_manager, print_log=True)
+
 async def local_windows_run():
     print("Running in local Windows mode...")
     #db_sqlite3_acess.extract_releasing_animes_from_af_and_insert_into_database()
@@ -80,9 +110,13 @@ async def local_linux_debug():
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Run the program in different modes.')
     parser.add_argument('mode', choices=[
-        'local_windows_run', 'local_windows_debug','server_run', 'server_debug',
+        'crawl_releases', 'check_links', 'backfill_episodes', 'local_windows_run', 'local_windows_debug','server_run', 'server_debug',
         'local_linux_run', 'local_linux_debug'
     ], help='Mode to run the program in.')
+    parser.add_argument('--extract-amount', type=int, default=10, help='Releases extracted by crawl_releases.')
+    parser.add_argument('--start-page', type=int, default=1, help='First release page of crawl_releases.')
+    parser.add_argument('--resume', action='store_true', help='Continue the crawl_releases run that was interrupted.')
+    parser.add_argument('--gallop', action='store_true', help='Find the last episode of each anime with galloping/binary search in crawl_releases.')
 
     args = parser.parse_args()
-    asyncio.run(main(args.mode))
\ No newline at end of file
+    asyncio.run(main(args.mode, args))
\ No newline at end of file
@@ -0,0 +1,90 @@
+import json
+import os
+
+class CrawlCheckpoint:
+    '''
+    Progress of a release crawl, so a crawl that dies can be resumed without requesting again what was done.
+
+    The file is a journal: every completed step (release page, MAL ID, episode, metadata, anime stored) is
+    appended as a JSON line and flushed, so saving costs the same for the first and for the ten thousandth anime.
+    A line cut by a crash is ignored when the journal is loaded.
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.reset_state()
+        if os.path.exists(self.path):
+            self.load()
+
+    def reset_state(self):
+        self.page = 0  # Last release page read
+        self.releases: list[list] = []  # [title, url] of the releases read
+        self.releases_done = False
+        self.animes: dict[str, dict] = {}  # url -> {'mal_id', 'episodes', 'metadata'} of the animes in progress
+        self.done: set[str] = set()  # urls of the animes finished
+
+    def load(self):
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break  # Última linha incompleta, o processo morreu enquanto escrevia
+                self.apply(event)
+
+    def apply(self, event: dict):
+        kind = event['event']
+        if kind == 'releases':
+            self.page = event['page']
+            self.releases.extend(event['entries'])
+        elif kind == 'releases_done':
+            self.releases = event['entries']
+            self.releases_done = True
+        elif kind == 'anime_done':
+            self.animes.pop(event['url'], None)
+            self.done.add(event['url'])
+        else:
+            anime = self.animes.setdefault(event['url'], {'mal_id': None, 'episodes': [], 'metadata': None})
+            if kind == 'mal_id':
+                anime['mal_id'] = event['mal_id']
+            elif kind == 'episode':
+                anime['episodes'].append(event['episode'])
+            elif kind == 'metadata':
+                anime['metadata'] = event['metadata']
+
+    def write(self, event: dict):
+        self.apply(event)
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(event, ensure_ascii=False) + '\n')
+            file.flush()  # Garante que o passo fique salvo mesmo se o processo morrer logo depois
+
+    def reset(self):
+        '''
+        Forget the progress, used to start a crawl from scratch.
+        '''
+        self.reset_state()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def add_release_page(self, page: int, entries: list[tuple]):
+        self.write({'event': 'releases', 'page': page, 'entries': [list(entry) for entry in entries]})
+
+    def finish_releases(self, entries: list[tuple]):
+        self.write({'event': 'releases_done', 'entries': [list(entry) for entry in entries]})
+
+    def get_anime(self, url: str):
+        return self.animes.get(url)
+
+    def set_mal_id(self, url: str, mal_id: int):
+        self.write({'event': 'mal_id', 'url': url, 'mal_id': mal_id})
+
+    def add_episode(self, url: str, episode: dict):
+        self.write({'event': 'episode', 'url': url, 'episode': episode})
+
+    def set_metadata(self, url: str, metadata: dict):
+        self.write({'event': 'metadata', 'url': url, 'metadata': metadata})
+
+    def finish_anime(self, url: str):
+        self.write({'event': 'anime_done', 'url': url})
+
+    def is_anime_done(self, url: str) -> bool:
+        return url in self.done
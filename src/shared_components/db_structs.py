@@ -191,6 +191,84 @@ class MsgEp:
     def __str__(self):
         return str(self.to_dict())
 
+class MalIdResolution:
+    # mal_id is values.BAD_ID for negative entries (title not found on Jikan).
+    def __init__(self, af_slug:str, title:str, mal_id:int, confidence:Optional[float]=None):
+        self.af_slug = af_slug
+        self.title = title
+        self.mal_id = mal_id
+        self.confidence = confidence
+        self.resolution_id = values.UNDEFINED_ID
+        self.resolved_at:Optional[datetime] = None
+
+    @classmethod
+    def from_dict(cls, data:dict):
+        obj = cls(
+            af_slug=data['af_slug'],
+            title=data['title'],
+            mal_id=data['mal_id'],
+            confidence=data.get('confidence')
+        )
+        obj.resolution_id = data['resolution_id']
+        obj.resolved_at = data.get('resolved_at')
+        return obj
+
+    def to_dict(self):
+        return self.__dict__
+
+    def __str__(self):
+        return str(self.to_dict())
+
+class LinkCheck:
+    # alive uses 0 to false, 1 to true. status_code is None when the host could not be reached.
+    def __init__(self, url:str, alive:int, status_code:Optional[int]=None, episode_id:Optional[int]=None):
+        self.url = url
+        self.alive = alive
+        self.status_code = status_code
+        self.episode_id = episode_id
+        self.link_check_id = values.UNDEFINED_ID
+        self.checked_at:Optional[datetime] = None
+
+    @classmethod
+    def from_dict(cls, data:dict):
+        obj = cls(
+            url=data['url'],
+            alive=data['alive'],
+            status_code=data.get('status_code'),
+            episode_id=data.get('episode_id')
+        )
+        obj.link_check_id = data['link_check_id']
+        obj.checked_at = data.get('checked_at')
+        return obj
+
+    def to_dict(self):
+        return self.__dict__
+
+    def __str__(self):
+        return str(self.to_dict())
+
+class AnimeMetadata:
+    # data is the anime dictionary from client/data_colect.py get_anime_resource_from_jikan_v4.
+    def __init__(self, mal_id:int, data:dict):
+        self.mal_id = mal_id
+        self.data = data
+        self.fetched_at:Optional[datetime] = None
+
+    @classmethod
+    def from_dict(cls, data:dict):
+        obj = cls(
+            mal_id=data['mal_id'],
+            data=data['data']
+        )
+        obj.fetched_at = data.get('fetched_at')
+        return obj
+
+    def to_dict(self):
+        return self.__dict__
+
+    def __str__(self):
+        return str(self.to_dict())
+
 class MsgGe:
     def __init__(self, message_id, channel_id, type, description=None):
         self.message_id = message_id
@@ -8,8 +8,44 @@ URL_AF_DOWNLOADS:str = "https://animefire.plus/download/"
 URL_AF_FILTER_RELEAES:str = 'https://animefire.plus/animes/'
 URL_JIKAN_SEARCH:str = "https://api.jikan.moe/v4/anime?q="
 URL_JIKAN_SEARCH_BY_MALID:str = "https://api.jikan.moe/v4/anime/"
+URL_JIKAN_SEASON_NOW:str = "https://api.jikan.moe/v4/seasons/now"
 URLS_AF_FILTER_DOWNLOADS_LINKS:list[str] = ["https://s2.lightspeedst.net/s2/mp4/", "https://s2.lightspeedst.net/s2/mp4_temp/"]
+AF_RELEASES_HWM_PATH:str = "data/releases_hwm.json"  # Newest releases seen by the incremental crawl
+AF_RELEASES_HWM_SIZE:int = 3  # Consecutive releases that must match to recognize the high-water mark
+AF_RELEASES_POLL_INTERVAL:int = 5 * 60
+AF_MAX_EPISODES:int = 1000  # Assume que não haverá mais de 1000 episódios
+AF_EPISODES_MAX_IN_FLIGHT:int = 8  # Episodes of an anime probed at the same time by the crawl, 1 probes one at a time
+AF_RELEASES_HARD_LIMIT:int = 100  # Maximum releases extracted in a single call
+AF_CRAWL_CHECKPOINT_PATH:str = "data/crawl_checkpoint.jsonl"  # Progress of the release crawl, used by --resume
+JIKAN_REQUESTS_PER_SECOND:int = 3
+JIKAN_REQUESTS_PER_MINUTE:int = 60
+JIKAN_MAX_RETRIES:int = 5
+AF_RELEASES_STREAM:bool = True  # Stream the release pages and stop reading them once enough releases are found
+AF_STREAM_CHUNK_SIZE:int = 8 * 1024  # Bytes of a streamed page read and parsed at a time
+LINK_EXTRACTOR:str = "stream"  # Backend of client/link_extractors: "stream" or "bs4"
+PARSE_POOL_WORKERS = None  # Processes of the HTML parse pool used by the async scrapers, None uses all the cores
 HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+HTTP_POOL_HOSTS:int = 10  # Hosts with a keep-alive connection pool
+HTTP_POOL_PER_HOST:int = 16  # Maximum connections open to a single host
+SCHEDULER_ENABLED:bool = True  # Per-host adaptive concurrency and retries of client/request_scheduler
+SCHEDULER_INITIAL_LIMIT:int = 4
+SCHEDULER_MIN_LIMIT:int = 1
+SCHEDULER_MAX_LIMIT:int = HTTP_POOL_PER_HOST
+SCHEDULER_DECREASE_FACTOR:float = 0.5
+SCHEDULER_LATENCY_TOLERANCE:float = 3.0  # Responses this many times slower than the fastest one count as congestion
+SCHEDULER_MIN_SLOW_LATENCY:float = 0.5  # Responses faster than this are never congestion
+SCHEDULER_MAX_RETRIES:int = 4
+SCHEDULER_BACKOFF_BASE:float = 0.5
+SCHEDULER_BACKOFF_MAX:float = 60
+SCHEDULER_NO_RETRY_429_HOSTS:list = ["api.jikan.moe"]  # Hosts whose 429s go back to the caller (JikanClient has its own quota)
+HTTP_CACHE_ENABLED:bool = True
+HTTP_CACHE_DIR:str = "data/http_cache"
+HTTP_CACHE_MAX_BYTES:int = 256 * 1024 * 1024
+HTTP_CACHE_ACCESS_RESOLUTION:int = 60  # Seconds, a hit only writes the access time of an entry older than this (LRU precision)
+HTTP_CACHE_TTL_AF_EPISODES:int = 60 * 60  # Seconds before revalidating an episode or download page
+HTTP_CACHE_TTL_JIKAN_SEARCH:int = 24 * 60 * 60
+HTTP_CACHE_TTL_JIKAN_AIRING:int = 6 * 60 * 60
+HTTP_CACHE_TTL_JIKAN_FINISHED:int = 7 * 24 * 60 * 60
 
 # Database error codes
 BAD_ID = -1
@@ -19,7 +55,44 @@ UNDEFINED_ID = -4
 INSERT_FAILED = -5
 DATABASE_ERROR = -6
 BAD_INPUT = -7
+RATE_LIMITED = -8
 SQLITE_DATABASE_PATH:str = "data/animestele.db"
+# PRAGMAs applied when a connection is opened, in order. WAL lets the scraper write while the bot reads.
+SQLITE_PROFILES:dict = {
+    # Scraper: large cache and mmap, commits don't wait for fsync (WAL + NORMAL survives crashes of the process)
+    "ingest": {
+        "journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -64000, "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY", "busy_timeout": 5000, "foreign_keys": "ON",
+    },
+    # Telegram bot: mostly reads, waits longer for the scraper's write lock
+    "bot-serving": {
+        "journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -16000, "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY", "busy_timeout": 15000, "foreign_keys": "ON",
+    },
+    # Every commit is fsynced, for machines that may lose power
+    "safe": {
+        "journal_mode": "WAL", "synchronous": "FULL", "cache_size": -2000, "mmap_size": 0,
+        "temp_store": "DEFAULT", "busy_timeout": 5000, "foreign_keys": "ON",
+    },
+}
+SQLITE_PROFILE:str = "ingest"  # Profile used when none is given
+SQLITE_POOL_READERS:int = 4  # Read-only connections of the pooled manager
+RESOLUTION_TTL:int = 90 * 24 * 60 * 60  # Seconds a resolved title -> mal_id is trusted
+RESOLUTION_NEGATIVE_TTL:int = 24 * 60 * 60  # Seconds a title not found on Jikan is not searched again
+TITLE_MATCH_THRESHOLD:float = 0.75  # Lowest trigram similarity to resolve a title locally, without Jikan
+TITLE_MATCH_MARGIN:float = 0.1  # Lowest difference between the two best local matches, closer titles are ambiguous
+TITLE_MATCH_NUMBER_PENALTY:float = 0.7  # Multiplier of the similarity of titles with different numbers (sequels)
+JIKAN_SEARCH_CANDIDATES:int = 10  # Animes requested from the Jikan search to re-rank
+JIKAN_SEASON_MAX_PAGES:int = 20  # Pages of 25 animes read from the seasonal listing
+ANIME_METADATA_TTL:int = 6 * 60 * 60  # Seconds the prefetched Jikan metadata of an anime is used
+SEASON_PREFETCH_MAL_ID:int = 0  # anime_metadata row recording the last season prefetch, MAL IDs start at 1
+BACKFILL_MAX_AGE:int = 24 * 60 * 60  # Seconds after the newest episode of an airing anime before it is backfilled again
+BACKFILL_BATCH:int = 100  # Animes backfilled in a single run
+LINK_CHECK_INTERVAL:int = 6 * 60 * 60  # Seconds before a download link is checked again
+LINK_CHECK_BATCH:int = 500  # Links checked in each round of the link checker
+LINK_CHECK_CONCURRENCY:int = 32  # Links checked at the same time
+LINK_CHECK_TIMEOUT:float = 15
+LINK_CHECK_POLL_INTERVAL:int = 10 * 60  # Seconds the link checker sleeps when every link is up to date
 
 # Telegram
 TELEGRAM_NAME:str = 'telegram'
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules import each other relative to src/, like when main.py is run from it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
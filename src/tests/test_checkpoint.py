@@ -0,0 +1,74 @@
+import json
+import pytest
+from benchmarks.fake_animefire_server import FakeCatalog, start_fake_server, point_values_at
+from client import data_colect, http_session
+from shared_components import values
+from shared_components.checkpoint import CrawlCheckpoint
+
+
+def test_journal_is_reloaded_and_a_cut_line_ignored(tmp_path):
+    path = str(tmp_path / 'crawl_checkpoint.jsonl')
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.add_release_page(1, [('Show A', 'url-a'), ('Show B', 'url-b')])
+    checkpoint.finish_releases([('Show A', 'url-a'), ('Show B', 'url-b')])
+    checkpoint.set_mal_id('url-a', 1)
+    checkpoint.add_episode('url-a', {'episode_number': 1})
+    checkpoint.set_metadata('url-a', {'mal_id': 1})
+    checkpoint.finish_anime('url-a')
+    checkpoint.set_mal_id('url-b', 2)
+    checkpoint.add_episode('url-b', {'episode_number': 1})
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write(json.dumps({'event': 'episode', 'url': 'url-b', 'episode': {'episode_number': 2}})[:20])
+
+    resumed = CrawlCheckpoint(path)
+
+    assert resumed.page == 1 and resumed.releases_done
+    assert resumed.releases == [['Show A', 'url-a'], ['Show B', 'url-b']]
+    assert resumed.is_anime_done('url-a') and resumed.get_anime('url-a') is None
+    assert resumed.get_anime('url-b') == {'mal_id': 2, 'episodes': [{'episode_number': 1}], 'metadata': None}
+
+    resumed.reset()
+    assert CrawlCheckpoint(path).releases == []
+
+
+@pytest.fixture
+def fake_releases(monkeypatch):
+    '''
+    Three fake shows with episodes 1 to 3.
+    '''
+    for name in ('URL_AF_RELEASES', 'URL_AF_DOWNLOADS', 'URL_AF_FILTER_RELEAES', 'URL_JIKAN_SEARCH', 'URL_JIKAN_SEARCH_BY_MALID',
+                 'URL_JIKAN_SEASON_NOW', 'URLS_AF_FILTER_DOWNLOADS_LINKS', 'SCHEDULER_NO_RETRY_429_HOSTS'):
+        monkeypatch.setattr(values, name, getattr(values, name))  # Restored after the test
+    catalog = FakeCatalog(shows=3, episodes=3, missing_episode_zero_rate=1.0, temp_rate=0.0)
+    server, base_url = start_fake_server(catalog)
+    point_values_at(base_url)
+    yield catalog
+    server.shutdown()
+
+
+def test_resumed_crawl_skips_what_was_done(fake_releases, tmp_path, monkeypatch):
+    monkeypatch.setattr(values, 'AF_EPISODES_MAX_IN_FLIGHT', 1)  # One request per episode probed
+    path = str(tmp_path / 'crawl_checkpoint.jsonl')
+    resolved = []
+
+    def crawl():
+        return data_colect.iter_releasing_animes_from_af(
+            extract_amount=3, session=http_session.create_session(), checkpoint=CrawlCheckpoint(path),
+            resolve_mal_id=lambda title, af_url: resolved.append(title) or int(title.rsplit(' ', 1)[1]) + 1,
+            get_anime_metadata=lambda mal_id: {'mal_id': mal_id}
+        )
+
+    first_run = crawl()
+    next(first_run)
+    next(first_run)  # Show 0 is finished when the second anime is asked for
+    first_run.close()  # The crawl dies while show 1 is being stored
+    requests_before = dict(fake_releases.request_counts)
+
+    resumed = list(crawl())
+
+    assert [metadata['mal_id'] for metadata, _ in resumed] == [2, 3]
+    assert [[episode['episode_number'] for episode in episodes] for _, episodes in resumed] == [[1, 2, 3], [1, 2, 3]]
+    assert resolved == ['Fake Show 0', 'Fake Show 1', 'Fake Show 2']
+    assert fake_releases.request_counts['releases'] == requests_before['releases']
+    # Show 1 only probes past its last saved episode (4), show 2 probes episodes 0 to 4
+    assert fake_releases.request_counts['animes'] - requests_before['animes'] == 1 + 5
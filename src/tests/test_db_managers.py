@@ -0,0 +1,93 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from client import data_colect
+from interface.db_factory_and_manager import AsyncSQLiteDatabaseManager, AsyncTableFactory, SQLitePooledDatabaseManager, TableFactory
+from interface.db_interface import AsyncDatabaseManagerInterface, DatabaseManagerInterface
+from shared_components.db_structs import Anime
+
+MAL_ID = 1
+
+
+def _anime(mal_id=MAL_ID):
+    return Anime.from_dict(data_colect._anime_dict_from_jikan(mal_id, {
+        'mal_id': mal_id, 'title': f'Fake Show {mal_id - 1}', 'aired': {}, 'studios': [], 'producers': [], 'year': 2024
+    }))
+
+
+def test_async_manager_runs_in_its_own_thread(tmp_path):
+    async def scenario():
+        db_manager = AsyncSQLiteDatabaseManager(str(tmp_path / 'animestele.db'))
+        await db_manager.create_tables()
+        db_thread = await db_manager.run(threading.get_ident)
+
+        anime_id, inserted = await AsyncTableFactory(db_manager).get_animes().upsert(_anime())
+        anime = await AsyncTableFactory(db_manager).get_animes().get_by_mal_id(MAL_ID)
+        count = await db_manager.fetch_value('SELECT COUNT(*) FROM animes')
+        await db_manager.close()
+        return db_thread, anime_id, inserted, anime, count
+
+    db_thread, anime_id, inserted, anime, count = asyncio.run(scenario())
+
+    assert db_thread != threading.get_ident()
+    assert anime_id > 0 and inserted
+    assert anime.title == 'Fake Show 0'
+    assert count == 1
+
+
+def test_async_manager_is_not_a_sync_manager(tmp_path):
+    db_manager = AsyncSQLiteDatabaseManager(str(tmp_path / 'animestele.db'))
+
+    assert isinstance(db_manager, AsyncDatabaseManagerInterface)
+    assert not isinstance(db_manager, DatabaseManagerInterface)
+    assert isinstance(db_manager.manager, DatabaseManagerInterface)
+    asyncio.run(db_manager.close())
+
+
+@pytest.fixture
+def pooled_manager(tmp_path):
+    db_manager = SQLitePooledDatabaseManager(str(tmp_path / 'animestele.db'), readers=2)
+    db_manager.create_tables()
+    yield db_manager
+    db_manager.close()
+
+
+def test_pooled_manager_takes_concurrent_workers(pooled_manager):
+    def store_and_read(mal_id):
+        animes = TableFactory(pooled_manager).get_animes()
+        anime_id, inserted = animes.upsert(_anime(mal_id))
+        return inserted and animes.get_by_mal_id(mal_id).anime_id == anime_id
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(store_and_read, range(1, 65)))
+
+    assert all(results)
+    assert pooled_manager.fetch_value('SELECT COUNT(*) FROM animes') == 64
+
+
+def test_pooled_readers_are_read_only_and_see_the_writes(pooled_manager):
+    pooled_manager.execute_non_query('CREATE TABLE IF NOT EXISTS probe (value INTEGER)')
+    pooled_manager.execute_non_query('INSERT INTO probe (value) VALUES (1)')
+
+    with pooled_manager.reader() as reader:
+        assert reader.fetch_value('SELECT value FROM probe') == 1
+        assert reader.fetch_value('PRAGMA journal_mode') == 'wal'
+        with pytest.raises(sqlite3.OperationalError):
+            reader.get_conn().execute('INSERT INTO probe (value) VALUES (2)')
+
+
+def test_pooled_reads_wait_for_a_free_reader(pooled_manager):
+    finished = threading.Event()
+
+    def read():
+        pooled_manager.fetch_value('SELECT 1')
+        finished.set()
+
+    with pooled_manager.reader(), pooled_manager.reader():
+        threading.Thread(target=read, daemon=True).start()
+        time.sleep(0.1)
+        assert not finished.is_set()
+    assert finished.wait(5)
@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from benchmarks.fake_animefire_server import FakeCatalog, start_fake_server, point_values_at
+from client import data_colect, http_session
+from interface import db_acess
+from interface.db_factory_and_manager import SQLiteDatabaseManager, TableFactory
+from shared_components import values
+from shared_components.db_structs import Anime, MalIdResolution
+
+MAL_ID = 1
+
+
+@pytest.fixture
+def fake_anime(monkeypatch):
+    '''
+    A fake show with episodes 1 to 5 whose episode 3 has no download page.
+    '''
+    for name in ('URL_AF_RELEASES', 'URL_AF_DOWNLOADS', 'URL_AF_FILTER_RELEAES', 'URL_JIKAN_SEARCH', 'URL_JIKAN_SEARCH_BY_MALID',
+                 'URL_JIKAN_SEASON_NOW', 'URLS_AF_FILTER_DOWNLOADS_LINKS', 'SCHEDULER_NO_RETRY_429_HOSTS'):
+        monkeypatch.setattr(values, name, getattr(values, name))  # Restored after the test
+    catalog = FakeCatalog(shows=1, episodes=5, missing_episode_zero_rate=1.0, temp_rate=0.0)
+    catalog.show_data[0]['missing_downloads'] = {3}
+    server, base_url = start_fake_server(catalog)
+    point_values_at(base_url)
+    yield f'{base_url}/animes/fake-show-0-todos-os-episodios'
+    server.shutdown()
+
+
+def test_episodes_without_download_links_are_skipped(fake_anime):
+    recorded = []
+    episodes = data_colect.get_episodes_links_from_af(fake_anime, MAL_ID, session=http_session.create_session(), on_episode=recorded.append)
+
+    assert [episode['episode_number'] for episode in episodes] == [1, 2, 4, 5]
+    assert all(episode['download_link_hd'] and episode['download_link_sd'] for episode in episodes)
+    assert recorded == episodes
+
+
+def test_async_episodes_without_download_links_are_skipped(fake_anime):
+    episodes = asyncio.run(data_colect.get_episodes_links_from_af_async(fake_anime, MAL_ID))
+
+    assert [episode['episode_number'] for episode in episodes] == [1, 2, 4, 5]
+
+
+def test_episodes_without_download_links_are_not_inserted(fake_anime, tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / 'animestele.db'))
+    db_manager.create_tables()
+    anime_metadata = data_colect._anime_dict_from_jikan(MAL_ID, {
+        'mal_id': MAL_ID, 'title': 'Fake Show 0', 'aired': {}, 'studios': [], 'producers': [], 'year': 2024
+    })
+    episodes_links = data_colect.get_episodes_links_from_af(fake_anime, MAL_ID, session=http_session.create_session())
+
+    _, episodes = db_acess._insert_anime_unit_into_database(db_manager, anime_metadata, episodes_links)
+
+    assert [episode.episode_number for episode in episodes] == [1, 2, 4, 5]
+    assert all(episode.episode_id > 0 for episode in episodes)
+    assert TableFactory(db_manager).get_episodes().get_last_episode_number(MAL_ID) == 5
+    db_manager.close()
+
+
+def test_gallop_records_episodes_in_order(fake_anime):
+    recorded = []
+    episodes = data_colect.get_episodes_links_from_af(
+        fake_anime, MAL_ID, gallop=True, session=http_session.create_session(), on_episode=recorded.append
+    )
+
+    assert [episode['episode_number'] for episode in episodes] == [1, 2, 4, 5]
+    assert [episode['episode_number'] for episode in recorded] == [1, 2, 4, 5]
+
+
+def test_backfill_inserts_the_missing_episodes(fake_anime, tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / 'animestele.db'))
+    db_manager.create_tables()
+    table = TableFactory(db_manager)
+    anime = Anime.from_dict(data_colect._anime_dict_from_jikan(MAL_ID, {
+        'mal_id': MAL_ID, 'title': 'Fake Show 0', 'aired': {}, 'studios': [], 'producers': [], 'year': 2024, 'airing': True
+    }))
+    table.get_animes().upsert(anime)
+    table.get_resolutions().insert_data(MalIdResolution('fake-show-0', 'Fake Show 0', MAL_ID, 1.0))
+
+    assert db_acess.backfill_episodes_into_database(db_manager) == (1, 4)
+    assert TableFactory(db_manager).get_episodes().get_last_episode_number(MAL_ID) == 5
+    # Up to date until max_age passes
+    assert db_acess.backfill_episodes_into_database(db_manager) == (0, 0)
+    db_manager.close()
+
+
+def _fetch_failing_at(failing_episode, last_episode=5):
+    def fetch_episode(i):
+        if i == failing_episode:
+            raise ConnectionError('connection reset')
+        return {'episode_number': i} if 1 <= i <= last_episode else None
+    return fetch_episode
+
+
+def test_probe_keeps_the_episodes_before_an_error():
+    recorded = []
+    episodes = data_colect._probe_episodes(_fetch_failing_at(3), on_episode=recorded.append)
+
+    assert [episode['episode_number'] for episode in episodes] == [1, 2]
+    assert recorded == episodes
+
+
+def test_async_probe_keeps_the_episodes_before_an_error():
+    fetch_episode = _fetch_failing_at(3)
+
+    async def fetch_episode_async(i):
+        return fetch_episode(i)
+
+    episodes = asyncio.run(data_colect._probe_episodes_async(fetch_episode_async, max_in_flight=4))
+
+    assert [episode['episode_number'] for episode in episodes] == [1, 2]
+
+
+def test_probe_skips_an_error_on_episode_zero():
+    episodes = data_colect._probe_episodes(_fetch_failing_at(0))
+
+    assert [episode['episode_number'] for episode in episodes] == [1, 2, 3, 4, 5]
+
+
+def test_gallop_probe_keeps_the_episodes_before_an_error():
+    recorded = []
+    episodes = data_colect._probe_episodes_gallop(_fetch_failing_at(4, last_episode=9), on_episode=recorded.append)
+
+    assert [episode['episode_number'] for episode in episodes] == [1, 2, 3]
+    assert recorded == episodes
+
+
+def test_gallop_probe_skips_an_error_on_episode_zero():
+    episodes = data_colect._probe_episodes_gallop(_fetch_failing_at(0))
+
+    assert [episode['episode_number'] for episode in episodes] == [1, 2, 3, 4, 5]
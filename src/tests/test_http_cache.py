@@ -0,0 +1,121 @@
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from client import data_colect, http_cache, http_session
+from shared_components import values
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    '''
+    Serves /page/<n> with an ETag, answering 304 when If-None-Match matches.
+    '''
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('If-None-Match')))
+        etag = f'"{self.path}-{self.server.version}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = f'<a href="{self.path}/1">{self.server.version}</a>'.encode() + b' ' * 100
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+    server.requests = []
+    server.version = 1
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+
+def _cache(tmp_path, ttl=0, max_bytes=values.HTTP_CACHE_MAX_BYTES):
+    return http_cache.HttpCache(cache_dir=str(tmp_path), max_bytes=max_bytes, ttl_rules=[(r'/page/', ttl)])
+
+
+def test_stale_entry_is_revalidated_and_reused_on_304(server, tmp_path):
+    fake_server, base_url = server
+    cache = _cache(tmp_path)
+    session = http_session.create_session(cache=cache)
+
+    first = session.get(f'{base_url}/page/1')
+    second = session.get(f'{base_url}/page/1')
+
+    assert not first.from_cache and second.from_cache
+    assert second.content == first.content
+    assert fake_server.requests == [('/page/1', None), ('/page/1', '"/page/1-1"')]
+
+    fake_server.version = 2  # A changed page is downloaded again
+    third = session.get(f'{base_url}/page/1')
+    assert not third.from_cache and b'>2<' in third.content
+    cache.close()
+
+
+def test_fresh_entry_is_served_without_a_request(server, tmp_path):
+    fake_server, base_url = server
+    cache = _cache(tmp_path, ttl=60)
+    session = http_session.create_session(cache=cache)
+
+    session.get(f'{base_url}/page/1')
+    response = session.get(f'{base_url}/page/1')
+
+    assert response.from_cache
+    assert len(fake_server.requests) == 1
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(server, tmp_path, monkeypatch):
+    _, base_url = server
+    monkeypatch.setattr(values, 'HTTP_CACHE_ACCESS_RESOLUTION', 0)
+    cache = _cache(tmp_path, ttl=60, max_bytes=300)  # Room for two pages
+    session = http_session.create_session(cache=cache)
+
+    session.get(f'{base_url}/page/1')
+    session.get(f'{base_url}/page/2')
+    session.get(f'{base_url}/page/1')  # Page 2 becomes the least recently used
+    session.get(f'{base_url}/page/3')
+
+    assert cache.get(f'{base_url}/page/1') is not None
+    assert cache.get(f'{base_url}/page/2') is None
+    assert cache.get(f'{base_url}/page/3') is not None
+    cache.close()
+
+
+def test_hits_only_write_the_access_time_after_the_resolution(server, tmp_path):
+    _, base_url = server
+    cache = _cache(tmp_path, ttl=60)
+    url = f'{base_url}/page/1'
+    http_session.create_session(cache=cache).get(url)
+
+    def accessed_at():
+        return cache.conn.execute('SELECT accessed_at FROM entries WHERE url = ?', (url,)).fetchone()[0]
+
+    stored_at = accessed_at()
+    cache.get(url)
+    assert accessed_at() == stored_at
+
+    cache.conn.execute('UPDATE entries SET accessed_at = ? WHERE url = ?', (stored_at - values.HTTP_CACHE_ACCESS_RESOLUTION, url))
+    cache.get(url)
+    assert accessed_at() > stored_at - values.HTTP_CACHE_ACCESS_RESOLUTION
+    cache.close()
+
+
+def test_anchors_are_memoized_for_stored_pages_only(server, tmp_path):
+    _, base_url = server
+    cache = _cache(tmp_path, ttl=60)
+    session = http_session.create_session(cache=cache)
+
+    anchors = data_colect._get_anchors(session.get(f'{base_url}/page/1'))
+    data_colect._get_anchors(session.get(f'{base_url}/other/1'))
+
+    assert cache.get_anchors(f'{base_url}/page/1') == anchors == [('/page/1/1', '1')]
+    assert cache.get_anchors(f'{base_url}/other/1') is None
+    cache.close()
@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from client import http_cache, http_session, request_scheduler
+from shared_components import values
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    '''
+    Answers every GET, recording the client port of the connection it came from.
+    '''
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.client_ports.add(self.client_address[1])
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    server.daemon_threads = True
+    server.client_ports = set()
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+
+def test_requests_reuse_the_connection(server):
+    fake_server, base_url = server
+    session = http_session.create_session()
+
+    for i in range(10):
+        assert session.get(f'{base_url}/{i}').text == 'ok'
+
+    assert len(fake_server.client_ports) == 1
+
+
+def test_connections_to_a_host_are_capped(server):
+    fake_server, base_url = server
+    session = http_session.create_session(pool_per_host=2)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(lambda i: session.get(f'{base_url}/{i}'), range(40)))
+
+    assert all(response.status_code == 200 for response in responses)
+    assert len(fake_server.client_ports) <= 2
+
+
+def test_session_adapters(tmp_path):
+    cache = http_cache.HttpCache(cache_dir=str(tmp_path))
+    scheduler = request_scheduler.RequestScheduler()
+
+    assert isinstance(http_session.create_session(cache=cache, scheduler=scheduler).get_adapter('https://'), http_session.ScheduledCachingAdapter)
+    assert type(http_session.create_session(cache=cache).get_adapter('https://')) is http_cache.CachingAdapter
+    assert type(http_session.create_session(scheduler=scheduler).get_adapter('https://')) is request_scheduler.ScheduledAdapter
+    cache.close()
+
+
+def test_default_session_is_shared(monkeypatch):
+    monkeypatch.setattr(http_session, '_default_session', None)
+    monkeypatch.setattr(values, 'HTTP_CACHE_ENABLED', False)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        sessions = list(executor.map(lambda _: http_session.get_default_session(), range(8)))
+
+    assert all(session is sessions[0] for session in sessions)
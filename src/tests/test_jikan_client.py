@@ -0,0 +1,96 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from benchmarks.fake_animefire_server import FakeCatalog, start_fake_server
+from client import http_session, jikan_client
+
+
+class SlowJsonSession:
+    '''
+    Session whose GETs block until released, so concurrent calls overlap.
+    '''
+    def __init__(self):
+        self.urls = []
+        self.release = threading.Event()
+
+    def get(self, url):
+        self.urls.append(url)
+        self.release.wait(5)
+        return SlowJsonSession.Response(url)
+
+    class Response:
+        status_code = 200
+        headers = {}
+
+        def __init__(self, url):
+            self.url = url
+
+        def json(self):
+            return {'data': {'url': self.url}}
+
+
+def test_token_bucket_allows_a_burst_then_waits():
+    bucket = jikan_client.TokenBucket(rate=20, capacity=2)
+
+    start = time.monotonic()
+    bucket.acquire()
+    bucket.acquire()
+    burst = time.monotonic() - start
+    bucket.acquire()
+    waited = time.monotonic() - start - burst
+
+    assert burst < 0.03
+    assert 0.03 < waited < 0.2  # One token every 50 ms
+
+
+def test_drained_bucket_waits_for_a_token():
+    bucket = jikan_client.TokenBucket(rate=20, capacity=5)
+    bucket.drain()
+
+    start = time.monotonic()
+    bucket.acquire()
+
+    assert time.monotonic() - start > 0.03
+
+
+def test_concurrent_requests_for_a_url_are_coalesced():
+    session = SlowJsonSession()
+    client = jikan_client.JikanClient(session=session, per_second=100, per_minute=6000)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(client.get_json, 'https://api.jikan.moe/v4/anime/1') for _ in range(4)]
+        futures.append(executor.submit(client.get_json, 'https://api.jikan.moe/v4/anime/2'))
+        while len(session.urls) < 2:
+            time.sleep(0.01)
+        time.sleep(0.1)  # The other callers of the first URL reach get_json
+        session.release.set()
+        results = [future.result() for future in futures]
+
+    assert sorted(session.urls) == ['https://api.jikan.moe/v4/anime/1', 'https://api.jikan.moe/v4/anime/2']
+    assert all(result == {'data': {'url': 'https://api.jikan.moe/v4/anime/1'}} for result in results[:4])
+    assert client.in_flight == {}
+
+
+def test_429_blocks_the_client_and_gives_up_after_max_retries():
+    catalog = FakeCatalog(shows=1, jikan_429_rate=1.0, retry_after=0)
+    server, base_url = start_fake_server(catalog)
+    client = jikan_client.JikanClient(session=http_session.create_session(), per_second=100, per_minute=6000, max_retries=2)
+
+    with pytest.raises(jikan_client.JikanRateLimitError):
+        client.get_json(f'{base_url}/v4/anime/1')
+    server.shutdown()
+
+    assert catalog.request_counts['jikan'] == 3
+    assert client.blocked_until > 0
+
+
+def test_successful_request_returns_the_json():
+    catalog = FakeCatalog(shows=1)
+    server, base_url = start_fake_server(catalog)
+    client = jikan_client.JikanClient(session=http_session.create_session(), per_second=100, per_minute=6000)
+
+    data = client.get_json(f'{base_url}/v4/anime/1')
+    server.shutdown()
+
+    assert data['data']['mal_id'] == 1
@@ -0,0 +1,79 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from benchmarks.fake_animefire_server import FakeCatalog, start_fake_server, point_values_at
+from client import data_colect, http_session, link_extractors
+from shared_components import values
+
+PAGE = '<html><body>' + ''.join(
+    f'<div class="card"><a href="/animes/episodio-{i}">Episódio {i} – Açúcar <b>novo</b></a></div>' for i in range(500)
+) + '</body></html>'
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = PAGE.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def page_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+
+
+@pytest.mark.parametrize('backend', list(link_extractors.EXTRACTORS))
+def test_backends_agree(backend):
+    anchors = link_extractors.extract_anchors(PAGE, backend=backend)
+
+    assert len(anchors) == 500
+    assert anchors[1] == ('/animes/episodio-1', 'Episódio 1 – Açúcar novo')
+
+
+def test_streamed_page_matches_the_whole_page(page_url):
+    # Small chunks split the multi-byte characters and the tags between reads
+    anchors = link_extractors.extract_anchors_from_stream(requests.get(page_url, stream=True), chunk_size=7)
+
+    assert anchors == link_extractors.extract_anchors(PAGE)
+
+
+def test_stream_stops_once_enough_anchors_are_read(page_url):
+    response = requests.get(page_url, stream=True)
+    anchors = link_extractors.extract_anchors_from_stream(response, stop=lambda anchors: len(anchors) >= 10, chunk_size=512)
+
+    assert 10 <= len(anchors) < 500
+    assert anchors == link_extractors.extract_anchors(PAGE)[:len(anchors)]  # Only anchors read until </a>
+    assert response.raw.closed
+
+
+@pytest.fixture
+def fake_releases(monkeypatch):
+    for name in ('URL_AF_RELEASES', 'URL_AF_DOWNLOADS', 'URL_AF_FILTER_RELEAES', 'URL_JIKAN_SEARCH', 'URL_JIKAN_SEARCH_BY_MALID',
+                 'URL_JIKAN_SEASON_NOW', 'URLS_AF_FILTER_DOWNLOADS_LINKS', 'SCHEDULER_NO_RETRY_429_HOSTS'):
+        monkeypatch.setattr(values, name, getattr(values, name))  # Restored after the test
+    server, base_url = start_fake_server(FakeCatalog(shows=60, releases_per_page=30))
+    point_values_at(base_url)
+    yield
+    server.shutdown()
+
+
+@pytest.mark.parametrize('extract_amount', [5, 45])
+def test_streamed_release_pages_match_the_whole_pages(fake_releases, extract_amount):
+    session = http_session.create_session()
+
+    streamed = data_colect.get_title_and_hyperlinks_from_af(extract_amount=extract_amount, session=session, stream=True)
+    whole = data_colect.get_title_and_hyperlinks_from_af(extract_amount=extract_amount, session=session, stream=False)
+
+    assert streamed == whole
+    assert len(streamed) == extract_amount
@@ -0,0 +1,47 @@
+import json
+import pytest
+from benchmarks.fake_animefire_server import FakeCatalog, start_fake_server, point_values_at
+from client import data_colect, http_session
+from shared_components import values
+
+
+@pytest.fixture
+def releases(monkeypatch):
+    '''
+    Fake release pages listing shows 0 to 9, newest first, 4 releases per page.
+    '''
+    for name in ('URL_AF_RELEASES', 'URL_AF_DOWNLOADS', 'URL_AF_FILTER_RELEAES', 'URL_JIKAN_SEARCH', 'URL_JIKAN_SEARCH_BY_MALID',
+                 'URL_JIKAN_SEASON_NOW', 'URLS_AF_FILTER_DOWNLOADS_LINKS', 'SCHEDULER_NO_RETRY_429_HOSTS', 'HTTP_CACHE_ENABLED'):
+        monkeypatch.setattr(values, name, getattr(values, name))  # Restored after the test
+    values.HTTP_CACHE_ENABLED = False
+    catalog = FakeCatalog(shows=10, episodes=1, releases_per_page=4)
+    server, base_url = start_fake_server(catalog)
+    point_values_at(base_url)
+    yield base_url
+    server.shutdown()
+
+
+def _slugs(results):
+    return [href.rsplit('/', 1)[-1].removesuffix('-todos-os-episodios') for _, href in results]
+
+
+def _crawl(hwm_path, extract_amount=3):
+    return data_colect.get_title_and_hyperlinks_from_af(
+        extract_amount=extract_amount, session=http_session.create_session(), incremental=True,
+        high_water_mark=data_colect.ReleasesHighWaterMark(str(hwm_path)), stream=False
+    )
+
+
+def test_oldest_new_releases_are_returned_before_the_mark(releases, tmp_path):
+    hwm_path = tmp_path / 'releases_hwm.json'
+    mark = [(f'Fake Show {i}', f'{releases}/animes/fake-show-{i}-todos-os-episodios') for i in (6, 7, 8)]
+    hwm_path.write_text(json.dumps(mark))
+
+    assert _slugs(_crawl(hwm_path)) == ['fake-show-3', 'fake-show-4', 'fake-show-5']
+
+
+def test_newest_releases_are_returned_when_the_mark_is_not_found(releases, tmp_path):
+    hwm_path = tmp_path / 'releases_hwm.json'
+    hwm_path.write_text(json.dumps([('Gone', f'{releases}/animes/gone-todos-os-episodios')] * 3))
+
+    assert _slugs(_crawl(hwm_path)) == ['fake-show-0', 'fake-show-1', 'fake-show-2']
@@ -0,0 +1,81 @@
+from client import request_scheduler
+from shared_components import values
+
+
+def _limiter(initial_limit=4):
+    return request_scheduler.HostLimiter(
+        initial_limit, min_limit=1, max_limit=8, decrease_factor=0.5, latency_tolerance=3.0
+    )
+
+
+def _release(limiter, status_code, latency=0.01):
+    limiter.acquire()
+    limiter.release(status_code, latency)
+
+
+def test_successes_grow_the_limit_additively():
+    limiter = _limiter()
+    for _ in range(4):
+        _release(limiter, 200)
+
+    assert 4.9 < limiter.limit < 5.0  # About one request more per window of 4
+
+
+def test_overload_cuts_the_limit_once_per_round_trip():
+    limiter = _limiter()
+    _release(limiter, 200, latency=0.4)  # The round trip the cuts are spread over
+    limit = limiter.limit
+
+    _release(limiter, 429)
+    _release(limiter, 503)  # Same round trip as the 429, not cut again
+
+    assert limiter.limit == limit * 0.5
+
+
+def test_limit_stays_between_min_and_max():
+    limiter = _limiter()
+    for _ in range(200):
+        _release(limiter, 200)
+    assert limiter.limit == 8
+
+    for _ in range(10):
+        limiter.last_decrease = 0.0
+        _release(limiter, None)
+    assert limiter.limit == 1
+
+
+def test_slow_responses_count_as_congestion():
+    limiter = _limiter()
+    _release(limiter, 200, latency=0.2)
+    limit = limiter.limit
+
+    _release(limiter, 200, latency=values.SCHEDULER_MIN_SLOW_LATENCY + 1)
+
+    assert limiter.limit < limit
+
+
+def test_try_acquire_respects_the_limit():
+    limiter = _limiter(initial_limit=2)
+
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release(200, 0.01)
+    assert limiter.try_acquire()
+
+
+def test_no_retry_429_hosts_are_read_at_each_request(monkeypatch):
+    scheduler = request_scheduler.RequestScheduler(max_retries=2)
+    monkeypatch.setattr(values, 'SCHEDULER_NO_RETRY_429_HOSTS', ['api.jikan.moe'])
+    assert scheduler.should_retry(429, 0, 'http://127.0.0.1:8080/v4/anime/1')
+
+    monkeypatch.setattr(values, 'SCHEDULER_NO_RETRY_429_HOSTS', ['127.0.0.1:8080'])
+    assert not scheduler.should_retry(429, 0, 'http://127.0.0.1:8080/v4/anime/1')
+    assert scheduler.should_retry(503, 0, 'http://127.0.0.1:8080/v4/anime/1')
+    assert not scheduler.should_retry(503, 2, 'http://127.0.0.1:8080/v4/anime/1')
+
+
+def test_explicit_no_retry_429_hosts_ignore_values(monkeypatch):
+    scheduler = request_scheduler.RequestScheduler(no_retry_429_hosts=[])
+    monkeypatch.setattr(values, 'SCHEDULER_NO_RETRY_429_HOSTS', ['127.0.0.1:8080'])
+
+    assert scheduler.should_retry(429, 0, 'http://127.0.0.1:8080/v4/anime/1')
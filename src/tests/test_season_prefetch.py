@@ -0,0 +1,35 @@
+from client import data_colect
+from interface import db_acess
+from interface.db_factory_and_manager import SQLiteDatabaseManager
+
+
+def _season_animes():
+    return [
+        data_colect._anime_dict_from_jikan(mal_id, {
+            'mal_id': mal_id, 'title': title, 'aired': {}, 'studios': [], 'producers': [], 'year': 2024
+        })
+        for mal_id, title in ((1, 'Sousou no Frieren'), (2, 'Kusuriya no Hitorigoto'))
+    ]
+
+
+def test_fresh_season_prefetch_is_not_repeated_by_a_new_process(monkeypatch, tmp_path):
+    requests = []
+    monkeypatch.setattr(data_colect, 'get_season_animes_from_jikan_v4', lambda print_log=False: requests.append(1) or _season_animes())
+    db_path = str(tmp_path / 'animestele.db')
+    db_manager = SQLiteDatabaseManager(db_path)
+    db_manager.create_tables()
+
+    assert db_acess.prefetch_season_metadata(db_manager) == 2
+    assert db_acess.prefetch_season_metadata(db_manager) == 0
+    db_manager.close()
+
+    # A new manager has no state in memory, like a new process
+    db_manager = SQLiteDatabaseManager(db_path)
+    assert db_acess.prefetch_season_metadata(db_manager) == 0
+    assert len(requests) == 1
+    assert db_acess.get_title_matcher(db_manager).resolve('Kusuriya no Hitorigoto')[0] == 2
+
+    # An expired prefetch is repeated
+    assert db_acess.prefetch_season_metadata(db_manager, max_age=0) == 2
+    assert len(requests) == 2
+    db_manager.close()
@@ -0,0 +1,58 @@
+import pytest
+from client import title_matcher
+
+
+@pytest.fixture
+def matcher():
+    matcher = title_matcher.TitleMatcher()
+    matcher.add(52991, 'Sousou no Frieren', "Frieren: Beyond Journey's End")
+    matcher.add(16498, 'Shingeki no Kyojin', 'Attack on Titan')
+    matcher.add(25777, 'Shingeki no Kyojin Season 2', 'Attack on Titan Season 2')
+    return matcher
+
+
+def test_normalize_title_drops_tags_accents_and_ordinals():
+    assert title_matcher.normalize_title('Sousou no Frieren (Dublado)') == 'sousou no frieren'
+    assert title_matcher.normalize_title('Kimetsu no Yaiba: Katanakaji no Sato-hen') == 'kimetsu no yaiba katanakaji no sato hen'
+    assert title_matcher.normalize_title('Ão Ashi 2nd Season') == 'ao ashi 2 season'
+    assert title_matcher.normalize_title('Overlord II') == 'overlord 2'
+
+
+def test_exact_title_resolves(matcher):
+    assert matcher.resolve('Sousou no Frieren - Todos os Episodios') == (52991, 1.0)
+    assert matcher.resolve("Frieren Beyond Journey's End")[0] == 52991
+
+
+def test_sequel_is_not_matched_to_the_first_season(matcher):
+    assert matcher.resolve('Shingeki no Kyojin Season 2')[0] == 25777
+    assert matcher.resolve('Shingeki no Kyojin 2nd Season')[0] == 25777
+    assert matcher.resolve('Shingeki no Kyojin')[0] == 16498
+
+
+def test_title_below_the_threshold_is_not_resolved(matcher):
+    assert matcher.resolve('Sousou no Frieren', threshold=1.01) is None
+    assert matcher.resolve('Boku no Hero Academia') is None
+
+
+def test_ambiguous_title_is_not_resolved():
+    matcher = title_matcher.TitleMatcher()
+    matcher.add(1, 'Fake Show Alpha')
+    matcher.add(2, 'Fake Show Alphas')
+    best, second = matcher.match('Fake Show Alpha', limit=2)
+
+    assert best[0] == 1
+    assert matcher.resolve('Fake Show Alpha', threshold=0.5, margin=best[1] - second[1] + 0.01) is None
+    assert matcher.resolve('Fake Show Alpha', threshold=0.5, margin=best[1] - second[1] - 0.01) == best
+
+
+def test_rank_candidates_reorders_the_jikan_results():
+    candidates = [
+        {'mal_id': 25777, 'title': 'Shingeki no Kyojin Season 2'},
+        {'mal_id': 16498, 'title': 'Shingeki no Kyojin', 'title_english': 'Attack on Titan'},
+        {'mal_id': 1, 'title': 'Unrelated'},
+    ]
+
+    ranked = title_matcher.rank_candidates('Attack on Titan', candidates)
+
+    assert [mal_id for mal_id, _ in ranked] == [16498, 25777, 1]
+    assert ranked[-1][1] == 0.0
@@ -0,0 +1,80 @@
+import pytest
+from client import data_colect
+from interface.db_factory_and_manager import SQLiteDatabaseManager, TableFactory
+from shared_components import values
+from shared_components.db_structs import Anime, Episode
+
+
+def _anime(mal_id, title, airing=True):
+    return Anime.from_dict(data_colect._anime_dict_from_jikan(mal_id, {
+        'mal_id': mal_id, 'title': title, 'aired': {}, 'studios': [], 'producers': [], 'year': 2024, 'airing': airing
+    }))
+
+
+def _episode(anime_id, mal_id, number, link_suffix=''):
+    base = f'https://animefire.plus/animes/fake-{mal_id}/{number}'
+    return Episode(anime_id, mal_id, number, base + link_suffix, base + '/hd' + link_suffix, base + '/sd' + link_suffix, 0)
+
+
+@pytest.fixture
+def table(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / 'animestele.db'))
+    db_manager.create_tables()
+    yield TableFactory(db_manager)
+    db_manager.close()
+
+
+def test_anime_upsert_inserts_then_updates(table):
+    animes = table.get_animes()
+
+    anime_id, inserted = animes.upsert(_anime(1, 'Fake Show'))
+    assert anime_id > 0 and inserted
+
+    assert animes.upsert(_anime(1, 'Fake Show (Renamed)', airing=False)) == (anime_id, False)
+    stored = animes.get_by_mal_id(1)
+    assert stored.title == 'Fake Show (Renamed)' and not stored.airing
+
+
+def test_anime_upsert_many_flags_each_row(table):
+    animes = table.get_animes()
+    first_id, _ = animes.upsert(_anime(1, 'Fake Show 1'))
+
+    results = animes.upsert_many([_anime(2, 'Fake Show 2'), _anime(1, 'Fake Show 1'), _anime(3, 'Fake Show 3')])
+
+    assert [inserted for _, inserted in results] == [True, False, True]
+    assert results[1][0] == first_id
+    assert len({anime_id for anime_id, _ in results}) == 3
+
+
+def test_episode_upsert_refreshes_the_links(table):
+    anime_id, _ = table.get_animes().upsert(_anime(1, 'Fake Show'))
+    episodes = table.get_episodes()
+
+    episode_id, inserted = episodes.upsert(_episode(anime_id, 1, 1))
+    assert inserted
+
+    assert episodes.upsert(_episode(anime_id, 1, 1, link_suffix='?v=2')) == (episode_id, False)
+    assert episodes.get_by_id(episode_id).download_link_hd.endswith('?v=2')
+
+
+def test_episode_rejected_by_a_constraint_fails_alone(table):
+    anime_id, _ = table.get_animes().upsert(_anime(1, 'Fake Show'))
+    episodes = table.get_episodes()
+    duplicate_link = _episode(anime_id, 1, 3)
+    duplicate_link.watch_link = _episode(anime_id, 1, 1).watch_link  # UNIQUE (watch_link)
+    missing_link = _episode(anime_id, 1, 4)
+    missing_link.download_link_hd = None  # NOT NULL
+
+    results = episodes.upsert_many([_episode(anime_id, 1, 1), _episode(anime_id, 1, 2), duplicate_link, missing_link])
+
+    assert [inserted for _, inserted in results] == [True, True, False, False]
+    assert [episode_id for episode_id, _ in results[2:]] == [values.INSERT_FAILED, values.INSERT_FAILED]
+    assert table.get_episodes().get_last_episode_number(1) == 2
+
+
+def test_database_error_fails_every_row(table):
+    table.database_manager.execute_non_query('DROP TABLE episodes')
+
+    results = table.get_episodes().upsert_many([_episode(1, 1, 1), _episode(1, 1, 2)])
+
+    assert results == [(values.BAD_ID, False), (values.BAD_ID, False)]